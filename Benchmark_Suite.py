@@ -0,0 +1,391 @@
+''' Script is called Benchmark_Suite.py '''
+# Times the analysis and driver hot paths and compares them with the
+# baselines stored in benchmarks/baselines.json. Each time is divided by a
+# calibration workload timed in the same run (a pure-Python loop or a
+# memory-bound numpy pass), so baselines recorded on one machine still hold
+# on a faster or slower one, e.g.
+#   python Benchmark_Suite.py                 # compare, exit 1 on regression
+#   python Benchmark_Suite.py --quick         # skip the 10**7-point grids
+#   python Benchmark_Suite.py --save          # record new baselines
+#   python Benchmark_Suite.py thrust interp   # only names containing these
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(ROOT_DIR, 'benchmarks', 'baselines.json')
+
+''' Constants '''
+GRID_SIZES = (200, 10**4, 10**5, 10**6, 10**7)
+QUICK_LIMIT = 10**6         # Largest grid run with --quick
+REPEATS = 7                 # Best of REPEATS timings is reported
+DEFAULT_THRESHOLD = 1.5     # Slower than baseline by this factor: regression
+LOG_ROWS = 100000           # Rows in the synthetic CSV / binlog files
+CALIBRATION_POINTS = 10**6  # Array length of the numpy calibration
+
+BENCHMARKS = []
+
+# Synthetic log files live here for the duration of the run
+SCRATCH_DIR = tempfile.TemporaryDirectory()
+
+
+''' Functions '''
+def benchmark(name, size=None, kind='python'):
+    # Registering a setup function. It returns the zero-argument callable
+    # that gets timed, so setup cost is never part of the measurement.
+    # kind names the calibration the time is normalised by: 'numpy' for
+    # array-bound work, 'python' for interpreter-bound work
+    def register(setup):
+        BENCHMARKS.append((name, size, kind, setup))
+        return setup
+    return register
+
+
+def rpm_inputs(points):
+    # Diameter / pitch / RPM arrays shaped like the thrust scripts' inputs
+    diameters = np.linspace(12, 30, points)
+    pitches = np.full(points, 10.0)
+    rpms = np.interp(diameters, [16, 20, 26], [5573, 4643, 3331])
+    return diameters, pitches, rpms
+
+
+for grid_points in GRID_SIZES:
+    @benchmark(f'static_thrust_calculation[{grid_points}]', grid_points, 'numpy')
+    def _static_thrust(points=grid_points):
+        from Static_Thrust_Calculations import static_thrust_calculation
+        diameters, pitches, rpms = rpm_inputs(points)
+        return lambda: static_thrust_calculation(diameters, pitches, rpms)
+
+    @benchmark(f'thrust_rpm_percent_change[{grid_points}]', grid_points, 'numpy')
+    def _percent_change(points=grid_points):
+        from Static_Thrust_Calculations import thrust_rpm_percent_change
+        diameters, pitches, rpms = rpm_inputs(points)
+        return lambda: thrust_rpm_percent_change(diameters, pitches, rpms, -10)
+
+    @benchmark(f'interp1d_rpm[{grid_points}]', grid_points, 'numpy')
+    def _interp1d(points=grid_points):
+        from scipy.interpolate import interp1d
+        diameters = np.linspace(12, 30, points)
+
+        def run():
+            # Built and evaluated per call, as in the thrust scripts
+            interp_func = interp1d([16, 20, 26], [5573, 4643, 3331],
+                                   kind='linear', fill_value="extrapolate")
+            return interp_func(diameters)
+        return run
+
+    @benchmark(f'rpm_model[{grid_points}]', grid_points, 'numpy')
+    def _rpm_model(points=grid_points):
+        from Thrust_RPM_Model import rpm_model
+        diameters = np.linspace(12, 30, points)
+        # Looked up per call like interp1d_rpm; the cache keeps the table
+        return lambda: rpm_model()(diameters)
+
+
+def synthetic_columns(rows):
+    time_s = np.arange(rows) * 0.1
+    force = 20 * np.clip(np.sin(time_s / 30), 0, None)
+    current = 2 * force
+    voltage = 16.8 - 0.02 * current
+    return time_s, force, voltage, current
+
+
+@benchmark(f'csv_log_parse[{LOG_ROWS}]', LOG_ROWS, 'numpy')
+def _csv_log_parse():
+    from Thrust_Log_Analysis import analyze_log
+    time_s, force, voltage, current = synthetic_columns(LOG_ROWS)
+    path = os.path.join(SCRATCH_DIR.name, 'synthetic_log.csv')
+    with open(path, 'w') as file:
+        file.write("Timestamp (ms),Force (N),Voltage (V),Current (A),Power (W)\n")
+        np.savetxt(file, np.column_stack((time_s, force, voltage, current,
+                                          voltage * current)),
+                   delimiter=',', fmt='%.6g')
+    return lambda: list(analyze_log(path))
+
+
+@benchmark(f'binary_log_parse[{LOG_ROWS}]', LOG_ROWS, 'numpy')
+def _binary_log_parse():
+    from Thrust_Log_Analysis import analyze_log
+    from Thrust_Binary_Log import RECORD_DTYPE
+    import binlog
+    time_s, force, voltage, current = synthetic_columns(LOG_ROWS)
+    records = np.zeros(LOG_ROWS, dtype=RECORD_DTYPE)
+    records['timestamp_us'] = (time_s * 1e6).astype(np.int64) % (1 << binlog.TICKS_BITS)
+    counts = np.round((force + 6) / 0.000458).astype(np.int32)
+    for name, values in (('hx711', counts),
+                         ('bus_voltage', np.round(voltage / 195.3125e-6)),
+                         ('current', np.round(current / 1e-4))):
+        values = values.astype(np.int32)
+        for byte in range(3):
+            records[name][:, byte] = (values >> (8 * byte)) & 0xFF
+
+    path = os.path.join(SCRATCH_DIR.name, 'synthetic_log.bin')
+    with open(path, 'wb') as file:
+        file.write(binlog.pack_header(100000, 0.000458, -6,
+                                      channels=binlog.CHANNEL_FORCE
+                                      | binlog.CHANNEL_POWER,
+                                      bus_voltage_lsb=195.3125e-6,
+                                      current_lsb=1e-4))
+        file.write(records.tobytes())
+    return lambda: list(analyze_log(path))
+
+
+@benchmark('figure_render[static_thrust]')
+def _figure_render():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from Static_Thrust_Calculations import (static_thrust_calculation,
+                                            thrust_rpm_percent_change)
+    diameters, pitches, rpms = rpm_inputs(200)
+    thrust_curve = static_thrust_calculation(diameters, pitches, rpms)
+    upper_error = thrust_rpm_percent_change(diameters, pitches, rpms, 5)
+    lower_error = thrust_rpm_percent_change(diameters, pitches, rpms, -10)
+
+    def run():
+        # The Static_Thrust_Calculations.py figure, rendered to PNG
+        figure = plt.figure(figsize=(8, 6), dpi=300)
+        plt.plot(diameters, thrust_curve, label='Thrust Curve', color='blue')
+        plt.fill_between(diameters, lower_error, upper_error, color='blue',
+                         alpha=0.3, label='+5% / -10% Error Region')
+        plt.scatter([16, 20, 24, 26], [27.92, 44.87, 50.06, 52.66],
+                    color='green', label='Measured Thrust', marker='s')
+        plt.xlim(14, 28)
+        plt.ylim(10, 65)
+        plt.xlabel('Propeller Diameter [inches]')
+        plt.ylabel('Static Thrust [Newtons]')
+        plt.legend()
+        plt.grid(True)
+        plt.tight_layout()
+        figure.savefig(io.BytesIO(), format='png')
+        plt.close(figure)
+    return run
+
+
+def emulated_bench():
+    # Drivers run under the host emulation with a converter that is always
+    # ready and no I2C bus time, so only the driver's own decode is timed
+    import emulator
+    from emulator import devices, signals
+    if emulator.bench is None:
+        emulator.install(devices.Bench(signals.throttle_steps(),
+                                       hx711_rate_sps=10**9))
+        emulator.bus_timing = False
+    return emulator.bench
+
+
+@benchmark('hx711_read[emulated]')
+def _hx711_read():
+    emulated_bench()
+    from hx711 import HX711
+    driver = HX711(d_out=27, pd_sck=12, channel=HX711.CHANNEL_A_64)
+    return lambda: driver.read()
+
+
+@benchmark('ina228_read_raw[emulated]')
+def _ina228_read_raw():
+    emulated_bench()
+    from machine import I2C, Pin
+    from ina228 import INA228
+    ina = INA228(I2C(0, scl=Pin(14), sda=Pin(22)), address=0x45)
+    ina.initialize()
+    return lambda: (ina.read_bus_voltage_raw(), ina.read_current_raw())
+
+
+@benchmark('ina228_read_all[emulated]')
+def _ina228_read_all():
+    emulated_bench()
+    from machine import I2C, Pin
+    from ina228 import INA228
+    ina = INA228(I2C(0, scl=Pin(14), sda=Pin(22)), address=0x45)
+    ina.initialize()
+    return ina.read_all
+
+
+@benchmark('telemetry_frame_roundtrip')
+def _telemetry_roundtrip():
+    sys.path.insert(0, os.path.join(ROOT_DIR, 'ESP32-MicroPython'))
+    import telemetry
+
+    def run():
+        encoder = telemetry.TelemetryEncoder()
+        decoder = telemetry.TelemetryDecoder()
+        for i in range(telemetry.SAMPLES_PER_FRAME):
+            encoder.append(i * 100000, 13100 + i, 86000, 2000)
+        decoder.decode(bytes(encoder.take_frame(0)))
+    return run
+
+
+def time_benchmark(setup):
+    # Best seconds per call over REPEATS runs of an auto-ranged loop count
+    function = setup()
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=REPEATS, number=number)) / number
+
+
+def _python_calibration():
+    # Interpreter-bound: loop, integer arithmetic, dict stores
+    def run():
+        total = 0
+        values = {}
+        for i in range(20000):
+            values[i & 255] = total
+            total += (i * 7) % 13
+        return total
+    return run
+
+
+def _numpy_calibration():
+    # Memory-bound: a few passes over an array larger than the caches
+    values = np.linspace(0, 1, CALIBRATION_POINTS)
+    return lambda: np.sqrt(values * values + 1.0).sum()
+
+
+CALIBRATIONS = {'python': _python_calibration, 'numpy': _numpy_calibration}
+
+
+def calibrate():
+    # Seconds per calibration run on this machine, by kind
+    return {kind: time_benchmark(setup) for kind, setup in CALIBRATIONS.items()}
+
+
+def machine_description():
+    import matplotlib
+    import scipy
+    return {
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'matplotlib': matplotlib.__version__,
+    }
+
+
+def load_baselines(path=BASELINE_PATH):
+    # Returns ({name: seconds}, {kind: calibration seconds}); both empty
+    # when nothing has been saved yet
+    if not os.path.exists(path):
+        return {}, {}
+    with open(path) as file:
+        stored = json.load(file)
+    return stored['results'], stored.get('calibration', {})
+
+
+def save_baselines(results, calibration, path=BASELINE_PATH):
+    # Merging, so a filtered run only replaces the benchmarks it timed.
+    # Times kept from an earlier run are rescaled to this run's calibration
+    merged, old_calibration = load_baselines(path)
+    kinds = {name: kind for name, _, kind, _ in BENCHMARKS}
+    for name in merged:
+        kind = kinds.get(name, 'python')
+        if kind in old_calibration:
+            merged[name] *= calibration[kind] / old_calibration[kind]
+    merged.update(results)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump({'machine': machine_description(),
+                   'calibration': calibration,
+                   'results': dict(sorted(merged.items()))},
+                  file, indent=2)
+        file.write('\n')
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:7.2f} {unit}"
+    return f"{seconds / 1e-9:7.2f} ns"
+
+
+def run_suite(patterns=(), quick=False, threshold=DEFAULT_THRESHOLD):
+    # Returns ({name: seconds}, {kind: calibration seconds}, [names slower
+    # than threshold x baseline]). Baselines are shown rescaled to this
+    # machine by the ratio of the calibration times
+    baselines, baseline_calibration = load_baselines()
+    calibration = calibrate()
+    results = {}
+    regressions = []
+
+    for kind, seconds in calibration.items():
+        scale = ''
+        if kind in baseline_calibration:
+            scale = (f"  ({seconds / baseline_calibration[kind]:.2f}x "
+                     f"the baseline machine's time)")
+        print(f"calibration[{kind}]: {format_time(seconds).strip()}{scale}")
+    if baselines and not baseline_calibration:
+        print("Baselines have no calibration: comparing absolute times")
+
+    print(f"{'benchmark':42} {'time':>10} {'baseline':>10} {'ratio':>7}")
+    for name, size, kind, setup in BENCHMARKS:
+        if patterns and not any(pattern in name for pattern in patterns):
+            continue
+        if quick and size is not None and size > QUICK_LIMIT:
+            continue
+
+        seconds = time_benchmark(setup)
+        results[name] = seconds
+
+        baseline = baselines.get(name)
+        if baseline is None:
+            print(f"{name:42} {format_time(seconds)} {'-':>10} {'-':>7}")
+            continue
+        scaled_baseline = baseline
+        if kind in baseline_calibration:
+            scaled_baseline *= calibration[kind] / baseline_calibration[kind]
+        ratio = seconds / scaled_baseline
+        if ratio > threshold:
+            # Timing a suspected regression again before reporting it, as
+            # a busy host easily adds tens of percent to a single run. Its
+            # calibration is timed again beside it, since the host's speed
+            # drifts over the length of the suite
+            seconds = min(seconds, time_benchmark(setup))
+            results[name] = seconds
+            if kind in baseline_calibration:
+                scaled_baseline = (baseline
+                                   * time_benchmark(CALIBRATIONS[kind])
+                                   / baseline_calibration[kind])
+            ratio = seconds / scaled_baseline
+        flag = ''
+        if ratio > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        elif ratio < 1 / threshold:
+            flag = '  faster'
+        print(f"{name:42} {format_time(seconds)} "
+              f"{format_time(scaled_baseline)} {ratio:6.2f}x{flag}")
+
+    return results, calibration, regressions
+
+
+''' Main Code '''
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument('patterns', nargs='*',
+                        help="only run benchmarks whose name contains one")
+    parser.add_argument('--quick', action='store_true',
+                        help=f"skip grids larger than {QUICK_LIMIT} points")
+    parser.add_argument('--save', action='store_true',
+                        help="store the results as the new baselines")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown factor reported as a regression")
+    arguments = parser.parse_args()
+
+    suite_results, suite_calibration, suite_regressions \
+        = run_suite(arguments.patterns, arguments.quick, arguments.threshold)
+
+    if arguments.save:
+        save_baselines(suite_results, suite_calibration)
+        print(f"Baselines saved to {BASELINE_PATH}")
+    elif suite_regressions:
+        print(f"{len(suite_regressions)} regression(s): "
+              + ", ".join(suite_regressions))
+        sys.exit(1)
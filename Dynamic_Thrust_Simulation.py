@@ -1,6 +1,221 @@
 ''' Script is called Dynamic_Thrust_Simulation.py '''
 
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import itertools
+from math import pi
+
+# One copy of the static model: the sweep evaluates the same function the
+# plots, benchmarks and model fitting use
+from Static_Thrust_Calculations import static_thrust_calculation
+
+''' Functions '''
+def dynamic_thrust_calculation(propeller_diameters, propeller_pitch, rpms,
+                               airspeeds, air_density=1.225,
+                               pitch_speed_factor=1.0):
+    # Same source as static_thrust_calculation(), with the freestream term:
+    # thrust falls as the airspeed [m/s] approaches the pitch speed.
+    # pitch_speed_factor > 1 stretches the effective pitch speed, for the
+    # RPM rise of a prop unloading in flow that the source equation leaves
+    # out; 1 is the source equation
+
+    multiplying_term_1 \
+        = air_density * pi * pow((0.0254 * propeller_diameters), 2) / 4
+    multiplying_term_2 = (propeller_diameters / (3.29546 * propeller_pitch))
+
+    velocity_exit_term = rpms * 0.0254 * propeller_pitch * (1/60)
+
+    thrust = (multiplying_term_1
+              * (pow(velocity_exit_term, 2)
+                 - velocity_exit_term * airspeeds / pitch_speed_factor)
+              * pow(multiplying_term_2, 1.5))
+
+    return thrust
+
+
+def dynamic_thrust_surface(propeller_diameters, airspeeds, propeller_pitch,
+                           rpm_function, air_density=1.225,
+                           pitch_speed_factor=1.0):
+    # Thrust over the full diameter x airspeed grid in one call, shaped
+    # (diameters, airspeeds). rpm_function maps diameters to RPM, e.g. a
+    # Thrust_RPM_Model.rpm_model()
+
+    diameters = np.asarray(propeller_diameters, dtype=float).reshape(-1, 1)
+    speeds = np.asarray(airspeeds, dtype=float).reshape(1, -1)
+
+    return dynamic_thrust_calculation(diameters, propeller_pitch,
+                                      rpm_function(diameters), speeds,
+                                      air_density, pitch_speed_factor)
+
+
+def fit_pitch_speed_factor(propeller_diameters, propeller_pitch, rpms,
+                           airspeeds, thrust, air_density=1.225):
+    # Least-squares pitch_speed_factor for measured (wind tunnel) thrust.
+    # With T0 the static thrust, T / T0 = 1 - (V / v_exit) / factor is
+    # linear in 1 / factor, so the fit is closed form
+
+    static_thrust = dynamic_thrust_calculation(
+        propeller_diameters, propeller_pitch, rpms, 0.0, air_density)
+    velocity_exit_term = rpms * 0.0254 * propeller_pitch * (1/60)
+
+    x = np.asarray(airspeeds, dtype=float) / velocity_exit_term
+    y = 1 - np.asarray(thrust, dtype=float) / static_thrust
+
+    return float(np.sum(x * x) / np.sum(x * y))
+
+
+def _sweep_blocks(grid_shape, chunk_points):
+    # Splitting a grid into blocks of at most chunk_points values.
+    # Every axis after the split axis is kept whole, the split axis is cut
+    # into runs of rows and every axis before it is walked one index at a time
+
+    split_axis = len(grid_shape) - 1
+    inner_points = 1
+    while split_axis > 0 and inner_points * grid_shape[split_axis] <= chunk_points:
+        inner_points = inner_points * grid_shape[split_axis]
+        split_axis = split_axis - 1
+
+    rows_per_block = max(1, chunk_points // inner_points)
+    inner_index = tuple(slice(0, length)
+                        for length in grid_shape[split_axis + 1:])
+
+    for outer_index in np.ndindex(*grid_shape[:split_axis]):
+        for start in range(0, grid_shape[split_axis], rows_per_block):
+            stop = min(start + rows_per_block, grid_shape[split_axis])
+            yield tuple(outer_index) + (slice(start, stop),) + inner_index
+
+
+def sweep_block_axes(axes, index):
+    # The axis values of one block, each reshaped along its own dimension
+    # so NumPy broadcasting builds the block
+
+    dimensions = len(axes)
+    block_axes = []
+    for axis_number, (axis, axis_index) in enumerate(zip(axes, index)):
+        shape = [1] * dimensions
+        if isinstance(axis_index, slice):
+            values = axis[axis_index]
+            shape[axis_number] = len(values)
+        else:
+            values = axis[axis_index:axis_index + 1]
+        block_axes.append(values.reshape(shape))
+    return block_axes
+
+
+def sweep_block(model, axes, index):
+    # Evaluating model() over one block of the grid, as its full block shape
+
+    block = model(*sweep_block_axes(axes, index))
+    block_shape = tuple(1 if isinstance(axis_index, (int, np.integer))
+                        else axis_index.stop - axis_index.start
+                        for axis_index in index)
+    return np.broadcast_to(block, block_shape)
+
+
+def iter_sweep(model, axes, chunk_points=2**20):
+    # Evaluating model() over the full outer product of the 1-D axes, one
+    # bounded block at a time, replacing an itertools.product loop over the
+    # grid. Yields (index, thrust_block) where index selects the block's
+    # position in the full grid, so callers can reduce or store it as it
+    # arrives
+
+    axes = [np.asarray(axis, dtype=float).ravel() for axis in axes]
+    grid_shape = tuple(len(axis) for axis in axes)
+
+    for index in _sweep_blocks(grid_shape, chunk_points):
+        yield index, sweep_block(model, axes, index)
+
+
+def thrust_sweep(propeller_diameters, propeller_pitches, rpms,
+                 chunk_points=2**20, out=None, max_bytes=2**28):
+    # Static thrust over the diameter x pitch x RPM grid. Pass a
+    # np.lib.format.open_memmap() array as out to keep grids that do not
+    # fit in RAM on disk; only one block is ever held in memory. Without
+    # out, grids larger than max_bytes are refused rather than allocated
+
+    axes = (propeller_diameters, propeller_pitches, rpms)
+    grid_shape = tuple(np.size(axis) for axis in axes)
+
+    if out is None:
+        grid_bytes = 8 * np.prod(grid_shape, dtype=np.int64)    # float64
+        if grid_bytes > max_bytes:
+            raise ValueError(f"a {grid_shape} grid needs "
+                             f"{grid_bytes / 2**20:.0f} MB, over max_bytes "
+                             f"({max_bytes / 2**20:.0f} MB); pass an "
+                             f"open_memmap() array as out, or reduce it with "
+                             f"iter_sweep() / sweep_maximum()")
+        out = np.empty(grid_shape)
+    elif out.shape != grid_shape:
+        raise ValueError(f"out has shape {out.shape}, expected {grid_shape}")
+
+    for index, block in iter_sweep(static_thrust_calculation, axes,
+                                   chunk_points):
+        out[index] = block
+
+    return out
+
+
+def sweep_maximum(model, axes, chunk_points=2**20):
+    # Largest value of model() over the grid and the axis values that
+    # produced it, without ever building the full grid
+
+    axes = [np.asarray(axis, dtype=float).ravel() for axis in axes]
+    best_value = -np.inf
+    best_parameters = None
+
+    for index, block in iter_sweep(model, axes, chunk_points):
+        block_position = np.unravel_index(np.argmax(block), block.shape)
+        block_value = block[block_position]
+
+        if block_value > best_value:
+            best_value = block_value
+            best_parameters = []
+            for axis, axis_index, position in zip(axes, index, block_position):
+                if isinstance(axis_index, slice):
+                    best_parameters.append(axis[axis_index.start + position])
+                else:
+                    best_parameters.append(axis[axis_index])
+
+    return best_value, tuple(best_parameters)
+
+
+''' Main Code '''
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+
+    # Propeller catalog being sized [inches] and motor RPM range
+    catalog_diameters = np.linspace(12, 30, 181)
+    catalog_pitches = np.linspace(6, 14, 81)
+    sweep_rpms = np.linspace(3000, 6000, 301)
+
+    thrust_grid = thrust_sweep(catalog_diameters, catalog_pitches, sweep_rpms)
+
+    peak_thrust, peak_parameters \
+        = sweep_maximum(static_thrust_calculation,
+                        (catalog_diameters, catalog_pitches, sweep_rpms))
+    print(f"{thrust_grid.size} grid points evaluated")
+    print(f"Peak thrust {peak_thrust:.2f} N at {peak_parameters[0]:.1f} in "
+          f"diameter, {peak_parameters[1]:.1f} in pitch, "
+          f"{peak_parameters[2]:.0f} RPM")
+
+    ''' Graphing '''
+    fig_width = 8
+    fig_height = 6
+
+    # Thrust over diameter x pitch at a fixed RPM
+    plotted_rpm = 4643
+    rpm_index = np.argmin(np.abs(sweep_rpms - plotted_rpm))
+
+    plt.figure(figsize=(fig_width, fig_height), dpi=300)
+
+    contours = plt.contourf(catalog_diameters, catalog_pitches,
+                            thrust_grid[:, :, rpm_index].T, levels=20,
+                            cmap='viridis')
+    plt.colorbar(contours, label='Static Thrust [Newtons]')
+
+    # Labels and title
+    plt.xlabel('Propeller Diameter [inches]')
+    plt.ylabel('Propeller Pitch [inches]')
+    plt.title(f'Static Thrust at {sweep_rpms[rpm_index]:.0f} RPM')
+    plt.tight_layout()
+
+    # Show the plot
+    plt.show()
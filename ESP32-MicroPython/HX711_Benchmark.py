@@ -0,0 +1,122 @@
+''' Script is called HX711_Benchmark.py '''
+# Reports per-read latency of the HX711 shift-in (Pin.value() path vs the
+# viper register path), whether the two paths read the same value from a
+# constant load (leave a known weight on the load cell), and the sample
+# rate achieved by read_many() and by the DOUT falling-edge interrupt
+# (HX711EdgeReader) through each path.
+# The drivers use the Pin.value() path until this confirms the viper path.
+# With the RATE pin tied high the HX711 converts at 80 SPS, so read_many()
+# should report ~80 samples/sec and the shift-in must stay well under the
+# 12.5 ms conversion period.
+import time
+from array import array
+from hx711 import HX711, HX711EdgeReader
+
+# Variables for the HX711 Amplifier
+CHANNEL_A_64 = const(3)
+
+# I/O Pins
+hx711_digitalout = 27
+hx711_powerdown_sck = 12
+
+latency_reads = 200				# Reads timed per driver path
+agreement_reads = 50			# Reads averaged per path for the load check
+rate_reads = 400				# Conversions collected by read_many()
+hx711_rate_sps = 80				# RATE pin high
+
+loadcell_driver = HX711(d_out=hx711_digitalout, pd_sck=hx711_powerdown_sck,
+                        channel=CHANNEL_A_64)
+
+
+''' - - - - - Measurement - - - - - '''
+# Timing only the clock-out (the wait for DOUT is excluded)
+def shift_in_latency(use_fast_path):
+    loadcell_driver.fast = use_fast_path
+    worst_us = 0
+    total_us = 0
+    for i in range(latency_reads):
+        while not loadcell_driver.is_ready():
+            pass
+        start = time.ticks_us()
+        loadcell_driver._shift_in()
+        elapsed = time.ticks_diff(time.ticks_us(), start)
+        total_us = total_us + elapsed
+        worst_us = max(worst_us, elapsed)
+    return total_us / latency_reads, worst_us
+
+# Mean and standard deviation of converted counts through one path. A bit
+# sampled at the wrong moment shows up as a large offset between the paths
+# (e.g. every bit shifted by one doubles or halves the count)
+def mean_count(use_fast_path):
+    loadcell_driver.fast = use_fast_path
+    total = 0
+    squares = 0
+    for i in range(agreement_reads):
+        value = loadcell_driver.read()
+        total = total + value
+        squares = squares + value * value
+    mean = total / agreement_reads
+    return mean, max(squares / agreement_reads - mean * mean, 0) ** 0.5
+
+
+# Samples per second of read_many() and of the DOUT interrupt through one
+# path; the interrupt clocks conversions out in a hard IRQ only with viper
+def sample_rates(use_fast_path):
+    loadcell_driver.fast = use_fast_path
+    samples = array('i', bytearray(4 * rate_reads))
+
+    start = time.ticks_ms()
+    loadcell_driver.read_many(rate_reads, samples, raw=True)
+    elapsed_ms = time.ticks_diff(time.ticks_ms(), start)
+    print("  read_many(): {} samples in {} ms = {:.1f} samples/sec".format(
+        rate_reads, elapsed_ms, rate_reads * 1000 / elapsed_ms))
+
+    # Same number of conversions taken by the DOUT interrupt; the main
+    # thread only sleeps, so everything not spent in the IRQ is free CPU time
+    edge_reader = HX711EdgeReader(loadcell_driver, rate_sps=hx711_rate_sps)
+    stamps_us = array('I', bytearray(4 * rate_reads))
+    start = time.ticks_ms()
+    edge_reader.start()
+    taken = 0
+    while taken < rate_reads:
+        time.sleep_ms(10)
+        edge_reader.service()
+        taken = taken + edge_reader.read_into(samples, stamps_us, taken,
+                                              rate_reads)
+    edge_reader.stop()
+    elapsed_ms = time.ticks_diff(time.ticks_ms(), start)
+
+    print("  DOUT interrupt ({} IRQ): {} samples in {} ms = {:.1f} "
+          "samples/sec".format("hard" if edge_reader.hard else "soft",
+                               taken, elapsed_ms, taken * 1000 / elapsed_ms))
+    print("    missed {missed}, duplicates {duplicates}, dropped {dropped}, "
+          "spurious edges {spurious}, stalls {stalls}".format(
+              **edge_reader.summary()))
+
+
+''' - - - - - Main Logic - - - - - '''
+fast_available = loadcell_driver.fast_available
+
+mean_us, worst_us = shift_in_latency(False)
+print("Pin.value() read: {:7.1f} us mean, {:5d} us worst".format(mean_us, worst_us))
+
+if fast_available:
+    mean_us, worst_us = shift_in_latency(True)
+    print("viper read:       {:7.1f} us mean, {:5d} us worst".format(mean_us, worst_us))
+else:
+    print("viper read:       not available on this board / pin setup")
+
+if fast_available:
+    pins_mean, pins_std = mean_count(False)
+    fast_mean, fast_std = mean_count(True)
+    print("Same load, Pin.value(): {:.0f} +/- {:.0f} counts, viper: {:.0f} "
+          "+/- {:.0f} counts".format(pins_mean, pins_std, fast_mean, fast_std))
+    agree = abs(fast_mean - pins_mean) <= 3 * max(pins_std, fast_std, 1)
+    print("Paths {}".format("agree" if agree else
+                            "DISAGREE: check the PD_SCK timing in hx711.py"))
+
+print("Pin.value() path (default):")
+sample_rates(False)
+if fast_available:
+    print("viper path (fast=True):")
+    sample_rates(True)
@@ -0,0 +1,63 @@
+''' Script is called LoadCell_Calibration.py '''
+# Calibrates the load cell on the stand and saves the constants to
+# calibration.json, which Power_Thrust_Sensing.py and
+# LoadCell_Sensor_ESP32.py load at startup.
+#   Tare only:  re-zeroes with the stored gain (a few seconds)
+#   Full:       tare plus known weights, gain fitted by least squares
+from hx711 import HX711  			# Loadcell ADC library
+import calibration					# Fit / load / save of the constants
+
+''' - - - - - Load Cell Setup - - - - - '''
+# Variables for the HX711 Amplifier
+CHANNEL_A_128 = const(1)
+CHANNEL_A_64 = const(3)
+CHANNEL_B_32 = const(2)
+
+# I/O Pins
+hx711_digitalout = 27
+hx711_powerdown_sck = 12
+
+loadcell_driver = HX711(d_out=hx711_digitalout, pd_sck=hx711_powerdown_sck,
+                        channel=CHANNEL_A_64)
+
+samples_per_point = 64			# Conversions averaged per reading
+
+calibration_factor, calibration_offset = calibration.load()
+print("Current calibration: factor {}, offset {}".format(calibration_factor,
+                                                         calibration_offset))
+
+''' - - - - - Tare - - - - - '''
+input("Remove all load from the stand, then press Enter")
+tare_count, tare_deviation = calibration.average_counts(loadcell_driver,
+                                                       samples_per_point)
+print("Unloaded: {:.1f} counts (std dev {:.1f})".format(tare_count, tare_deviation))
+
+mode = input("Tare only (t) or full calibration with weights (f)? ")
+
+if mode.strip().lower() == 'f':
+    ''' - - - - - Known Weights - - - - - '''
+    points = [(tare_count, 0.0)]
+    while True:
+        entry = input("Mass on the stand in kg (blank to finish): ")
+        if not entry.strip():
+            break
+        mean, deviation = calibration.average_counts(loadcell_driver,
+                                                     samples_per_point)
+        force = float(entry) * calibration.GRAVITY
+        points.append((mean, force))
+        print("  {:.3f} N: {:.1f} counts (std dev {:.1f})".format(force, mean,
+                                                                  deviation))
+
+    calibration_factor, calibration_offset, residual = calibration.fit_gain(points)
+    print("Fitted factor {:.7g}, offset {:.5g}, rms residual {:.4f} N".format(
+        calibration_factor, calibration_offset, residual))
+    details = {'points': points, 'rms_residual': residual}
+else:
+    # Stored gain, new zero
+    calibration_offset = -tare_count * calibration_factor
+    details = {'tare_count': tare_count}
+
+calibration.save(calibration_factor, calibration_offset,
+                 samples_per_point=samples_per_point, **details)
+print("Saved to {}: factor {:.7g}, offset {:.5g}".format(
+    calibration.CALIBRATION_FILE, calibration_factor, calibration_offset))
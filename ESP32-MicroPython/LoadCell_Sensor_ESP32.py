@@ -1,9 +1,12 @@
 ''' Script is called LoadCell_Sensor_ESP32.py '''
 import time
 from machine import Pin, Timer, I2C, ADC
-from hx711 import HX711  			# Loadcell ADC library
+from hx711 import HX711, HX711EdgeReader	# Loadcell ADC library
 from ina228 import INA228  			# Power Monitor ADC library
 import uos							# Library for file system interaction
+from array import array				# Compact sample storage
+import binlog						# Packed binary log format
+import calibration					# Stored load cell constants
 
 ''' - - - - - Load Cell Setup - - - - - '''
 # Variables for the HX711 Amplifier
@@ -18,37 +21,76 @@ hx711_powerdown_sck = 12
 # Initialize HX711 and Calibration Settings
 loadcell_driver = HX711(d_out=hx711_digitalout, pd_sck=hx711_powerdown_sck,
                         channel=CHANNEL_A_64)
+hx711_rate_sps = 10				# HX711 RATE pin low = 10 SPS, high = 80 SPS
 
-calibration_factor = 0.000458
-calibration_offset = -6
+# Constants saved by LoadCell_Calibration.py (defaults if never calibrated)
+calibration_factor, calibration_offset = calibration.load()
+
+# Re-zeroing from an averaged burst at every start; the stand must be
+# unloaded when the script starts
+tare_on_start = False
+if tare_on_start:
+    calibration_offset = calibration.tare(loadcell_driver, calibration_factor)
 
 monitor_led = Pin(13, mode=Pin.OUT)
 
 ''' - - - - - Pre-allocated Arrays - - - - - '''
+# Zero-filled array of n 4-byte values built straight from raw bytes,
+# without a temporary list
+def sample_array(typecode, n):
+    return array(typecode, bytearray(4 * n))
+
+# Raw HX711 counts are stored in flat arrays (4 bytes per value, no heap
+# allocation per sample); calibration is applied when saving
 max_data_points = 1500			# Set an initial amount of data points
-force_values = [0.0] * max_data_points
-timestamps = [0.0] * max_data_points
+force_counts = sample_array('i', max_data_points)
+timestamps_us = sample_array('I', max_data_points)	# time.ticks_us() values
 
 data_index = 0
-time_ms = 0
+missed_conversions = 0			# Overwritten before the timer read them
+last_conversion_us = 0
+latest_force_count = 0
+
+stream_log = None				# Set in 'stream' recording mode
 
 ''' - - - - - Timer Callbacks - - - - - '''
+# The callback only captures the raw count and a ticks_us() stamp into
+# preallocated storage; printing and calibration happen in the main loop
+
 # Loadcell Timer Callback
 def read_load_cell(timer):
-    global data_index, max_data_points, time_ms, sampling_rate
-
-    raw_force = loadcell_driver.read(raw=True)
-    calibrated_force = (raw_force * calibration_factor) + calibration_offset
-
-    time_ms = time_ms + sampling_rate
+    global data_index, latest_force_count, missed_conversions
+    global last_conversion_us
+
+    now_us = time.ticks_us()
+    raw_force = loadcell_driver.read_nowait(raw=True)
+
+    # HX711 conversion not finished yet; nothing is lost, it is read on a
+    # later tick
+    if raw_force is None:
+        return
+
+    # A gap of n conversion periods since the previous read means n - 1
+    # conversions were overwritten; the stamps are poll times, so gaps
+    # under 1.75 periods are polling jitter, as in HX711EdgeReader
+    conversion_period_us = 1000000 // hx711_rate_sps
+    if data_index:
+        periods = (time.ticks_diff(now_us, last_conversion_us)
+                   + conversion_period_us // 4) // conversion_period_us
+        if periods > 1:
+            missed_conversions = missed_conversions + periods - 1
+    last_conversion_us = now_us
+
+    latest_force_count = raw_force
 
     # Check if within range of storing values
     if data_index < max_data_points:
-        # Saving force value and timestamp; then increment
-        force_values[data_index] = calibrated_force
-        timestamps[data_index] = time_ms / 1000
-
-        print(calibrated_force)
+        # Saving raw force count and timestamp; then increment
+        if stream_log:
+            stream_log.append(now_us, raw_force)
+        else:
+            force_counts[data_index] = raw_force
+            timestamps_us[data_index] = now_us
 
         data_index = data_index + 1
 
@@ -56,49 +98,156 @@ def read_load_cell(timer):
         if data_index >= max_data_points:
             # Stopping the timers
             load_cell_timer.deinit()
-            print("Timers deinitialized. Data collection complete.")
 
 # --- Timer Setup ---
 load_cell_timer = Timer(1)
 
-sampling_rate = 50  # ms
+# 'edge' reads each conversion from the DOUT falling-edge interrupt, exactly
+# once and stamped when it became ready; 'timer' polls DOUT every
+# sampling_rate ms, which is not locked to the HX711's conversion clock
+acquisition_mode = 'edge'
+edge_reader = HX711EdgeReader(loadcell_driver, rate_sps=hx711_rate_sps)
+
+sampling_rate = 50  # ms, timer polling period and main loop period
+log_format = 'csv'  # 'csv' for text, 'bin' for the packed binlog format
+
+# 'memory' keeps the run in RAM and saves it afterwards; 'stream' writes
+# binlog blocks to flash during the run so the duration is not limited by RAM
+recording_mode = 'memory'
+stream_block_records = 256
+
+# Binary log header with this script's calibration and sampling settings
+# (each stored sample is one HX711 conversion in either mode)
+def log_header():
+    return binlog.pack_header(1000000 // hx711_rate_sps, calibration_factor,
+                              calibration_offset,
+                              channels=binlog.CHANNEL_FORCE,
+                              hx711_channel=CHANNEL_A_64)
 
 ''' - - - - - Main Logic - - - - - '''
 # Asking user how long they plan on recording sensor data; then calculate the max number of data points
 recording_duration = int(input("Enter recording duration (seconds): "))
-print(f"Sensor recording will occur for {recording_duration} seconds")
-max_data_points = int((recording_duration * 1000) / sampling_rate)
 
-# Proper Pre-Allocation of Lists/Arrays
-force_values = [0.0] * max_data_points
-timestamps = [0.0] * max_data_points
-
-# Timers for the Loadcell
-load_cell_timer.init(period=sampling_rate, mode=Timer.PERIODIC, callback=read_load_cell)
+if recording_mode == 'stream' and recording_duration <= 0:
+    # Unbounded recording; stopped with Ctrl-C
+    print("Sensor recording will occur until stopped (Ctrl-C)")
+    max_data_points = 1 << 30
+else:
+    print(f"Sensor recording will occur for {recording_duration} seconds")
+    # One stored sample per HX711 conversion in either mode
+    max_data_points = recording_duration * hx711_rate_sps
+
+if recording_mode == 'stream':
+    # File is opened up front; samples go straight to flash in blocks
+    name_of_file = input("Enter filename to save (e.g., thrust_data): ")
+    filename = f"{name_of_file}.bin"
+    stream_log = binlog.DoubleBufferedLog(open(filename, 'wb'), log_header(),
+                                          block_records=stream_block_records)
+else:
+    # Proper Pre-Allocation of Lists/Arrays
+    force_counts = sample_array('i', max_data_points)
+    timestamps_us = sample_array('I', max_data_points)
+
+# Moving the conversions buffered by the DOUT interrupt into the run
+def take_edge_records():
+    global data_index, latest_force_count
+
+    if stream_log:
+        raw_force = edge_reader.read_nowait(raw=True)
+        while raw_force is not None and data_index < max_data_points:
+            stream_log.append(edge_reader.timestamp_us, raw_force)
+            latest_force_count = raw_force
+            data_index = data_index + 1
+            raw_force = edge_reader.read_nowait(raw=True)
+    else:
+        taken = edge_reader.read_into(force_counts, timestamps_us, data_index,
+                                      max_data_points)
+        if taken:
+            data_index = data_index + taken
+            latest_force_count = force_counts[data_index - 1]
+
+# Recording ends at the requested duration even if fewer samples were
+# stored than conversions made (e.g. the timer missing 80 SPS conversions)
+def recording_time_left():
+    if recording_duration <= 0:
+        return True
+    return time.ticks_diff(time.ticks_ms(), recording_start_ms) \
+        < recording_duration * 1000
+
+# DOUT interrupt or timer for the Loadcell
+recording_start_ms = time.ticks_ms()
+if acquisition_mode == 'edge':
+    edge_reader.start()
+else:
+    load_cell_timer.init(period=sampling_rate, mode=Timer.PERIODIC, callback=read_load_cell)
 
 # Keeping the main thread alive and still active /
 # not busy constanty checking data_index [which would strain CPU]
-while data_index < max_data_points:
-    # Sleep for 100 milli-seconds to avoid busy waiting
-    time.sleep_ms(25)
-
-# Asking user for the file name to save to
-name_of_file = input("Enter filename to save (e.g., thrust_data): ")
-filename = f"{name_of_file}.csv"
-
-# --- Save Data ---
 try:
-    with open(filename, 'w') as file:
-        file.write("Timestamp (ms),Force (N)\n")
-        for i in range(data_index): # only write the data that was collected
-            file.write("{},{} \n".format(timestamps[i], force_values[i]))
-    print("Data saved to {}".format(filename))
-except OSError as e:
-    print("Error saving data:", e)
-    with open('Thrust_data.csv', 'w') as file:
-        file.write("Timestamp (ms),Force (N)\n")
-        for i in range(data_index):
-            file.write("{},{} \n".format(timestamps[i]))
-    print("Data saved to backup file Thrust_data.csv")
-
-load_cell_timer.deinit()  # Ensure timers are stopped in finally block
+    while data_index < max_data_points and recording_time_left():
+        if acquisition_mode == 'edge':
+            edge_reader.service()
+            take_edge_records()
+
+        # Writing a full stream buffer while the timer fills the other one
+        if stream_log:
+            stream_log.service()
+
+        # Printing the latest force reading
+        print((latest_force_count * calibration_factor) + calibration_offset)
+
+        # Sleep for one sampling period to avoid busy waiting
+        time.sleep_ms(sampling_rate)
+except KeyboardInterrupt:
+    print("Recording stopped")
+
+if acquisition_mode == 'edge':
+    edge_reader.stop()
+    take_edge_records()
+    print("DOUT interrupt stopped. Data collection complete.")
+    print("HX711 conversions: {conversions}, missed {missed}, duplicates "
+          "{duplicates}, dropped {dropped}, spurious edges {spurious}, "
+          "stalls {stalls}".format(**edge_reader.summary()))
+else:
+    load_cell_timer.deinit()
+    print("Timers deinitialized. Data collection complete.")
+    print("{} HX711 conversions missed".format(missed_conversions))
+
+# Writing the collected samples in the selected log format
+def save_data(filename):
+    if log_format == 'bin':
+        with open(filename, 'wb') as file:
+            writer = binlog.BinaryLogWriter(file, log_header())
+            for i in range(data_index): # only write the data that was collected
+                writer.write(timestamps_us[i], force_counts[i])
+            writer.flush()
+    else:
+        with open(filename, 'w') as file:
+            file.write("Timestamp (ms),Force (N)\n")
+            elapsed_us = 0
+            for i in range(data_index): # only write the data that was collected
+                # ticks_diff() handles the ticks_us() wrap-around
+                if i > 0:
+                    elapsed_us = elapsed_us + time.ticks_diff(timestamps_us[i], timestamps_us[i - 1])
+                force = (force_counts[i] * calibration_factor) + calibration_offset
+                file.write("{},{} \n".format(elapsed_us / 1000000, force))
+
+if stream_log:
+    # Streamed runs are already on flash; write the last partial block
+    stream_log.close()
+    print("{} samples saved to {} ({} dropped)".format(stream_log.written, filename,
+                                                      stream_log.dropped))
+else:
+    # Asking user for the file name to save to
+    name_of_file = input("Enter filename to save (e.g., thrust_data): ")
+    filename = f"{name_of_file}.{log_format}"
+
+    # --- Save Data ---
+    try:
+        save_data(filename)
+        print("Data saved to {}".format(filename))
+    except OSError as e:
+        print("Error saving data:", e)
+        backup_filename = "Thrust_data.{}".format(log_format)
+        save_data(backup_filename)
+        print("Data saved to backup file {}".format(backup_filename))
@@ -1,9 +1,16 @@
 ''' Script is called Power_Thrust_Sensing.py '''
 import time
 from machine import Pin, Timer, I2C, ADC
-from hx711 import HX711  			# Loadcell ADC library
+from hx711 import HX711, HX711EdgeReader	# Loadcell ADC library
 from ina228 import INA228  			# Power Monitor ADC library
+from scheduler import AcquisitionScheduler	# Shared sensor timer
 import uos							# Library for file system interaction
+from array import array				# Compact sample storage
+import binlog						# Packed binary log format
+import telemetry					# Packed ESP-NOW telemetry frames
+import instrumentation				# Run timing / memory summary
+import calibration					# Stored load cell constants
+import running_stats				# Live thrust / power / g/W statistics
 
 import network
 import espnow						# For streaming values to receiver
@@ -21,6 +28,10 @@ e.add_peer(receiver_esp)      					# Must add_peer() before send()
 
 monitor_led = Pin(13, mode=Pin.OUT)
 
+# Samples are batched into binary frames (raw counts + ticks_us stamps)
+# instead of one formatted text message per main loop pass
+telemetry_encoder = telemetry.TelemetryEncoder()
+
 ''' - - - - - Load Cell Setup - - - - - '''
 # Variables for the HX711 Amplifier
 CHANNEL_A_128 = const(1)
@@ -35,143 +46,351 @@ hx711_powerdown_sck = 12
 loadcell_driver = HX711(d_out=hx711_digitalout, pd_sck=hx711_powerdown_sck,
                         channel=CHANNEL_A_64)
 
-calibration_factor = 0.000458  
-calibration_offset = -6       
+# Constants saved by LoadCell_Calibration.py (defaults if never calibrated)
+calibration_factor, calibration_offset = calibration.load()
+
+# Re-zeroing from an averaged burst at every start; the stand must be
+# unloaded when the script starts
+tare_on_start = False
+if tare_on_start:
+    calibration_offset = calibration.tare(loadcell_driver, calibration_factor)
 
 ''' - - - - - INA228 Setup - - - - - '''
 # MATEK INA Properties
 matek_shunt_resistor = 200 * pow(10, -6)
 
 # Initializing I2C and INA228
-i2c = I2C(0, scl=Pin(14), sda=Pin(22), freq=100000)
+i2c = I2C(0, scl=Pin(14), sda=Pin(22), freq=400000)
 ina = INA228(i2c, address=0x45, shunt_resistance=matek_shunt_resistor)
 ina.initialize()
 
+# Bus + shunt conversions averaged in hardware: 2 x 540 us x 4 = 4.32 ms,
+# so each read every power_monitor_period_us (5 ms) sees a fresh, averaged
+# result. Reading faster only returns the same conversion again and costs
+# two I2C transactions per read in the timer callback
+ina.configure_adc(mode=INA228.MODE_CONTINUOUS_BUS_SHUNT, bus_conversion_us=540,
+                  shunt_conversion_us=540, averages=4)
+
 ''' - - - - - Pre-allocated Arrays - - - - - '''
+# Zero-filled array of n 4-byte values built straight from raw bytes,
+# without a temporary list
+def sample_array(typecode, n):
+    return array(typecode, bytearray(4 * n))
+
+# Raw sensor counts are stored in flat arrays (4 bytes per value, no heap
+# allocation per sample); calibration is applied when saving
 max_data_points = 1500			# Set an initial amount of data points
-force_values = [0.0] * max_data_points
-voltage_values = [0.0] * max_data_points
-current_values = [0.0] * max_data_points
-power_values = [0.0] * max_data_points
-timestamps = [0.0] * max_data_points
+force_counts = sample_array('i', max_data_points)
+voltage_counts = sample_array('i', max_data_points)
+current_counts = sample_array('i', max_data_points)
+timestamps_us = sample_array('I', max_data_points)	# time.ticks_us() values
 
 data_index = 0
-time_ms = 0
 
-''' - - - - - Timer Callbacks - - - - - '''
-# Loadcell Timer Callback
-def read_load_cell(timer):
-    global data_index, max_data_points, time_ms, sampling_rate
-    
-    raw_force = loadcell_driver.read(raw=True)
-    calibrated_force = (raw_force * calibration_factor) + calibration_offset
-    
-    time_ms = time_ms + sampling_rate
+stream_log = None				# Set in 'stream' recording mode
+
+''' - - - - - Acquisition Scheduler - - - - - '''
+# One timer polls every sensor at its own rate. A record is stored each time
+# the HX711 finishes a conversion, together with the mean INA228 voltage and
+# current read since the previous record, so every record is one aligned,
+# timestamped (force, voltage, current) tuple
+hx711_rate_sps = 10				# HX711 RATE pin low = 10 SPS, high = 80 SPS
+power_monitor_period_us = 5000	# INA228 read every 5 ms (target 200 Hz)
+
+# 'edge': the DOUT falling-edge interrupt clocks out every conversion once
+# and stamps it; the scheduler only takes it from the buffer, so it only
+# needs the INA228 rate. 'poll': the scheduler checks DOUT every 2.5 ms, and
+# the record stamp is the poll time
+hx711_acquisition = 'edge'
+edge_reader = HX711EdgeReader(loadcell_driver, rate_sps=hx711_rate_sps)
+if hx711_acquisition == 'edge':
+    hx711_poll_us = power_monitor_period_us
+else:
+    hx711_poll_us = 2500
+
+# The rates above are targets; the rates achieved are printed at the end
+# of the run (and are in the summary as samples_per_channel)
+acquisition = AcquisitionScheduler(Timer(0), tick_us=hx711_poll_us)
+if hx711_acquisition == 'edge':
+    FORCE = acquisition.add_channel(lambda: edge_reader.read_nowait(True),
+                                    hx711_poll_us)
+else:
+    FORCE = acquisition.add_channel(lambda: loadcell_driver.read_nowait(True),
+                                    hx711_poll_us)
+VOLTAGE = acquisition.add_channel(ina.read_bus_voltage_raw,
+                                  power_monitor_period_us, averaged=True)
+CURRENT = acquisition.add_channel(ina.read_current_raw,
+                                  power_monitor_period_us, averaged=True)
+
+# Timing every scheduler tick and checking the HX711 conversion spacing;
+# the summary is saved next to the data file
+monitor = instrumentation.RunMonitor(conversion_period_us=1000000 // hx711_rate_sps)
+acquisition.probe = monitor.add_probe('acquisition', acquisition.tick_us)
+
+# Record Callback: only stores raw counts and the ticks_us() stamp; no
+# waiting, printing, float math or string formatting
+def store_record(timestamp_us, values):
+    global data_index
     
     # Check if within range of storing values
-    if data_index < max_data_points:
-        # Saving force value and timestamp; then increment
-        force_values[data_index] = calibrated_force
-        timestamps[data_index] = time_ms / 1000
-        
-        print(data_index)
-        
-        data_index = data_index + 1
-        
-        # Stop logging when reached the end
-        if data_index >= max_data_points:
-            # Stopping the timers
-            load_cell_timer.deinit()
-            power_monitor_timer.deinit()
-            espnow_timer.deinit()
-            
-            print("Timers deinitialized. Data collection complete.")        
-        
-
-# MATEK Power Monitor Timer Callback
-def read_power_monitor(timer):
-    global data_index, max_data_points
+    if data_index >= max_data_points:
+        return
     
-    voltage = ina.read_bus_voltage()
-    current = ina.read_current()
-    power = voltage * current
+    # Stamped when the conversion became ready, not when it was taken
+    if hx711_acquisition == 'edge':
+        timestamp_us = edge_reader.timestamp_us
     
-    # Check if within range of storing values
-    if data_index < max_data_points:
-        # Saving voltage, current and power values
-        voltage_values[data_index] = voltage
-        current_values[data_index] = current
-        power_values[data_index] = power
-        
-# ESPNOW Timer Callback
-def espnow_transmit(timer):
-    # Creating string message
-    if data_index < max_data_points:
-        force = force_values[data_index - 1]
-        voltage = voltage_values[data_index - 1]
-        current = current_values[data_index - 1]
-        power = power_values[data_index - 1]
-        
-        message = (f"{force:7.2f} N, {voltage:7.2f} V, "
-                   f"{current:7.2f} A, {power:7.2f} W")
+    # Saving raw counts and timestamp; then increment
+    if stream_log:
+        stream_log.append(timestamp_us, values[FORCE], values[VOLTAGE],
+                          values[CURRENT])
     else:
-        message = f"Finished Data Collection"
+        force_counts[data_index] = values[FORCE]
+        voltage_counts[data_index] = values[VOLTAGE]
+        current_counts[data_index] = values[CURRENT]
+        timestamps_us[data_index] = timestamp_us
+    
+    monitor.conversion(timestamp_us)
+    
+    # Queued for the next ESP-NOW frame; dropped (and counted) if the radio
+    # falls behind so recording is never held up
+    telemetry_encoder.append(timestamp_us, values[FORCE], values[VOLTAGE],
+                             values[CURRENT])
+    
+    # Raw counts queued for the running statistics (updated in main loop)
+    efficiency.append(timestamp_us, values[FORCE], values[VOLTAGE],
+                      values[CURRENT])
+    
+    data_index = data_index + 1
+    
+    # Stop logging when reached the end
+    if data_index >= max_data_points:
+        acquisition.stop()
         
-    # Transmitting message
-    e.send(receiver_esp, message)
+# Converting raw counts to Newtons, Volts, Amps and Watts
+def calibrate(force_count, voltage_count, current_count):
+    force = (force_count * calibration_factor) + calibration_offset
+    voltage = voltage_count * ina.bus_voltage_LSB
+    current = current_count * ina.current_LSB
+    return force, voltage, current, voltage * current
+
+def calibrated_sample(i):
+    return calibrate(force_counts[i], voltage_counts[i], current_counts[i])
+
+# Mean / variance / peak of thrust and power, energy and g/W kept in
+# constant memory, so efficiency is known without the raw samples
+efficiency = running_stats.EfficiencyStats(calibrate, time_constant_ms=1000)
+
+# Binary log header with this script's calibration and sampling settings
+def log_header():
+    return binlog.pack_header(1000000 // hx711_rate_sps, calibration_factor,
+                              calibration_offset,
+                              channels=binlog.CHANNEL_FORCE | binlog.CHANNEL_POWER,
+                              hx711_channel=CHANNEL_A_64,
+                              shunt_resistance=matek_shunt_resistor,
+                              bus_voltage_lsb=ina.bus_voltage_LSB,
+                              current_lsb=ina.current_LSB)
+
+# ESPNOW telemetry, sent from the main loop
+def send_frame(frame):
+    # send() returns False when the receiver did not acknowledge
+    try:
+        sent = e.send(receiver_esp, frame)
+    except OSError:
+        sent = False
+    monitor.send_result(sent)
+
+def send_telemetry():
+    # Sending every finished samples frame
+    frame = telemetry_encoder.take_frame(time.ticks_us())
+    while frame is not None:
+        send_frame(frame)
+        telemetry_encoder.release()
+        frame = telemetry_encoder.take_frame(time.ticks_us())
+
+def send_event(text):
+    send_frame(telemetry_encoder.event_frame(text, time.ticks_us()))
+
+def send_config():
+    # Calibration constants, so the receiver can convert the raw counts
+    send_frame(telemetry_encoder.config_frame(log_header(), time.ticks_us()))
         
 
-# --- Timer Setup ---
-power_monitor_timer = Timer(0)
-load_cell_timer = Timer(1)
+# --- Main Loop Setup ---
+main_loop_period = 50  # ms, ESP-NOW frames and flash writes
+telemetry_flush_loops = 5  # Partial frames sent every 5 loops (250 ms)
+telemetry_config_loops = 100  # Calibration resent every 100 loops (5 s)
+telemetry_stats_loops = 20  # Live efficiency event every 20 loops (1 s)
+log_format = 'csv'  # 'csv' for text, 'bin' for the packed binlog format
 
-espnow_timer = Timer(2)
+# 'memory' keeps the run in RAM and saves it afterwards; 'stream' writes
+# binlog blocks to flash during the run so the duration is not limited by RAM
+recording_mode = 'memory'
+stream_block_records = 256
 
-sampling_rate = 50  # ms
+send_run_summary = True  # Also send the timing summary over ESP-NOW
 
 ''' - - - - - Main Logic - - - - - '''
 # Asking user how long they plan on recording sensor data; then calculate the max number of data points
 recording_duration = int(input("Enter recording duration (seconds): "))
-print(f"Sensor recording will occur for {recording_duration} seconds")
-max_data_points = int((recording_duration * 1000) / sampling_rate)
 
-# Proper Pre-Allocation of Lists/Arrays
-force_values = [0.0] * max_data_points
-voltage_values = [0.0] * max_data_points
-current_values = [0.0] * max_data_points
-power_values = [0.0] * max_data_points
-timestamps = [0.0] * max_data_points
+if recording_mode == 'stream' and recording_duration <= 0:
+    # Unbounded recording; stopped with Ctrl-C
+    print("Sensor recording will occur until stopped (Ctrl-C)")
+    max_data_points = 1 << 30
+else:
+    print(f"Sensor recording will occur for {recording_duration} seconds")
+    max_data_points = recording_duration * hx711_rate_sps
+
+if recording_mode == 'stream':
+    # File is opened up front; samples go straight to flash in blocks
+    name_of_file = input("Enter filename to save (e.g., thrust_data): ")
+    filename = f"{name_of_file}.bin"
+    stream_log = binlog.DoubleBufferedLog(open(filename, 'wb'), log_header(),
+                                          block_records=stream_block_records)
+else:
+    # Proper Pre-Allocation of Lists/Arrays
+    force_counts = sample_array('i', max_data_points)
+    voltage_counts = sample_array('i', max_data_points)
+    current_counts = sample_array('i', max_data_points)
+    timestamps_us = sample_array('I', max_data_points)
 
-# Timers for the Power Monitor, Loadcell, and ESPNOW
-e.send(receiver_esp, "Starting . . . ")
+# Starting the shared acquisition timer for the Power Monitor and Loadcell
+send_config()
+send_event("Starting . . . ")
 
-power_monitor_timer.init(period=sampling_rate, mode=Timer.PERIODIC, callback=read_power_monitor)
-load_cell_timer.init(period=sampling_rate, mode=Timer.PERIODIC, callback=read_load_cell)
-espnow_timer.init(period=sampling_rate, mode=Timer.PERIODIC, callback=espnow_transmit)
+if hx711_acquisition == 'edge':
+    edge_reader.start()
+acquisition_start_us = time.ticks_us()
+acquisition.start(store_record, trigger=FORCE)
 
 
 # Keeping the main thread alive and still active /
-# not busy constanty checking data_index [which would strain CPU]
-while data_index < max_data_points:
-    # Sleep for 100 milli-seconds to avoid busy waiting
-    time.sleep_ms(100) 
+# not busy constanty checking data_index [which would strain CPU].
+# The main loop does the printing and ESP-NOW sends the callbacks used to do
+loop_count = 0
+try:
+    while data_index < max_data_points:
+        # Writing a full stream buffer while the timers fill the other one
+        if stream_log:
+            stream_log.service()
+        
+        # Re-arming the DOUT interrupt if an edge was lost
+        if hx711_acquisition == 'edge':
+            edge_reader.service()
+        
+        send_telemetry()
+        
+        # Folding the new records into the running statistics
+        efficiency.update()
+        
+        loop_count = loop_count + 1
+        
+        # Bounding the latency at low sample rates; the next callback hands
+        # over the partly filled frame
+        if loop_count % telemetry_flush_loops == 0:
+            telemetry_encoder.flush_requested = True
+        
+        # Late-joining receivers pick up the calibration from here
+        if loop_count % telemetry_config_loops == 0:
+            send_config()
+        
+        if loop_count % telemetry_stats_loops == 0:
+            send_event(efficiency.status_line())
+        
+        # Heap use every loop; progress and a timed collection once a second
+        monitor.sample_memory()
+        if loop_count % (1000 // main_loop_period) == 0:
+            print(data_index)
+            monitor.collect()
+        
+        # Sleep for one loop period to avoid busy waiting
+        time.sleep_ms(main_loop_period) 
+except KeyboardInterrupt:
+    print("Recording stopped")
 
-# Asking user for the file name to save to
-name_of_file = input("Enter filename to save (e.g., thrust_data): ")
-filename = f"{name_of_file}.csv"
+acquisition.stop()
+acquisition_us = time.ticks_diff(time.ticks_us(), acquisition_start_us)
+if hx711_acquisition == 'edge':
+    edge_reader.stop()
+efficiency.update()
 
+# Sending the samples still queued, then the end of the run
+send_telemetry()
+telemetry_encoder.flush()
+send_telemetry()
+if send_run_summary:
+    for line in monitor.summary_lines() + efficiency.summary_lines():
+        send_event(line)
+send_event("Finished Data Collection")
+print("Timers deinitialized. Data collection complete.")
+print("Samples per channel (force, voltage, current): {}".format(list(acquisition.samples)))
+print("Scheduler overruns per channel: {}".format(list(acquisition.overruns)))
+# Per-channel rates against their targets, for the run notes
+reads_per_second = [round(count * 1000000 / acquisition_us, 1)
+                    for count in acquisition.samples]
+target_reads_per_second = [hx711_rate_sps, 1000000 // power_monitor_period_us,
+                           1000000 // power_monitor_period_us]
+print("Achieved reads per second per channel: {}".format(reads_per_second))
+print("Target reads per second per channel: {}".format(target_reads_per_second))
+if hx711_acquisition == 'edge':
+    print("HX711 conversions: {conversions}, missed {missed}, duplicates "
+          "{duplicates}, dropped {dropped}, spurious edges {spurious}, "
+          "stalls {stalls}".format(**edge_reader.summary()))
+print("Telemetry frames: {}, samples dropped: {}".format(telemetry_encoder.sequence,
+                                                      telemetry_encoder.dropped))
+for line in monitor.summary_lines() + efficiency.summary_lines():
+    print(line)
 
-# --- Save Data ---
-try:
-    with open(filename, 'w') as file:
-        file.write("Timestamp (ms),Force (N),Voltage (V),Current (A),Power (W)\n")
-        for i in range(data_index): # only write the data that was collected
-            file.write("{},{},{},{},{}\n".format(timestamps[i], force_values[i], voltage_values[i], current_values[i], power_values[i]))
-    print("Data saved to {}".format(filename))
-except OSError as e:
-    print("Error saving data:", e)
-
-load_cell_timer.deinit()  # Ensure timers are stopped in finally block
-power_monitor_timer.deinit()
-espnow_timer.deinit()
+# Scheduler and buffer counters added to the instrumentation summary
+def run_summary_extra():
+    return {
+        'samples_per_channel': list(acquisition.samples),
+        'overruns_per_channel': list(acquisition.overruns),
+        'reads_per_second': reads_per_second,
+        'target_reads_per_second': target_reads_per_second,
+        'records': acquisition.records,
+        'telemetry_dropped': telemetry_encoder.dropped,
+        'stream_dropped': stream_log.dropped if stream_log else 0,
+        'efficiency': efficiency.summary(),
+        'hx711_edge': edge_reader.summary()
+        if hx711_acquisition == 'edge' else None,
+    }
+
+# Writing the collected samples in the selected log format
+def save_data(filename):
+    if log_format == 'bin':
+        with open(filename, 'wb') as file:
+            writer = binlog.BinaryLogWriter(file, log_header())
+            for i in range(data_index): # only write the data that was collected
+                writer.write(timestamps_us[i], force_counts[i],
+                             voltage_counts[i], current_counts[i])
+            writer.flush()
+    else:
+        with open(filename, 'w') as file:
+            file.write("Timestamp (ms),Force (N),Voltage (V),Current (A),Power (W)\n")
+            elapsed_us = 0
+            for i in range(data_index): # only write the data that was collected
+                # ticks_diff() handles the ticks_us() wrap-around
+                if i > 0:
+                    elapsed_us = elapsed_us + time.ticks_diff(timestamps_us[i], timestamps_us[i - 1])
+                file.write("{},{},{},{},{}\n".format(elapsed_us / 1000000, *calibrated_sample(i)))
+
+if stream_log:
+    # Streamed runs are already on flash; write the last partial block
+    stream_log.close()
+    print("{} samples saved to {} ({} dropped)".format(stream_log.written, filename,
+                                                      stream_log.dropped))
+    monitor.save(f"{name_of_file}_summary.json", run_summary_extra())
+else:
+    # Asking user for the file name to save to
+    name_of_file = input("Enter filename to save (e.g., thrust_data): ")
+    filename = f"{name_of_file}.{log_format}"
 
+    # --- Save Data ---
+    try:
+        save_data(filename)
+        print("Data saved to {}".format(filename))
+        monitor.save(f"{name_of_file}_summary.json", run_summary_extra())
+    except OSError as e:
+        print("Error saving data:", e)
@@ -0,0 +1,81 @@
+''' Script is called Sample_Capacity_Test.py '''
+# Measures how many samples fit in RAM with the old boxed-float list storage
+# and with the array storage used by Power_Thrust_Sensing.py. Run it on the
+# board from a fresh reset (nothing else loaded) and paste the report into
+# the run notes.
+import gc
+from array import array
+
+test_points = 2000				# Samples allocated per measurement
+target_ratio = 3				# Capacity gain the array layout must reach
+
+
+''' - - - - - Storage Layouts - - - - - '''
+# Original layout: five lists of boxed floats
+def allocate_float_lists(n):
+    storage = [[0.0] * n for _ in range(5)]
+    for values in storage:
+        for i in range(n):
+            values[i] = i * 0.5		# Each assignment allocates a new float
+    return storage
+
+# Current layout: raw counts and millisecond timestamps in 4-byte arrays
+def allocate_count_arrays(n):
+    storage = [array('i', bytearray(4 * n)) for _ in range(3)]
+    storage.append(array('I', bytearray(4 * n)))
+    for values in storage:
+        for i in range(n):
+            values[i] = i
+    return storage
+
+
+''' - - - - - Measurement - - - - - '''
+def bytes_per_sample(allocate):
+    gc.collect()
+    free_before = gc.mem_free()
+    storage = allocate(test_points)
+    gc.collect()
+    used = free_before - gc.mem_free()
+    del storage
+    gc.collect()
+    return used / test_points
+
+def max_samples(allocate, start):
+    # Growing the allocation until it no longer fits
+    n = start
+    step = start
+    while step >= 16:
+        try:
+            storage = allocate(n + step)
+            del storage
+            n = n + step
+        except MemoryError:
+            step = step // 2
+        gc.collect()
+    return n
+
+
+''' - - - - - Main Logic - - - - - '''
+gc.collect()
+print("Free heap: {} bytes".format(gc.mem_free()))
+
+capacity = {}
+for name, allocate in (("float lists", allocate_float_lists),
+                       ("count arrays", allocate_count_arrays)):
+    per_sample = bytes_per_sample(allocate)
+    if per_sample <= 0:
+        # Heap use did not change: not a board (e.g. the host emulator)
+        print("{:>12}: heap use not measurable here, run on the board"
+              .format(name))
+        continue
+    estimate = int(gc.mem_free() / per_sample)
+    measured = max_samples(allocate, max(16, estimate // 4))
+    capacity[name] = measured
+    print("{:>12}: {:6.1f} bytes/sample, {:7d} samples max "
+          "({:.0f} s at 50 ms)".format(name, per_sample, measured,
+                                       measured * 0.05))
+
+if len(capacity) == 2:
+    ratio = capacity["count arrays"] / capacity["float lists"]
+    print("Capacity gain: {:.1f}x ({} the {}x target)".format(
+        ratio, "meets" if ratio >= target_ratio else "misses", target_ratio))
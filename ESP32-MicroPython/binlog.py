@@ -0,0 +1,187 @@
+# binlog.py (Library File)
+# Packed binary sample log, shared by the ESP32 firmware (writer) and the
+# host-side decoder in Thrust_Binary_Log.py. Only uses struct so it imports
+# under both MicroPython and CPython
+
+import struct
+
+BINLOG_MAGIC = b'THRB'
+BINLOG_VERSION = 2
+
+# Header (little-endian):
+#   magic, version, header size, record size, channel flags, HX711 channel,
+#   sample period [us], calibration factor, calibration offset,
+#   shunt resistance [Ohm], bus voltage LSB [V], current LSB [A],
+#   timestamp counter width [bits] (version 2 only)
+HEADER_FORMAT = '<4sHHHBBIfffffB3x'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+HEADER_FORMAT_V1 = '<4sHHHBBIfffff'
+
+# time.ticks_us() wraps at 2**30 on MicroPython ports
+TICKS_BITS = 30
+
+# Channel flags
+CHANNEL_FORCE = 0x01
+CHANNEL_POWER = 0x02
+
+# Record (little-endian, 13 bytes):
+#   timestamp [us counter, uint32, wraps at 2**timestamp bits],
+#   HX711 raw count (24-bit),
+#   INA228 bus voltage count (24-bit), INA228 current count (24-bit, signed)
+RECORD_SIZE = 13
+TIMESTAMP_OFFSET = 0
+HX711_OFFSET = 4
+BUS_VOLTAGE_OFFSET = 7
+CURRENT_OFFSET = 10
+
+
+def pack_header(sample_period_us, calibration_factor, calibration_offset,
+                channels=CHANNEL_FORCE, hx711_channel=0, shunt_resistance=0.0,
+                bus_voltage_lsb=0.0, current_lsb=0.0, timestamp_bits=TICKS_BITS):
+    return struct.pack(HEADER_FORMAT, BINLOG_MAGIC, BINLOG_VERSION,
+                       HEADER_SIZE, RECORD_SIZE, channels, hx711_channel,
+                       sample_period_us, calibration_factor,
+                       calibration_offset, shunt_resistance,
+                       bus_voltage_lsb, current_lsb, timestamp_bits)
+
+
+def unpack_header(data):
+    magic, version = struct.unpack('<4sH', data[:6])
+    if magic != BINLOG_MAGIC:
+        raise ValueError('Not a binary thrust log')
+
+    if version == 1:
+        # Version 1 timestamps were microseconds since start as a uint32
+        fields = struct.unpack(HEADER_FORMAT_V1,
+                               data[:struct.calcsize(HEADER_FORMAT_V1)]) + (32,)
+    elif version == BINLOG_VERSION:
+        fields = struct.unpack(HEADER_FORMAT, data[:HEADER_SIZE])
+    else:
+        raise ValueError('Unsupported binary log version %d' % version)
+
+    (magic, version, header_size, record_size, channels, hx711_channel,
+     sample_period_us, calibration_factor, calibration_offset,
+     shunt_resistance, bus_voltage_lsb, current_lsb, timestamp_bits) = fields
+
+    return {
+        'header_size': header_size,
+        'record_size': record_size,
+        'channels': channels,
+        'hx711_channel': hx711_channel,
+        'sample_period_us': sample_period_us,
+        'calibration_factor': calibration_factor,
+        'calibration_offset': calibration_offset,
+        'shunt_resistance': shunt_resistance,
+        'bus_voltage_lsb': bus_voltage_lsb,
+        'current_lsb': current_lsb,
+        'timestamp_bits': timestamp_bits,
+    }
+
+
+def _pack_u24(buffer, offset, value):
+    buffer[offset] = value & 0xFF
+    buffer[offset + 1] = (value >> 8) & 0xFF
+    buffer[offset + 2] = (value >> 16) & 0xFF
+
+
+def pack_record(buffer, offset, timestamp_us, hx711_count,
+                bus_voltage_count=0, current_count=0):
+    # Writing one record into a preallocated bytearray at offset. Bytes are
+    # stored one at a time so no long integers are created in a callback
+    _pack_u24(buffer, offset + TIMESTAMP_OFFSET, timestamp_us)
+    buffer[offset + TIMESTAMP_OFFSET + 3] = (timestamp_us >> 24) & 0xFF
+    _pack_u24(buffer, offset + HX711_OFFSET, hx711_count)
+    _pack_u24(buffer, offset + BUS_VOLTAGE_OFFSET, bus_voltage_count)
+    _pack_u24(buffer, offset + CURRENT_OFFSET, current_count)
+
+
+class BinaryLogWriter:
+    """
+    Writes records through a fixed bytearray so each flash write covers
+    block_records samples instead of one formatted text line.
+    """
+    def __init__(self, file, header, block_records=256):
+        self.file = file
+        self.block_records = block_records
+        self.buffer = bytearray(RECORD_SIZE * block_records)
+        self.count = 0
+        self.file.write(header)
+
+    def write(self, timestamp_us, hx711_count, bus_voltage_count=0,
+              current_count=0):
+        pack_record(self.buffer, self.count * RECORD_SIZE, timestamp_us,
+                    hx711_count, bus_voltage_count, current_count)
+        self.count += 1
+        if self.count == self.block_records:
+            self.flush()
+
+    def flush(self):
+        if self.count:
+            self.file.write(memoryview(self.buffer)[:self.count * RECORD_SIZE])
+            self.count = 0
+
+
+class DoubleBufferedLog:
+    """
+    Two fixed record buffers for recordings of any length. Timer callbacks
+    append into the active buffer while the main loop writes the other one
+    to flash with service(), so memory use stays constant and everything up
+    to the last written block survives a crash.
+    """
+    def __init__(self, file, header, block_records=256):
+        self.file = file
+        self.block_records = block_records
+        self.buffers = (bytearray(RECORD_SIZE * block_records),
+                        bytearray(RECORD_SIZE * block_records))
+        self.active = 0
+        self.count = 0
+        self.pending = -1       # Buffer waiting to be written, -1 if none
+        self.written = 0
+        self.dropped = 0
+
+        self.file.write(header)
+        self.file.flush()
+
+    def append(self, timestamp_us, hx711_count, bus_voltage_count=0,
+               current_count=0):
+        # Safe to call from a timer callback: no allocation, no flash access
+        if self.count == self.block_records:
+            if self.pending >= 0:
+                # Both buffers full; the main loop has fallen behind
+                self.dropped += 1
+                return False
+            self.pending = self.active
+            self.active ^= 1
+            self.count = 0
+
+        pack_record(self.buffers[self.active], self.count * RECORD_SIZE,
+                    timestamp_us, hx711_count, bus_voltage_count, current_count)
+        self.count += 1
+
+        # Handing a full buffer to the main loop straight away if it is free
+        if self.count == self.block_records and self.pending < 0:
+            self.pending = self.active
+            self.active ^= 1
+            self.count = 0
+        return True
+
+    def service(self):
+        # Called from the main loop; writes the full buffer if there is one
+        pending = self.pending
+        if pending < 0:
+            return False
+
+        self.file.write(self.buffers[pending])
+        self.file.flush()
+        self.written += self.block_records
+        self.pending = -1
+        return True
+
+    def close(self):
+        # Writing whatever is left once the timers have been stopped
+        self.service()
+        if self.count:
+            self.file.write(memoryview(self.buffers[self.active])[:self.count * RECORD_SIZE])
+            self.written += self.count
+            self.count = 0
+        self.file.close()
@@ -0,0 +1,78 @@
+# calibration.py (Library File)
+# Load cell calibration: averaged tare, least-squares gain from known
+# weights, and the constants kept in a small JSON file on flash so the
+# acquisition scripts pick them up at startup.
+#   force [N] = raw HX711 count * calibration_factor + calibration_offset
+# Counts are the raw (unsigned) values the scripts store.
+
+import json
+from array import array
+
+CALIBRATION_FILE = 'calibration.json'
+
+# Values used before the load cell has been calibrated on this board
+DEFAULT_FACTOR = 0.000458
+DEFAULT_OFFSET = -6
+
+GRAVITY = 9.80665           # m/s^2, converting test weights to Newtons
+TARE_SAMPLES = 32           # 0.4 s at 80 SPS, 3.2 s at 10 SPS
+
+
+def average_counts(driver, samples=TARE_SAMPLES, buffer=None):
+    # Mean and standard deviation of a burst of consecutive conversions,
+    # read with HX711.read_many() into one preallocated array
+    if buffer is None or len(buffer) < samples:
+        buffer = array('i', bytearray(4 * samples))
+    driver.read_many(samples, buffer, raw=True)
+
+    mean = sum(buffer[i] for i in range(samples)) / samples
+    variance = sum((buffer[i] - mean) ** 2 for i in range(samples)) / samples
+    return mean, variance ** 0.5
+
+
+def tare(driver, factor, samples=TARE_SAMPLES):
+    # Offset that makes the current (unloaded) reading zero Newtons
+    mean, deviation = average_counts(driver, samples)
+    return -mean * factor
+
+
+def fit_gain(points):
+    # Least-squares line through (mean count, force [N]) points; returns
+    # (factor, offset, rms residual [N]). The unloaded tare reading is
+    # normally one of the points
+    n = len(points)
+    if n < 2:
+        raise ValueError('At least two calibration points are needed')
+
+    mean_count = sum(point[0] for point in points) / n
+    mean_force = sum(point[1] for point in points) / n
+    covariance = sum((count - mean_count) * (force - mean_force)
+                     for count, force in points)
+    variance = sum((count - mean_count) ** 2 for count, force in points)
+    if variance == 0:
+        raise ValueError('Calibration points all have the same reading')
+
+    factor = covariance / variance
+    offset = mean_force - factor * mean_count
+    residual = (sum((count * factor + offset - force) ** 2
+                    for count, force in points) / n) ** 0.5
+    return factor, offset, residual
+
+
+def save(factor, offset, path=CALIBRATION_FILE, **details):
+    # details (points, residual, ...) are kept for reproducing the fit
+    constants = {'calibration_factor': factor, 'calibration_offset': offset}
+    constants.update(details)
+    with open(path, 'w') as file:
+        json.dump(constants, file)
+
+
+def load(path=CALIBRATION_FILE):
+    # (factor, offset) from flash, or the defaults if nothing usable is saved
+    try:
+        with open(path) as file:
+            constants = json.load(file)
+        return (float(constants['calibration_factor']),
+                float(constants['calibration_offset']))
+    except (OSError, ValueError, KeyError):
+        return DEFAULT_FACTOR, DEFAULT_OFFSET
@@ -1,6 +1,13 @@
 ''' Script is called espnow_receiver.py '''
+import sys
 import network
 import espnow
+import telemetry					# Packed ESP-NOW telemetry frames
+
+# True: forward every frame unchanged over USB serial for the host
+# (Thrust_Telemetry_Receiver.py), with nothing else printed.
+# False: print the decoded values to the REPL
+forward_to_host = False
 
 # A WLAN interface must be active to send()/recv()
 sta = network.WLAN(network.WLAN.IF_STA)
@@ -9,9 +16,38 @@ sta.active(True)
 e = espnow.ESPNow()
 e.active(True)
 
+decoder = telemetry.TelemetryDecoder()
+
 while True:
     host, msg = e.recv()
-    if msg:             # msg == None if timeout in recv()
+    if not msg:         # msg == None if timeout in recv()
+        continue
+    
+    if msg == b'end':
+        break
+    
+    if forward_to_host:
+        sys.stdout.buffer.write(telemetry.serial_packet(msg))
+        continue
+    
+    try:
+        frame_type, sequence, timestamp_us, payload = decoder.decode(msg)
+    except ValueError:
+        # Plain text from older transmitters
         print(msg)
-        if msg == b'end':
-            break
\ No newline at end of file
+        continue
+    
+    if frame_type == telemetry.FRAME_SAMPLES:
+        # Printing the newest sample of each frame; calibrated once the
+        # transmitter's config frame has arrived
+        sample = payload[-1]
+        values = decoder.calibrate(sample)
+        if values is None:
+            print("counts: {} {} {}".format(*sample[1:]))
+        else:
+            print("{:7.2f} N, {:7.2f} V, {:7.2f} A, {:7.2f} W".format(*values))
+    elif frame_type == telemetry.FRAME_EVENT:
+        print(payload)
+        if payload == "Finished Data Collection":
+            print("Frames received: {}, lost: {}".format(decoder.frames,
+                                                         decoder.lost_frames))
@@ -1,6 +1,54 @@
-from utime import sleep_us, time
-from machine import Pin
+from utime import sleep_us, time, ticks_us, ticks_diff
+from machine import Pin, disable_irq, enable_irq
+from array import array
 from micropython import const
+import micropython
+import uos
+
+# ESP32 GPIO registers (pins 0-31) for the viper fast path
+_GPIO_OUT_W1TS_REG = const(0x3FF44008)
+_GPIO_OUT_W1TC_REG = const(0x3FF4400C)
+_GPIO_IN_REG = const(0x3FF4403C)
+
+# Register addresses above are only valid on the original ESP32
+# (the Feather V2 reports "... with ESP32"; S2/S3/C3 differ)
+_HAS_ESP32_GPIO = uos.uname().machine.endswith('ESP32')
+
+# GPIO_IN reads that hold PD_SCK high. The HX711 needs >= 0.2 us high time
+# (T3) and < 60 us (power down). Eight APB register reads are >= 8 x 12.5 ns
+# even at the bus limit; assuming ~25-50 ns each (not yet confirmed on a
+# scope) they give 0.2-0.4 us. Until the high time is measured and
+# HX711_Benchmark.py shows both paths agree, the register path is opt-in
+# (HX711(..., fast=True)); a bit-timing error would double or halve every
+# reading
+_SCK_HIGH_READS = const(8)
+
+if _HAS_ESP32_GPIO:
+    @micropython.viper
+    def _shift_in_gpio(sck_mask: int, dout_mask: int, pulses: int) -> int:
+        """
+        Clocks out 24 data bits plus the channel-select pulses by writing
+        the GPIO set/clear registers directly. Like the Pin.value() path,
+        DOUT is sampled after the PD_SCK falling edge: the bit is valid
+        0.1 us (T2) after the rising edge and held until the next one.
+        """
+        set_reg = ptr32(_GPIO_OUT_W1TS_REG)
+        clear_reg = ptr32(_GPIO_OUT_W1TC_REG)
+        in_reg = ptr32(_GPIO_IN_REG)
+        value = 0
+        for i in range(24):
+            set_reg[0] = sck_mask
+            for j in range(_SCK_HIGH_READS):
+                bit = in_reg[0]
+            clear_reg[0] = sck_mask
+            bit = in_reg[0] & dout_mask
+            value = (value << 1) | (1 if bit else 0)
+        for i in range(pulses):
+            set_reg[0] = sck_mask
+            for j in range(_SCK_HIGH_READS):
+                bit = in_reg[0]
+            clear_reg[0] = sck_mask
+        return value
 
 class HX711Exception(Exception):
     pass
@@ -26,9 +74,17 @@ class HX711(object):
     READY_TIMEOUT_SEC = const(5)
     SLEEP_DELAY_USEC = const(80)
 
-    def __init__(self, d_out: int, pd_sck: int, channel: int = CHANNEL_A_128):
+    def __init__(self, d_out: int, pd_sck: int, channel: int = CHANNEL_A_128,
+                 fast: bool = False):
         self.d_out_pin = Pin(d_out, Pin.IN)
         self.pd_sck_pin = Pin(pd_sck, Pin.OUT, value=0)
+
+        # Direct register access needs both pins in the GPIO 0-31 bank
+        self.fast_available = _HAS_ESP32_GPIO and d_out < 32 and pd_sck < 32
+        self.fast = fast and self.fast_available
+        self._d_out_mask = 1 << d_out
+        self._pd_sck_mask = 1 << pd_sck
+
         self.channel = channel
 
     def __repr__(self):
@@ -124,6 +180,33 @@ class HX711(object):
         self.pd_sck_pin.value(0)
         self.channel = self._channel
 
+    @micropython.native
+    def _shift_in_pins(self) -> int:
+        """
+        Portable bit-bang read through Pin.value(), used when the
+        register fast path is not available.
+        """
+        sck = self.pd_sck_pin.value
+        dout = self.d_out_pin.value
+        raw_data = 0
+        for i in range(24):
+            sck(1)
+            sck(0)
+            raw_data = raw_data << 1 | dout()
+        for i in range(self._channel):
+            sck(1)
+            sck(0)
+        return raw_data
+
+    def _shift_in(self) -> int:
+        """
+        Clocks out one conversion and selects the channel for the next one.
+        """
+        if self.fast:
+            return _shift_in_gpio(self._pd_sck_mask, self._d_out_mask,
+                                  self._channel)
+        return self._shift_in_pins()
+
     def read(self, raw=False):
         """
         Read current value for current channel with current gain.
@@ -133,14 +216,182 @@ class HX711(object):
         if not self.is_ready():
             self._wait()
 
-        raw_data = 0
-        for i in range(self.DATA_BITS):
-            self.pd_sck_pin.value(1)
-            self.pd_sck_pin.value(0)
-            raw_data = raw_data << 1 | self.d_out_pin.value()
-        self._set_channel()
+        raw_data = self._shift_in()
+
+        if raw:
+            return raw_data
+        else:
+            return self._convert_from_twos_complement(raw_data)
+
+    def read_nowait(self, raw=False):
+        """
+        Read the current conversion without waiting. Returns None if no
+        new conversion is ready yet, so it never blocks a timer callback.
+        """
+        if not self.is_ready():
+            return None
+
+        raw_data = self._shift_in()
 
         if raw:
             return raw_data
         else:
             return self._convert_from_twos_complement(raw_data)
+
+    def read_many(self, n: int, buf, raw=False) -> int:
+        """
+        Read n consecutive conversions into the preallocated buffer buf
+        (e.g. array('i')), waiting for each conversion to become ready.
+        Nothing is allocated per sample. Returns n.
+        """
+        for i in range(n):
+            if not self.is_ready():
+                self._wait()
+            raw_data = self._shift_in()
+            if not raw:
+                raw_data = self._convert_from_twos_complement(raw_data)
+            buf[i] = raw_data
+        return n
+
+
+class HX711EdgeReader(object):
+    """
+    Interrupt-driven acquisition. The DOUT falling edge (conversion ready)
+    runs an IRQ that clocks the conversion out exactly once, stamps it
+    with ticks_us() and stores the raw count in a ring buffer, so nothing
+    waits on the HX711 and no timer beats against its conversion clock.
+
+    The IRQ only writes head and the consumer (main loop or a timer, via
+    read_nowait() / read_into()) only writes tail, so no locking is needed.
+    Counters: dropped (ring full), missed (gaps of 1.75 conversion periods
+    or more; late edges from interrupt latency are not counted), duplicates
+    (the same count again within half a period, i.e. a conversion read
+    twice; discarded) and spurious (edges while DOUT was already high
+    again, e.g. from the data bits during a read).
+    """
+    def __init__(self, hx711, rate_sps=10, buffer_size=64, hard=None):
+        self.hx711 = hx711
+        self.period_us = 1000000 // rate_sps
+
+        # A hard IRQ must not allocate, which only the viper read avoids
+        self.hard = hx711.fast if hard is None else hard
+
+        self.size = buffer_size
+        self.counts = array('i', bytearray(4 * buffer_size))
+        self.timestamps_us = array('I', bytearray(4 * buffer_size))
+        self.head = 0
+        self.tail = 0
+        self.timestamp_us = 0       # Stamp of the record read_nowait() took
+
+        self.conversions = 0
+        self.last_us = 0
+        self.last_count = 0
+        self.dropped = 0
+        self.missed = 0
+        self.duplicates = 0
+        self.spurious = 0
+        self.stalls = 0             # Lost edges recovered by service()
+
+        # Bound once; doing it when arming the IRQ each time would allocate
+        self._handler = self._on_ready
+
+    def start(self):
+        self.hx711.d_out_pin.irq(handler=self._handler,
+                                 trigger=Pin.IRQ_FALLING, hard=self.hard)
+        # A conversion already waiting never produces an edge
+        self.service()
+
+    def stop(self):
+        self.hx711.d_out_pin.irq(handler=None)
+
+    def _on_ready(self, pin):
+        now = ticks_us()
+        if not self.hx711.is_ready():
+            self.spurious += 1
+            return
+
+        raw_data = self.hx711._shift_in()
+
+        if self.conversions:
+            interval = ticks_diff(now, self.last_us)
+            if interval < self.period_us // 2 and raw_data == self.last_count:
+                self.duplicates += 1
+                return
+            periods = (interval + self.period_us // 4) // self.period_us
+            if periods > 1:
+                self.missed += periods - 1
+        self.last_us = now
+        self.last_count = raw_data
+        self.conversions += 1
+
+        head = self.head
+        following = head + 1 if head + 1 < self.size else 0
+        if following == self.tail:
+            self.dropped += 1
+            return
+        self.counts[head] = raw_data
+        self.timestamps_us[head] = now
+        self.head = following
+
+    def service(self):
+        """
+        Call from the main loop. If an edge was lost DOUT stays low and no
+        further edge comes; reading the waiting conversion restarts them.
+        """
+        if not self.hx711.is_ready():
+            return
+        if self.conversions and \
+                ticks_diff(ticks_us(), self.last_us) < 2 * self.period_us:
+            return
+        if self.conversions:
+            self.stalls += 1
+        state = disable_irq()
+        try:
+            self._on_ready(self.hx711.d_out_pin)
+        finally:
+            enable_irq(state)
+
+    def available(self) -> int:
+        return (self.head - self.tail) % self.size
+
+    def read_nowait(self, raw=False):
+        """
+        Oldest buffered conversion, or None if there is none; its stamp is
+        left in timestamp_us. Does not allocate, so it can be a scheduler
+        channel.
+        """
+        tail = self.tail
+        if tail == self.head:
+            return None
+        raw_data = self.counts[tail]
+        self.timestamp_us = self.timestamps_us[tail]
+        self.tail = tail + 1 if tail + 1 < self.size else 0
+
+        if raw:
+            return raw_data
+        return self.hx711._convert_from_twos_complement(raw_data)
+
+    def read_into(self, counts, timestamps_us, start, stop, raw=True) -> int:
+        """
+        Moves buffered conversions into counts[start:stop] and their
+        stamps into timestamps_us[start:stop]. Returns how many.
+        """
+        n = 0
+        while start + n < stop:
+            value = self.read_nowait(raw)
+            if value is None:
+                break
+            counts[start + n] = value
+            timestamps_us[start + n] = self.timestamp_us
+            n += 1
+        return n
+
+    def summary(self):
+        return {
+            'conversions': self.conversions,
+            'dropped': self.dropped,
+            'missed': self.missed,
+            'duplicates': self.duplicates,
+            'spurious': self.spurious,
+            'stalls': self.stalls,
+        }
@@ -3,7 +3,44 @@
 from machine import I2C
 
 class INA228:
-    def __init__(self, i2c, address=0x45, shunt_resistance=0.0002):
+    # INA228 Registers (width in bits)
+    INA228_CONFIG = 0x00            # 16
+    INA228_ADC_CONFIG = 0x01        # 16
+    INA228_SHUNT_CAL = 0x02         # 16
+    INA228_SHUNT_TEMPCO = 0x03      # 16
+    INA228_SHUNT_VOLTAGE = 0x04     # 24 (20-bit signed value in bits 23:4)
+    INA228_BUS_VOLTAGE = 0x05       # 24 (20-bit value in bits 23:4)
+    INA228_DIE_TEMP = 0x06          # 16
+    INA228_CURRENT = 0x07           # 24 (20-bit signed value in bits 23:4)
+    INA228_POWER = 0x08             # 24
+    INA228_ENERGY = 0x09            # 40
+    INA228_CHARGE = 0x0A            # 40 (signed)
+    INA228_DIAG_ALRT = 0x0B         # 16
+    INA228_MANUFACTURER_ID = 0x3E   # 16
+    INA228_DEVICE_ID = 0x3F         # 16
+
+    # CONFIG bits
+    CONFIG_RESET = 0x8000
+    CONFIG_RESET_ACCUMULATORS = 0x4000
+    CONFIG_ADC_RANGE_40MV = 0x0010
+
+    # ADC_CONFIG operating modes (bits 15:12)
+    MODE_SHUTDOWN = 0x0
+    MODE_CONTINUOUS_BUS = 0x9
+    MODE_CONTINUOUS_SHUNT = 0xA
+    MODE_CONTINUOUS_BUS_SHUNT = 0xB
+    MODE_CONTINUOUS_ALL = 0xF
+
+    # Conversion times [us] and averaging counts, indexed by register code
+    CONVERSION_TIMES_US = (50, 84, 150, 280, 540, 1052, 2074, 4120)
+    AVERAGING_COUNTS = (1, 4, 16, 64, 128, 256, 512, 1024)
+
+    # Fixed LSBs
+    BUS_VOLTAGE_LSB = 195.3125e-6   # Volts
+    DIE_TEMP_LSB = 7.8125e-3        # Degrees Celsius
+
+    def __init__(self, i2c, address=0x45, shunt_resistance=0.0002,
+                 max_current=None):
         # shunt_resistance is a parameter
         self.i2c = i2c
         # i2c address - default value assumed to be 69
@@ -11,55 +48,129 @@ class INA228:
         self.address = address
         # Shunt resistance - default value assumed to be 200 micro-Ohms
         self.shunt_resistance = shunt_resistance
+        # Largest current to resolve; defaults to the +/-163.84 mV
+        # full-scale shunt voltage
+        self.max_current = max_current
 
-        # INA228 Registers
-        self.INA228_CONFIG = 0x00
-        self.INA228_SHUNT_VOLTAGE = 0x01
-        self.INA228_BUS_VOLTAGE = 0x02
-        self.INA228_POWER = 0x03
-        self.INA228_CURRENT = 0x04
-        self.INA228_CALIBRATION = 0x05
-        self.INA228_MASK_ENABLE = 0x06
-        self.INA228_ALERT_LIMIT = 0x07
-
+        self.adc_range_40mV = False
+        self.bus_voltage_LSB = self.BUS_VOLTAGE_LSB
+        self.shunt_voltage_LSB = 312.5e-9
         self.current_LSB = None  # Will be calculated during initialization
         self.power_LSB = None    # Will be calculated during initialization
+        self.energy_LSB = None   # Will be calculated during initialization
+
+        # Preallocated transfer buffers so register access never allocates
+        self._buf2 = bytearray(2)
+        self._buf3 = bytearray(3)
+        self._buf5 = bytearray(5)
 
     def _write_register(self, register, value):
-        # Portable way to write 16-bit values to I2C registers
-        byte1 = (value >> 8) & 0xFF  # Extract high byte
-        byte2 = value & 0xFF       # Extract low byte
-        self.i2c.writeto_mem(self.address, register, bytes([byte1]), addrsize=8)
-        self.i2c.writeto_mem(self.address, register + 1, bytes([byte2]), addrsize=8) 
+        # 16-bit big-endian write in a single I2C transaction
+        buf = self._buf2
+        buf[0] = (value >> 8) & 0xFF  # High byte
+        buf[1] = value & 0xFF         # Low byte
+        self.i2c.writeto_mem(self.address, register, buf, addrsize=8)
 
     def _read_register(self, register):
-        return int.from_bytes(self.i2c.readfrom_mem(self.address, register, 2,
-                                                    addrsize=8), 'big')
+        # 16-bit register
+        buf = self._buf2
+        self.i2c.readfrom_mem_into(self.address, register, buf, addrsize=8)
+        return (buf[0] << 8) | buf[1]
+
+    def _read_register24(self, register):
+        buf = self._buf3
+        self.i2c.readfrom_mem_into(self.address, register, buf, addrsize=8)
+        return (buf[0] << 16) | (buf[1] << 8) | buf[2]
+
+    def _read_register40(self, register):
+        buf = self._buf5
+        self.i2c.readfrom_mem_into(self.address, register, buf, addrsize=8)
+        return int.from_bytes(buf, 'big')
+
+    @staticmethod
+    def _signed(value, bits):
+        if value & (1 << (bits - 1)):
+            value -= 1 << bits
+        return value
+
+    def configure_adc(self, mode=MODE_CONTINUOUS_ALL, bus_conversion_us=1052,
+                      shunt_conversion_us=1052, temp_conversion_us=1052,
+                      averages=1):
+        # Conversion times and averaging count must be values from
+        # CONVERSION_TIMES_US and AVERAGING_COUNTS
+        config = ((mode << 12)
+                  | (self.CONVERSION_TIMES_US.index(bus_conversion_us) << 9)
+                  | (self.CONVERSION_TIMES_US.index(shunt_conversion_us) << 6)
+                  | (self.CONVERSION_TIMES_US.index(temp_conversion_us) << 3)
+                  | self.AVERAGING_COUNTS.index(averages))
+        self._write_register(self.INA228_ADC_CONFIG, config)
+
+    def reset_accumulators(self):
+        # Clears the ENERGY and CHARGE registers
+        config = self._read_register(self.INA228_CONFIG)
+        self._write_register(self.INA228_CONFIG,
+                             config | self.CONFIG_RESET_ACCUMULATORS)
 
     def read_shunt_voltage(self):
-        raw = self._read_register(self.INA228_SHUNT_VOLTAGE)
-        return raw * 2.5e-6  # Shunt voltage in Volts
+        raw = self._signed(self._read_register24(self.INA228_SHUNT_VOLTAGE) >> 4, 20)
+        return raw * self.shunt_voltage_LSB  # Shunt voltage in Volts
+
+    def read_bus_voltage_raw(self):
+        # Bus voltage count, multiply by bus_voltage_LSB for Volts
+        return self._read_register24(self.INA228_BUS_VOLTAGE) >> 4
 
     def read_bus_voltage(self):
-        raw = self._read_register(self.INA228_BUS_VOLTAGE)
-        return (raw >> 3) * 1.25e-3  # Bus voltage in Volts
+        return self.read_bus_voltage_raw() * self.bus_voltage_LSB  # Bus voltage in Volts
+
+    def read_current_raw(self):
+        # Signed current count, multiply by current_LSB for Amps
+        return self._signed(self._read_register24(self.INA228_CURRENT) >> 4, 20)
 
     def read_current(self):
-        raw = self._read_register(self.INA228_CURRENT)
+        raw = self.read_current_raw()
         return raw * self.current_LSB if self.current_LSB else 0.0  # Current in Amps
 
     def read_power(self):
-        raw = self._read_register(self.INA228_POWER)
+        raw = self._read_register24(self.INA228_POWER)
         return raw * self.power_LSB if self.power_LSB else 0.0  # Power in Watts
 
-    def initialize(self, config=0x6000):
+    def read_energy(self):
+        raw = self._read_register40(self.INA228_ENERGY)
+        return raw * self.energy_LSB if self.energy_LSB else 0.0  # Energy in Joules
+
+    def read_charge(self):
+        raw = self._signed(self._read_register40(self.INA228_CHARGE), 40)
+        return raw * self.current_LSB if self.current_LSB else 0.0  # Charge in Coulombs
+
+    def read_die_temperature(self):
+        raw = self._signed(self._read_register(self.INA228_DIE_TEMP), 16)
+        return raw * self.DIE_TEMP_LSB  # Degrees Celsius
+
+    def read_all(self):
+        # Voltage [V], current [A], power [W], energy [J] and charge [C]
+        # from the on-chip measurements and accumulators. One transaction
+        # per register (pointer write + repeated-start read): the INA228
+        # does not auto-increment its register pointer, so a single burst
+        # over VBUS..CHARGE (0x05-0x0A) would return VBUS followed by filler
+        return (self.read_bus_voltage(), self.read_current(), self.read_power(),
+                self.read_energy(), self.read_charge())
+
+    def initialize(self, config=CONFIG_RESET_ACCUMULATORS):
         self._write_register(self.INA228_CONFIG, config)
+        self.adc_range_40mV = bool(config & self.CONFIG_ADC_RANGE_40MV)
+
+        # Full-scale shunt voltage is 163.84 mV (40.96 mV with ADCRANGE set)
+        full_scale_voltage = 40.96e-3 if self.adc_range_40mV else 163.84e-3
+        self.shunt_voltage_LSB = 78.125e-9 if self.adc_range_40mV else 312.5e-9
+        max_current = self.max_current or full_scale_voltage / self.shunt_resistance
 
-        # Calculate Current and Power LSBs using the stored shunt_resistance
-        cal = self._read_register(self.INA228_CALIBRATION)
-        self.current_LSB = (0.00512 / (self.shunt_resistance * 32768))
-        self.power_LSB = self.current_LSB * 25
+        # Calculate Current, Power and Energy LSBs using the stored shunt_resistance
+        self.current_LSB = max_current / 524288     # 2^19
+        self.power_LSB = self.current_LSB * 3.2
+        self.energy_LSB = self.power_LSB * 16
 
-        # Program the calibration register
-        calibration_value = int(0.00512 / (self.shunt_resistance * 0.00002048))
-        self._write_register(self.INA228_CALIBRATION, calibration_value)
+        # Program the shunt calibration register
+        calibration_value = int(13107.2e6 * self.current_LSB * self.shunt_resistance)
+        if self.adc_range_40mV:
+            calibration_value = calibration_value * 4
+        self._write_register(self.INA228_SHUNT_CAL, calibration_value)
@@ -0,0 +1,211 @@
+# instrumentation.py (Library File)
+# Run-time measurements for the acquisition scripts: callback execution
+# time and start jitter as ticks_us histograms, missed HX711 conversions,
+# free heap and garbage collections, and ESP-NOW send failures. Recording
+# does not allocate (until the microsecond totals outgrow small ints, after
+# ~18 minutes), so the probes are safe inside timer callbacks.
+
+import gc
+import json
+import time
+from array import array
+
+# Bucket i counts values in [2**(i-1), 2**i) us (bucket 0 is 0 us); the
+# last bucket also takes everything longer
+HISTOGRAM_BUCKETS = 20
+
+
+class TimingHistogram:
+    """
+    Power-of-two histogram of microsecond durations with count, total and
+    maximum.
+    """
+    def __init__(self):
+        self.buckets = array('I', bytearray(4 * HISTOGRAM_BUCKETS))
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def add(self, duration_us):
+        bucket = 0
+        value = duration_us
+        while value and bucket < HISTOGRAM_BUCKETS - 1:
+            value >>= 1
+            bucket += 1
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.total_us += duration_us
+        if duration_us > self.max_us:
+            self.max_us = duration_us
+
+    def percentile(self, fraction):
+        # Upper bound [us] of the bucket holding the given fraction
+        target = fraction * self.count
+        seen = 0
+        for bucket in range(HISTOGRAM_BUCKETS):
+            seen += self.buckets[bucket]
+            if seen >= target and seen:
+                return 1 << bucket if bucket else 0
+        return 0
+
+    def summary(self):
+        # Trailing empty buckets are dropped to keep the summary compact
+        last = HISTOGRAM_BUCKETS
+        while last and not self.buckets[last - 1]:
+            last -= 1
+        return {
+            'count': self.count,
+            'mean_us': self.total_us // self.count if self.count else 0,
+            'p99_us': self.percentile(0.99),
+            'max_us': self.max_us,
+            'histogram_log2_us': list(self.buckets[:last]),
+        }
+
+
+class CallbackProbe:
+    """
+    Execution time and start jitter (actual minus nominal interval between
+    calls) of one periodic callback. Call record() at the end of the
+    callback with the ticks_us() taken at its start.
+    """
+    def __init__(self, name, period_us):
+        self.name = name
+        self.period_us = period_us
+        self.duration = TimingHistogram()
+        self.jitter = TimingHistogram()
+        self.previous_start = -1
+        self.late = 0           # Calls started a full period or more late
+
+    def record(self, start_us, end_us=None):
+        if end_us is None:
+            end_us = time.ticks_us()
+        self.duration.add(time.ticks_diff(end_us, start_us))
+
+        if self.previous_start >= 0:
+            jitter = time.ticks_diff(start_us, self.previous_start) \
+                - self.period_us
+            if jitter >= self.period_us:
+                self.late += 1
+            self.jitter.add(jitter if jitter >= 0 else -jitter)
+        self.previous_start = start_us
+
+    def summary(self):
+        return {
+            'period_us': self.period_us,
+            'execution': self.duration.summary(),
+            'jitter': self.jitter.summary(),
+            'late': self.late,
+        }
+
+
+class RunMonitor:
+    """
+    Collects the probes and counters of one recording and writes them as a
+    compact JSON summary next to the data file.
+    """
+    def __init__(self, conversion_period_us=0):
+        self.probes = []
+
+        # HX711 conversions; a gap of n periods means n - 1 were missed
+        self.conversion_period_us = conversion_period_us
+        self.conversions = 0
+        self.missed_conversions = 0
+        self.last_conversion_us = 0
+        self.conversion_span_us = 0
+
+        # Heap; free memory going up between samples means a collection ran
+        self.min_free = gc.mem_free()
+        self.last_free = self.min_free
+        self.collections = 0
+        self.gc_pause = TimingHistogram()
+
+        # Radio
+        self.sends = 0
+        self.send_failures = 0
+
+    def add_probe(self, name, period_us):
+        probe = CallbackProbe(name, period_us)
+        self.probes.append(probe)
+        return probe
+
+    def conversion(self, timestamp_us):
+        # Called from the callback for every HX711 value stored
+        if self.conversions:
+            interval = time.ticks_diff(timestamp_us, self.last_conversion_us)
+            self.conversion_span_us += interval
+            if self.conversion_period_us:
+                periods = (interval + self.conversion_period_us // 2) \
+                    // self.conversion_period_us
+                if periods > 1:
+                    self.missed_conversions += periods - 1
+        self.last_conversion_us = timestamp_us
+        self.conversions += 1
+
+    def send_result(self, sent):
+        self.sends += 1
+        if not sent:
+            self.send_failures += 1
+
+    def sample_memory(self):
+        # Main loop
+        free = gc.mem_free()
+        if free > self.last_free:
+            self.collections += 1
+        if free < self.min_free:
+            self.min_free = free
+        self.last_free = free
+
+    def collect(self):
+        # Main loop: a timed collection, so the automatic one is less likely
+        # to run inside a callback
+        start = time.ticks_us()
+        gc.collect()
+        self.gc_pause.add(time.ticks_diff(time.ticks_us(), start))
+        self.collections += 1
+        self.last_free = gc.mem_free()
+
+    def effective_rate(self):
+        # Conversions per second actually stored
+        if self.conversions < 2 or self.conversion_span_us <= 0:
+            return 0.0
+        return (self.conversions - 1) * 1000000 / self.conversion_span_us
+
+    def summary(self, extra=None):
+        result = {
+            'callbacks': {probe.name: probe.summary() for probe in self.probes},
+            'conversions': self.conversions,
+            'missed_conversions': self.missed_conversions,
+            'effective_rate_sps': round(self.effective_rate(), 3),
+            'memory': {
+                'min_free': self.min_free,
+                'free': gc.mem_free(),
+                'collections': self.collections,
+                'gc_pause': self.gc_pause.summary(),
+            },
+            'espnow': {'sends': self.sends,
+                       'send_failures': self.send_failures},
+        }
+        if extra:
+            result.update(extra)
+        return result
+
+    def summary_lines(self):
+        # Short text lines (each well under one ESP-NOW frame) for the radio
+        lines = ["rate {:.2f} SPS, {} conversions, {} missed".format(
+            self.effective_rate(), self.conversions, self.missed_conversions)]
+        for probe in self.probes:
+            lines.append("{}: mean {} us, max {} us, jitter p99 {} us, "
+                         "{} late".format(probe.name,
+                                          probe.duration.summary()['mean_us'],
+                                          probe.duration.max_us,
+                                          probe.jitter.percentile(0.99),
+                                          probe.late))
+        lines.append("heap min free {}, {} collections (max {} us); "
+                     "ESP-NOW {} failed of {}".format(
+                         self.min_free, self.collections, self.gc_pause.max_us,
+                         self.send_failures, self.sends))
+        return lines
+
+    def save(self, path, extra=None):
+        with open(path, 'w') as file:
+            json.dump(self.summary(extra), file)
@@ -0,0 +1,175 @@
+# running_stats.py (Library File)
+# Constant-memory summaries of a recording: mean, variance and peak of
+# thrust and power (Welford updates, stable in the ESP32's single-precision
+# floats), exponential moving averages for live values, accumulated energy
+# and thrust per Watt. Nothing grows with the length of the run, so field
+# tests can record indefinitely and still report efficiency at any time.
+#
+# Timer callbacks only call EfficiencyStats.append(), which copies the raw
+# counts into a fixed ring (no allocation, no float math); the main loop
+# calls update() to convert and fold them into the statistics.
+
+import time
+from array import array
+
+GRAVITY = 9.80665               # m/s^2, for grams-force per Watt
+
+
+class RunningStats:
+    """
+    Count, mean, variance, minimum and maximum of a stream of values by
+    Welford's method, plus an exponential moving average.
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0           # Sum of squared differences from the mean
+        self.min = 0.0
+        self.max = 0.0
+        self.ema = 0.0
+
+    def add(self, value, ema_weight=1.0):
+        # ema_weight is the share of the new value in the moving average
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.count == 1:
+            self.min = self.max = self.ema = value
+        else:
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+            self.ema += ema_weight * (value - self.ema)
+
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def std(self):
+        return self.variance() ** 0.5
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std(),
+            'min': self.min,
+            'max': self.max,
+            'ema': self.ema,
+        }
+
+
+class EfficiencyStats:
+    """
+    Running thrust, power, energy and grams-force per Watt of one run.
+    append() is safe in a timer callback; update() runs in the main loop
+    with a function converting raw counts to (force, voltage, current,
+    power).
+    """
+    def __init__(self, convert, time_constant_ms=1000, ring_size=64):
+        self.convert = convert
+        self.time_constant_us = time_constant_ms * 1000
+
+        # Raw records waiting for the main loop; one slot stays empty to
+        # tell a full ring from an empty one
+        self.ring_size = ring_size
+        self.timestamps_us = array('I', bytearray(4 * ring_size))
+        self.force_counts = array('i', bytearray(4 * ring_size))
+        self.voltage_counts = array('i', bytearray(4 * ring_size))
+        self.current_counts = array('i', bytearray(4 * ring_size))
+        self.head = 0           # Written by append()
+        self.tail = 0           # Read by update()
+        self.dropped = 0
+
+        self.thrust = RunningStats()
+        self.power = RunningStats()
+        self.energy_j = 0.0
+        self.energy_error = 0.0     # Kahan compensation of energy_j
+        self.duration_us = 0
+        self.last_timestamp_us = 0
+
+    def append(self, timestamp_us, force_count, voltage_count=0,
+               current_count=0):
+        # Callback: queue one record's raw counts
+        head = self.head
+        following = head + 1 if head + 1 < self.ring_size else 0
+        if following == self.tail:
+            self.dropped += 1
+            return
+        self.timestamps_us[head] = timestamp_us
+        self.force_counts[head] = force_count
+        self.voltage_counts[head] = voltage_count
+        self.current_counts[head] = current_count
+        self.head = following
+
+    def update(self):
+        # Main loop: fold every queued record into the statistics
+        tail = self.tail
+        while tail != self.head:
+            timestamp_us = self.timestamps_us[tail]
+            force, voltage, current, power = self.convert(
+                self.force_counts[tail], self.voltage_counts[tail],
+                self.current_counts[tail])
+            tail = tail + 1 if tail + 1 < self.ring_size else 0
+            self.tail = tail
+
+            # Voltage and current are averaged since the previous record,
+            # so power x interval is the energy of that interval
+            ema_weight = 1.0
+            if self.thrust.count:
+                interval_us = time.ticks_diff(timestamp_us,
+                                              self.last_timestamp_us)
+                self.duration_us += interval_us
+                self._add_energy(power * interval_us / 1000000)
+                ema_weight = interval_us / (self.time_constant_us + interval_us)
+            self.last_timestamp_us = timestamp_us
+
+            self.thrust.add(force, ema_weight)
+            self.power.add(power, ema_weight)
+
+    def _add_energy(self, joules):
+        # Compensated sum: small increments still count once the total is
+        # large, which single-precision floats would otherwise round away
+        value = joules - self.energy_error
+        total = self.energy_j + value
+        self.energy_error = (total - self.energy_j) - value
+        self.energy_j = total
+
+    def grams_per_watt(self, thrust, power):
+        return thrust / GRAVITY * 1000 / power if power > 0 else 0.0
+
+    def summary(self):
+        return {
+            'samples': self.thrust.count,
+            'duration_s': self.duration_us / 1000000,
+            'thrust_N': self.thrust.summary(),
+            'power_W': self.power.summary(),
+            'energy_J': self.energy_j,
+            'energy_Wh': self.energy_j / 3600,
+            # Ratio of the means: the efficiency over the whole run
+            'g_per_W': self.grams_per_watt(self.thrust.mean, self.power.mean),
+            'g_per_W_ema': self.grams_per_watt(self.thrust.ema,
+                                               self.power.ema),
+            'dropped': self.dropped,
+        }
+
+    def status_line(self):
+        # Live values, short enough for one ESP-NOW event frame
+        return "thrust {:.2f} N (peak {:.2f}), power {:.1f} W (peak {:.1f}), " \
+               "{:.2f} g/W, {:.3f} Wh".format(
+                   self.thrust.ema, self.thrust.max, self.power.ema,
+                   self.power.max,
+                   self.grams_per_watt(self.thrust.ema, self.power.ema),
+                   self.energy_j / 3600)
+
+    def summary_lines(self):
+        # Whole-run values for the radio and the console
+        return ["thrust mean {:.2f} N, std {:.2f}, peak {:.2f}".format(
+                    self.thrust.mean, self.thrust.std(), self.thrust.max),
+                "power mean {:.1f} W, std {:.1f}, peak {:.1f}".format(
+                    self.power.mean, self.power.std(), self.power.max),
+                "energy {:.1f} J ({:.3f} Wh) over {:.1f} s, {:.2f} g/W".format(
+                    self.energy_j, self.energy_j / 3600,
+                    self.duration_us / 1000000,
+                    self.grams_per_watt(self.thrust.mean, self.power.mean))]
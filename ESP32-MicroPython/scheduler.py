@@ -0,0 +1,109 @@
+# scheduler.py (Library File)
+# One timer drives every sensor so samples from different sensors share a
+# single clock and are combined into aligned records.
+
+import time
+from array import array
+
+
+class AcquisitionScheduler:
+    """
+    Polls each sensor channel at its own period from one base timer tick.
+
+    A channel is a read() function returning an int count, or None when
+    no new value is ready (e.g. HX711.read_nowait). When the trigger
+    channel produces a value, on_record(timestamp_us, values) is called
+    with the trigger value and, for every other channel, either its
+    latest value or (averaged=True) the mean of all values read since the
+    previous record. values is a reused array('i'); copy what you keep.
+    If probe is set (instrumentation.CallbackProbe) every tick is timed.
+    """
+    def __init__(self, timer, tick_us=1000):
+        self.timer = timer
+        self.tick_us = tick_us
+
+        self._reads = []
+        self._averaged = []
+        self._period_us = array('i')
+        self._next_due = array('i')
+        self._sums = array('i')
+        self._counts = array('i')
+        self.values = array('i')
+
+        # Per-channel diagnostics
+        self.samples = array('i')
+        self.overruns = array('i')
+
+        self.trigger = 0
+        self.on_record = None
+        self.records = 0
+        self.probe = None
+
+    def add_channel(self, read, period_us, averaged=False):
+        # Returns the channel index (its position in the record values)
+        self._reads.append(read)
+        self._averaged.append(averaged)
+        for values in (self._period_us, self._next_due, self._sums,
+                       self._counts, self.values, self.samples, self.overruns):
+            values.append(0)
+        self._period_us[-1] = period_us
+        return len(self._reads) - 1
+
+    def start(self, on_record, trigger=0):
+        self.on_record = on_record
+        self.trigger = trigger
+
+        now = time.ticks_us()
+        for i in range(len(self._reads)):
+            self._next_due[i] = time.ticks_add(now, self._period_us[i])
+            self._sums[i] = 0
+            self._counts[i] = 0
+
+        self.timer.init(freq=1000000 // self.tick_us, mode=self.timer.PERIODIC,
+                        callback=self._tick)
+
+    def stop(self):
+        self.timer.deinit()
+
+    def _tick(self, timer):
+        now = time.ticks_us()
+        record = False
+
+        for i in range(len(self._reads)):
+            if time.ticks_diff(now, self._next_due[i]) < 0:
+                continue
+
+            # Next due time; if a whole period was lost, resynchronise
+            next_due = time.ticks_add(self._next_due[i], self._period_us[i])
+            if time.ticks_diff(now, next_due) >= 0:
+                self.overruns[i] += 1
+                next_due = time.ticks_add(now, self._period_us[i])
+            self._next_due[i] = next_due
+
+            value = self._reads[i]()
+            if value is None:
+                continue
+
+            self.samples[i] += 1
+            if self._averaged[i]:
+                self._sums[i] += value
+                self._counts[i] += 1
+            else:
+                self.values[i] = value
+
+            if i == self.trigger:
+                record = True
+
+        if record:
+            # Closing the averaging windows at the trigger sample
+            for i in range(len(self._reads)):
+                if self._averaged[i] and self._counts[i]:
+                    self.values[i] = self._sums[i] // self._counts[i]
+                    self._sums[i] = 0
+                    self._counts[i] = 0
+
+            self.records += 1
+            self.on_record(now, self.values)
+
+        if self.probe:
+            self.probe.record(now)
@@ -0,0 +1,243 @@
+# telemetry.py (Library File)
+# Packed ESP-NOW telemetry frames shared by the transmitter
+# (Power_Thrust_Sensing.py), the receiver (espnow_receiver.py) and the host.
+# Only uses struct and binlog so it imports under MicroPython and CPython.
+
+import struct
+import binlog
+
+TELEMETRY_MAGIC = 0xA5
+TELEMETRY_VERSION = 1
+
+# Frame types
+FRAME_SAMPLES = 1       # Payload: binlog records (timestamp + raw counts)
+FRAME_CONFIG = 2        # Payload: binlog header (calibration constants)
+FRAME_EVENT = 3         # Payload: UTF-8 text, e.g. "Starting . . . "
+
+# Frame header (little-endian):
+#   magic, version, frame type, sample count, sequence number,
+#   device timestamp [ticks_us] when the frame was sent
+HEADER_FORMAT = '<BBBBHI'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+MAX_FRAME_SIZE = 250    # ESP-NOW payload limit
+SAMPLES_PER_FRAME = (MAX_FRAME_SIZE - HEADER_SIZE) // binlog.RECORD_SIZE
+
+# Serial packet wrapping a frame forwarded by the receiver ESP32 over USB:
+#   sync bytes, frame length, frame, checksum (sum of frame bytes & 0xFF)
+SERIAL_SYNC = b'\xAA\x55'
+
+
+def _u24(data, offset):
+    return data[offset] | (data[offset + 1] << 8) | (data[offset + 2] << 16)
+
+
+def _s24(data, offset):
+    value = _u24(data, offset)
+    if value & 0x800000:
+        value -= 0x1000000
+    return value
+
+
+def serial_packet(frame):
+    # Receiver side: framing one ESP-NOW frame for the USB serial link
+    checksum = 0
+    for byte in frame:
+        checksum += byte
+    return SERIAL_SYNC + bytes((len(frame),)) + bytes(frame) \
+        + bytes((checksum & 0xFF,))
+
+
+class SerialDeframer:
+    """
+    Host side: recovers frames from the receiver's serial byte stream. Bytes that are not part of a
+    valid packet (boot messages, REPL output, a packet cut off by a reset)
+    are skipped and counted, and parsing resynchronises on the next sync.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+        self.skipped_bytes = 0
+        self.bad_packets = 0
+
+    def feed(self, data):
+        # Returns the list of complete frames found so far
+        buffer = self.buffer
+        buffer.extend(data)
+        frames = []
+
+        while True:
+            start = buffer.find(SERIAL_SYNC)
+            if start < 0:
+                # Keeping a last byte that may be the start of a sync
+                keep = 1 if buffer[-1:] == SERIAL_SYNC[:1] else 0
+                self.skipped_bytes += len(buffer) - keep
+                del buffer[:len(buffer) - keep]
+                break
+            if start:
+                self.skipped_bytes += start
+                del buffer[:start]
+
+            if len(buffer) < 3:
+                break
+            length = buffer[2]
+            end = 3 + length + 1
+            if len(buffer) < end:
+                break
+
+            frame = bytes(buffer[3:3 + length])
+            if length >= HEADER_SIZE and frame[0] == TELEMETRY_MAGIC \
+                    and sum(frame) & 0xFF == buffer[end - 1]:
+                frames.append(frame)
+                del buffer[:end]
+            else:
+                # False sync inside other data; search again after it
+                self.bad_packets += 1
+                self.skipped_bytes += 1
+                del buffer[:1]
+
+        return frames
+
+
+class TelemetryEncoder:
+    """
+    Batches samples into ESP-NOW frames through two fixed frame buffers.
+    append() runs in the acquisition callback and never allocates; the
+    main loop sends a finished frame with take_frame() / release(). Setting
+    flush_requested hands over a partly filled frame at the next append(),
+    which bounds the latency at low sample rates.
+    """
+    def __init__(self):
+        self.buffers = (bytearray(MAX_FRAME_SIZE), bytearray(MAX_FRAME_SIZE))
+        self.active = 0
+        self.count = 0
+        self.pending = -1       # Frame waiting to be sent, -1 if none
+        self.pending_count = 0
+        self.flush_requested = False
+        self.sequence = 0
+        self.dropped = 0        # Samples lost because both frames were full
+
+    def _hand_over(self):
+        self.pending = self.active
+        self.pending_count = self.count
+        self.active ^= 1
+        self.count = 0
+        self.flush_requested = False
+
+    def append(self, timestamp_us, force_count, voltage_count=0,
+               current_count=0):
+        if self.count == SAMPLES_PER_FRAME:
+            if self.pending >= 0:
+                self.dropped += 1
+                return False
+            self._hand_over()
+
+        binlog.pack_record(self.buffers[self.active],
+                           HEADER_SIZE + self.count * binlog.RECORD_SIZE,
+                           timestamp_us, force_count, voltage_count,
+                           current_count)
+        self.count += 1
+
+        if self.pending < 0 and (self.count == SAMPLES_PER_FRAME
+                                 or self.flush_requested):
+            self._hand_over()
+        return True
+
+    def flush(self):
+        # Main loop, once acquisition has stopped: hand over the partial frame
+        if self.pending < 0 and self.count:
+            self._hand_over()
+
+    def _next_sequence(self):
+        sequence = self.sequence
+        self.sequence = (sequence + 1) & 0xFFFF
+        return sequence
+
+    def take_frame(self, timestamp_us):
+        # Main loop: the next full (or flushed) samples frame, or None
+        pending = self.pending
+        if pending < 0:
+            return None
+
+        buffer = self.buffers[pending]
+        struct.pack_into(HEADER_FORMAT, buffer, 0, TELEMETRY_MAGIC,
+                         TELEMETRY_VERSION, FRAME_SAMPLES, self.pending_count,
+                         self._next_sequence(), timestamp_us)
+        return memoryview(buffer)[:HEADER_SIZE
+                                  + self.pending_count * binlog.RECORD_SIZE]
+
+    def release(self):
+        # Main loop: the frame from take_frame() has been sent
+        self.pending = -1
+
+    def _frame(self, frame_type, payload, timestamp_us):
+        header = struct.pack(HEADER_FORMAT, TELEMETRY_MAGIC, TELEMETRY_VERSION,
+                             frame_type, 0, self._next_sequence(), timestamp_us)
+        return header + payload
+
+    def config_frame(self, log_header, timestamp_us):
+        # Calibration constants so the receiver can convert raw counts
+        return self._frame(FRAME_CONFIG, log_header, timestamp_us)
+
+    def event_frame(self, text, timestamp_us):
+        return self._frame(FRAME_EVENT, text.encode(), timestamp_us)
+
+
+class TelemetryDecoder:
+    """
+    Decodes frames from TelemetryEncoder and counts lost frames from gaps
+    in the sequence numbers.
+    """
+    def __init__(self):
+        self.expected_sequence = None
+        self.frames = 0
+        self.lost_frames = 0
+        self.config = None
+
+    def decode(self, frame, raw=False):
+        # Returns (frame type, sequence, device timestamp, payload) where
+        # payload is a list of (timestamp_us, force, voltage, current) raw
+        # count tuples, the config dict or the event text. With raw=True
+        # samples payloads are the packed binlog records instead
+        (magic, version, frame_type, count, sequence, timestamp_us) \
+            = struct.unpack_from(HEADER_FORMAT, frame, 0)
+
+        if magic != TELEMETRY_MAGIC or version != TELEMETRY_VERSION:
+            raise ValueError('Not a telemetry frame')
+
+        if self.expected_sequence is not None:
+            self.lost_frames += (sequence - self.expected_sequence) & 0xFFFF
+        self.expected_sequence = (sequence + 1) & 0xFFFF
+        self.frames += 1
+
+        if frame_type == FRAME_SAMPLES and raw:
+            payload = memoryview(frame)[HEADER_SIZE:HEADER_SIZE
+                                        + count * binlog.RECORD_SIZE]
+        elif frame_type == FRAME_SAMPLES:
+            payload = []
+            for i in range(count):
+                offset = HEADER_SIZE + i * binlog.RECORD_SIZE
+                payload.append((
+                    _u24(frame, offset + binlog.TIMESTAMP_OFFSET)
+                    | (frame[offset + binlog.TIMESTAMP_OFFSET + 3] << 24),
+                    _u24(frame, offset + binlog.HX711_OFFSET),
+                    _u24(frame, offset + binlog.BUS_VOLTAGE_OFFSET),
+                    _s24(frame, offset + binlog.CURRENT_OFFSET)))
+        elif frame_type == FRAME_CONFIG:
+            payload = binlog.unpack_header(bytes(frame[HEADER_SIZE:]))
+            self.config = payload
+        else:
+            payload = bytes(frame[HEADER_SIZE:]).decode()
+
+        return frame_type, sequence, timestamp_us, payload
+
+    def calibrate(self, sample):
+        # (force [N], voltage [V], current [A], power [W]) once a config
+        # frame has been received, otherwise None
+        config = self.config
+        if config is None:
+            return None
+        force = (sample[1] * config['calibration_factor']
+                 + config['calibration_offset'])
+        voltage = sample[2] * config['bus_voltage_lsb']
+        current = sample[3] * config['current_lsb']
+        return force, voltage, current, voltage * current
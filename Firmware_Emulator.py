@@ -0,0 +1,72 @@
+''' Script is called Firmware_Emulator.py '''
+# Runs an ESP32-MicroPython script unmodified on the host against emulated
+# sensors, e.g.
+#   python Firmware_Emulator.py ESP32-MicroPython/Power_Thrust_Sensing.py
+#   python Firmware_Emulator.py ESP32-MicroPython/espnow_receiver.py
+# The script's input() prompts are read from stdin and its files are written
+# to the --flash directory.
+
+import argparse
+import os
+import runpy
+import sys
+
+import emulator
+from emulator import devices, signals
+
+
+''' Functions '''
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(
+        description="Run ESP32-MicroPython firmware against emulated sensors")
+    parser.add_argument('script', help="firmware script to run")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="virtual time per real second (default 1.0)")
+    parser.add_argument('--profile',
+                        help="replay a recorded .csv or .bin log instead of "
+                             "the synthetic throttle steps")
+    parser.add_argument('--hx711-rate', type=int, default=10,
+                        help="HX711 conversions per second (10 or 80)")
+    parser.add_argument('--espnow-loss', type=float, default=0.0,
+                        help="fraction of ESP-NOW sends to drop")
+    parser.add_argument('--port', type=int, default=47110,
+                        help="localhost UDP port used as the ESP-NOW air")
+    parser.add_argument('--ticks-start', type=lambda text: int(text, 0),
+                        default=0,
+                        help="initial ticks_us() value, e.g. 0x3FF00000 to "
+                             "hit the 2**30 wrap ~1 s in")
+    parser.add_argument('--flash', default='emulated_flash',
+                        help="directory used as the device file system")
+    return parser.parse_args(argv)
+
+
+def run(arguments):
+    profile = (signals.recorded(arguments.profile) if arguments.profile
+               else signals.throttle_steps())
+    bench = devices.Bench(profile, hx711_rate_sps=arguments.hx711_rate,
+                          espnow_loss=arguments.espnow_loss,
+                          air_port=arguments.port)
+
+    script = os.path.abspath(arguments.script)
+    emulator.install(bench, speed=arguments.speed,
+                     ticks_start_us=arguments.ticks_start)
+
+    os.makedirs(arguments.flash, exist_ok=True)
+    os.chdir(arguments.flash)
+    try:
+        runpy.run_path(script, run_name='__main__')
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Stopping timers the script left running
+        for timer in bench.timers:
+            timer.deinit()
+        print()
+        print("Emulator:")
+        for line in emulator.report():
+            print("  " + line)
+
+
+''' Main Code '''
+if __name__ == '__main__':
+    run(parse_arguments(sys.argv[1:]))
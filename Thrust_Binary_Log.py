@@ -0,0 +1,150 @@
+''' Script is called Thrust_Binary_Log.py '''
+
+import os
+import sys
+import numpy as np
+
+# binlog.py lives with the firmware so both sides share one format definition
+FIRMWARE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'ESP32-MicroPython')
+if FIRMWARE_DIR not in sys.path:
+    sys.path.insert(0, FIRMWARE_DIR)
+
+import binlog
+
+''' Constants '''
+# Structured view of one binlog record; the 24-bit counts stay as raw bytes
+# so the memory map is never copied until a column is actually converted
+RECORD_DTYPE = np.dtype([
+    ('timestamp_us', '<u4'),
+    ('hx711', 'u1', (3,)),
+    ('bus_voltage', 'u1', (3,)),
+    ('current', 'u1', (3,)),
+])
+assert RECORD_DTYPE.itemsize == binlog.RECORD_SIZE
+
+
+''' Functions '''
+def _u24(raw_bytes):
+    raw_bytes = raw_bytes.astype(np.int32)
+    return raw_bytes[..., 0] | (raw_bytes[..., 1] << 8) | (raw_bytes[..., 2] << 16)
+
+
+def _s24(raw_bytes):
+    value = _u24(raw_bytes)
+    return value - ((value & 0x800000) << 1)
+
+
+def open_binary_log(path):
+    # Memory-mapping a binlog file. Returns (header, records) where records
+    # is a read-only structured NumPy array backed directly by the file
+    with open(path, 'rb') as file:
+        header = binlog.unpack_header(file.read(binlog.HEADER_SIZE))
+
+    if header['record_size'] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"Unexpected record size {header['record_size']}")
+
+    record_bytes = os.path.getsize(path) - header['header_size']
+    record_count = record_bytes // RECORD_DTYPE.itemsize
+
+    # A run cut off mid-write can leave a partial last record; ignore it
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode='r',
+                        offset=header['header_size'], shape=(record_count,))
+
+    return header, records
+
+
+def unwrap_timestamps(timestamps_us, previous_us=None, bits=32):
+    # The microsecond counter wraps at 2**bits (2**30 for time.ticks_us(),
+    # ~17.9 minutes); adding one period at each wrap gives a monotonic int64
+    # time axis
+    period = 1 << bits
+    timestamps_us = timestamps_us.astype(np.int64)
+    if previous_us is not None:
+        timestamps_us = timestamps_us + (previous_us - (previous_us % period))
+        timestamps_us = np.concatenate(([previous_us], timestamps_us))
+
+    wraps = np.cumsum(np.diff(timestamps_us, prepend=timestamps_us[:1]) < 0)
+    unwrapped = timestamps_us + wraps * period
+
+    return unwrapped[1:] if previous_us is not None else unwrapped
+
+
+def decode_records(header, records, previous_us=None, start_us=None):
+    # Converting a block of records to calibrated columns (seconds since
+    # start_us, Newtons, Volts, Amps, Watts). Power is V * I, the same as the
+    # CSV logs
+    timestamps_us = unwrap_timestamps(records['timestamp_us'], previous_us,
+                                      header['timestamp_bits'])
+    if start_us is None:
+        start_us = timestamps_us[0]
+
+    columns = {
+        'timestamp_us': timestamps_us,
+        'time_s': (timestamps_us - start_us) / 1e6,
+        'force': (_u24(records['hx711']) * header['calibration_factor']
+                  + header['calibration_offset']),
+    }
+
+    if header['channels'] & binlog.CHANNEL_POWER:
+        voltage = _u24(records['bus_voltage']) * header['bus_voltage_lsb']
+        current = _s24(records['current']) * header['current_lsb']
+        columns['voltage'] = voltage
+        columns['current'] = current
+        columns['power'] = voltage * current
+
+    return columns
+
+
+def iter_binary_log_chunks(path, chunk_rows=65536):
+    # Decoding a binlog file block by block; yields (header, columns)
+    header, records = open_binary_log(path)
+    previous_us = None
+    start_us = None
+
+    for start in range(0, len(records), chunk_rows):
+        columns = decode_records(header, records[start:start + chunk_rows],
+                                 previous_us, start_us)
+        previous_us = int(columns['timestamp_us'][-1])
+        if start_us is None:
+            start_us = int(columns['timestamp_us'][0])
+        yield header, columns
+
+
+def binary_log_to_csv(path, csv_path, chunk_rows=65536):
+    # Writing the same CSV layout Power_Thrust_Sensing.py produces
+    with open(csv_path, 'w') as file:
+        header_written = False
+        for header, columns in iter_binary_log_chunks(path, chunk_rows):
+            if header['channels'] & binlog.CHANNEL_POWER:
+                names = ["Timestamp (ms)", "Force (N)", "Voltage (V)",
+                         "Current (A)", "Power (W)"]
+                rows = np.column_stack((columns['time_s'], columns['force'],
+                                        columns['voltage'], columns['current'],
+                                        columns['power']))
+            else:
+                names = ["Timestamp (ms)", "Force (N)"]
+                rows = np.column_stack((columns['time_s'], columns['force']))
+
+            if not header_written:
+                file.write(",".join(names) + "\n")
+                header_written = True
+            # Time keeps every microsecond of the ticks_us timestamps at any
+            # run length; six significant digits suit the measurements
+            np.savetxt(file, rows, delimiter=',',
+                       fmt=['%.6f'] + ['%.6g'] * (len(names) - 1))
+
+
+''' Main Code '''
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python Thrust_Binary_Log.py <log.bin> [out.csv]")
+        sys.exit(1)
+
+    log_header, log_records = open_binary_log(sys.argv[1])
+    print(f"{len(log_records)} records, "
+          f"{log_header['sample_period_us'] / 1000:.1f} ms sample period")
+
+    if len(sys.argv) == 3:
+        binary_log_to_csv(sys.argv[1], sys.argv[2])
+        print(f"Converted to {sys.argv[2]}")
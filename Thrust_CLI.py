@@ -0,0 +1,337 @@
+''' Script is called Thrust_CLI.py '''
+# Thrust curve plots from the test cases in thrust_cases/, e.g.
+#   python Thrust_CLI.py static
+#   python Thrust_CLI.py dynamic --case V1
+#   python Thrust_CLI.py dynamic --case V2 --save cruise_v2.png
+#   python Thrust_CLI.py envelope             # thrust over diameter x airspeed
+#   python Thrust_CLI.py validate             # dynamic model vs wind tunnel
+#   python Thrust_CLI.py cases
+#
+# A case file holds everything that differs between plots: title, airspeed,
+# measured / wind tunnel points, expected thrust and the RPM percent band.
+# Adding a cruise case is adding a JSON file. NumPy and matplotlib are
+# imported only once a subcommand needs them, so listing cases or asking
+# for help starts instantly.
+
+import argparse
+import json
+import os
+
+CASES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'thrust_cases')
+
+''' Constants '''
+STATIC_CASE = 'static'
+DATAPOINTS = 200
+DIAMETER_RANGE = (12, 30)   # Propeller diameters the curve spans [in]
+AIRSPEED_RANGE = (0, 30)    # Flight envelope airspeeds [m/s]
+ENVELOPE_PITCH = 10.0       # Propeller pitch of the envelope surface [in]
+
+
+''' Functions '''
+def case_path(name):
+    return os.path.join(CASES_DIR, name + '.json')
+
+
+def list_cases():
+    return sorted(os.path.splitext(file_name)[0]
+                  for file_name in os.listdir(CASES_DIR)
+                  if file_name.endswith('.json'))
+
+
+def load_case(name):
+    path = case_path(name)
+    if not os.path.exists(path):
+        raise ValueError(f"no case {name!r}; known cases: "
+                         + ", ".join(list_cases()))
+    with open(path) as file:
+        return json.load(file)
+
+
+def case_points(case):
+    # (diameters, thrust) measured for a case: the runs in the run store
+    # (Thrust_Run_Database.py) at the case's airspeed and pitch, else the
+    # plateaus added to measured_thrust.csv, else the typed-in points
+    import numpy as np
+    from Thrust_Run_Database import load_measured_points as stored_points
+    from Thrust_Signal_Processing import load_measured_points
+
+    measured_points = stored_points(airspeed=case['airspeed_m_s'],
+                                    pitch=case['pitch_in'])
+    if measured_points is None:
+        measured_points = load_measured_points(airspeed=case['airspeed_m_s'])
+    if measured_points is not None:
+        return measured_points
+    return (np.array(case['measured']['diameters'], dtype=float),
+            np.array(case['measured']['thrust'], dtype=float))
+
+
+def dynamic_points(names=None):
+    # [(case name, diameters, pitch, airspeed, thrust)] of every case with
+    # airflow (wind tunnel runs), for fitting and checking the dynamic model
+    points = []
+    for name in names or list_cases():
+        case = load_case(name)
+        if case['airspeed_m_s'] > 0:
+            diameters, thrust = case_points(case)
+            points.append((name, diameters, case['pitch_in'],
+                           case['airspeed_m_s'], thrust))
+    return points
+
+
+def fitted_pitch_speed_factor(names=None):
+    # Pitch speed factor of the dynamic model fitted to all wind tunnel
+    # points of the given cases (default: all); 1.0 without any points
+    import numpy as np
+    from Dynamic_Thrust_Simulation import fit_pitch_speed_factor
+    from Thrust_RPM_Model import rpm_model
+
+    points = dynamic_points(names)
+    if not points:
+        return 1.0
+    diameters = np.concatenate([point[1] for point in points])
+    pitches = np.concatenate([np.full(len(point[1]), point[2])
+                              for point in points])
+    airspeeds = np.concatenate([np.full(len(point[1]), point[3])
+                                for point in points])
+    thrust = np.concatenate([point[4] for point in points])
+    rpms = np.array([rpm_model(pitch=pitch)(diameter)
+                     for diameter, pitch in zip(diameters, pitches)])
+    return fit_pitch_speed_factor(diameters, pitches, rpms, airspeeds, thrust)
+
+
+def validate_cases():
+    # Dynamic model against every wind tunnel point: the source equation,
+    # the factor fitted to all cases and, to show it carries over, the
+    # factor fitted to the other cases only. Returns one dict per point
+    import numpy as np
+    from Dynamic_Thrust_Simulation import dynamic_thrust_calculation
+    from Thrust_RPM_Model import rpm_model
+
+    points = dynamic_points()
+    names = [point[0] for point in points]
+    factor_all = fitted_pitch_speed_factor(names)
+    rows = []
+    for name, diameters, pitch, airspeed, thrust in points:
+        others = [other for other in names if other != name]
+        factor_others = fitted_pitch_speed_factor(others) if others else np.nan
+        rpms = rpm_model(pitch=pitch)(diameters)
+        for diameter, rpm, measured in zip(diameters, rpms, thrust):
+            row = {'case': name, 'diameter_in': diameter,
+                   'airspeed_m_s': airspeed, 'measured_N': measured}
+            for column, factor in (('source_N', 1.0), ('fitted_N', factor_all),
+                                   ('other_cases_N', factor_others)):
+                row[column] = float(dynamic_thrust_calculation(
+                    diameter, pitch, rpm, airspeed, pitch_speed_factor=factor))
+            rows.append(row)
+    return factor_all, rows
+
+
+def case_figure(name):
+    # Thrust curve with its RPM error band, the measured points and any
+    # expected thrust for one case; returns the figure so it can be shown
+    # or saved to a file
+    import numpy as np
+    import matplotlib.pyplot as plt
+    from Dynamic_Thrust_Simulation import dynamic_thrust_calculation
+    from Static_Thrust_Calculations import (static_thrust_calculation,
+                                            thrust_rpm_percent_change)
+    from Thrust_Model_Fitting import load_fitted_band
+    from Thrust_RPM_Model import rpm_model
+
+    case = load_case(name)
+    airspeed = case['airspeed_m_s']
+    measured_diameters, measured_thrust = case_points(case)
+
+    # Linear Interpolation for RPM Values, from the tachometer readings in
+    # measured_rpm.csv
+    prop_diameters = np.linspace(*DIAMETER_RANGE, DATAPOINTS)
+    prop_pitch = np.full(DATAPOINTS, case['pitch_in'])
+    interpolated_rpms = rpm_model(pitch=case['pitch_in'])(prop_diameters)
+
+    # The case's percent band, or the spread of the RPM changes fitted to
+    # the runs at this airspeed by Thrust_Model_Fitting.py
+    band = case['band']
+    lower_percent, upper_percent = band['percent']
+    fitted_band = load_fitted_band(airspeed=airspeed)
+    if fitted_band is not None:
+        lower_percent, upper_percent = fitted_band
+
+    thrust_curve \
+        = static_thrust_calculation(prop_diameters, prop_pitch, interpolated_rpms)
+    upper_error = thrust_rpm_percent_change(prop_diameters, prop_pitch,
+                                            interpolated_rpms, upper_percent)
+    lower_error = thrust_rpm_percent_change(prop_diameters, prop_pitch,
+                                            interpolated_rpms, lower_percent)
+
+    ''' Graphing '''
+    figure = plt.figure(figsize=(8, 6), dpi=300)
+
+    plt.plot(prop_diameters, thrust_curve, label='Thrust Curve', color='blue')
+
+    band_label = (band['label'].replace('{upper}', f'{upper_percent:+.3g}')
+                  .replace('{lower}', f'{lower_percent:+.3g}'))
+    plt.fill_between(prop_diameters, lower_error, upper_error,
+                     color=band['color'], alpha=band['alpha'], label=band_label)
+
+    # Dynamic model at the case airspeed, with the pitch speed factor
+    # fitted to all wind tunnel cases
+    if airspeed > 0:
+        factor = fitted_pitch_speed_factor()
+        dynamic_curve = dynamic_thrust_calculation(
+            prop_diameters, prop_pitch, interpolated_rpms, airspeed,
+            pitch_speed_factor=factor)
+        plt.plot(prop_diameters, dynamic_curve, color='darkorange',
+                 linestyle='--',
+                 label=f'Dynamic Thrust Model [{airspeed:g} m/s]')
+
+    plt.scatter(measured_diameters, measured_thrust, color='green',
+                label=case['measured']['label'], marker='s')
+
+    if 'expected' in case:
+        plt.scatter(case['expected']['diameters'], case['expected']['thrust'],
+                    color='purple', marker='^',
+                    label=case['expected']['label'])
+
+    # Set x-axis ticks and range
+    plt.xticks(np.arange(14, 30, 2))
+    plt.xlim(*case.get('xlim', (14, 28)))
+    plt.ylim(*case.get('ylim', (10, 65)))
+
+    plt.xlabel('Propeller Diameter [inches]')
+    plt.ylabel(case['ylabel'])
+    plt.title(case['title'])
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+
+    return figure
+
+
+def envelope_figure():
+    # Dynamic thrust over the diameter x airspeed envelope, with the wind
+    # tunnel points; returns the figure so it can be shown or saved
+    import numpy as np
+    import matplotlib.pyplot as plt
+    from Dynamic_Thrust_Simulation import dynamic_thrust_surface
+    from Thrust_RPM_Model import rpm_model
+
+    factor = fitted_pitch_speed_factor()
+    prop_diameters = np.linspace(*DIAMETER_RANGE, DATAPOINTS)
+    airspeeds = np.linspace(*AIRSPEED_RANGE, DATAPOINTS)
+    surface = dynamic_thrust_surface(prop_diameters, airspeeds,
+                                     ENVELOPE_PITCH,
+                                     rpm_model(pitch=ENVELOPE_PITCH),
+                                     pitch_speed_factor=factor)
+
+    ''' Graphing '''
+    figure = plt.figure(figsize=(8, 6), dpi=300)
+
+    contours = plt.contourf(prop_diameters, airspeeds,
+                            np.maximum(surface, 0).T, levels=20,
+                            cmap='viridis')
+    plt.colorbar(contours, label='Thrust [Newtons]')
+    lines = plt.contour(prop_diameters, airspeeds, surface.T,
+                        levels=[10, 20, 30, 40, 50], colors='white',
+                        linewidths=0.8)
+    plt.clabel(lines, fmt='%d N', fontsize=8)
+
+    for name, diameters, pitch, airspeed, thrust in dynamic_points():
+        plt.scatter(diameters, np.full(len(diameters), airspeed),
+                    color='red', marker='s')
+        # Repeat runs at one diameter share a label with their range
+        for diameter in np.unique(diameters):
+            repeats = thrust[diameters == diameter]
+            label = (f'{repeats.min():.1f} N' if len(repeats) == 1 else
+                     f'{repeats.min():.1f}-{repeats.max():.1f} N')
+            plt.annotate(label, (diameter, airspeed),
+                         textcoords='offset points', xytext=(6, -3),
+                         color='white', fontsize=8)
+
+    plt.xlim(14, 28)
+    plt.xlabel('Propeller Diameter [inches]')
+    plt.ylabel('Airspeed [m/s]')
+    plt.title(f'Dynamic Thrust Envelope ({ENVELOPE_PITCH:g} in pitch, '
+              f'pitch speed x{factor:.2f})')
+    plt.tight_layout()
+
+    return figure
+
+
+def show_or_save(name, save_path):
+    # Saving needs no display, so Agg is selected before pyplot is loaded.
+    # name is a case, or None for the envelope
+    if save_path:
+        import matplotlib
+        matplotlib.use('Agg')
+    figure = envelope_figure() if name is None else case_figure(name)
+    import matplotlib.pyplot as plt
+    if save_path:
+        figure.savefig(save_path)
+        print(f"Saved {save_path}")
+    else:
+        plt.show()
+    plt.close(figure)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Static and dynamic thrust curve plots")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    static = commands.add_parser('static', help="static thrust curve")
+    static.add_argument('--save', metavar='PATH',
+                        help="write the figure to a file instead of showing it")
+
+    dynamic = commands.add_parser('dynamic', help="thrust at a cruise case")
+    dynamic.add_argument('--case', required=True,
+                         help="case file name in thrust_cases/, e.g. V1")
+    dynamic.add_argument('--save', metavar='PATH',
+                         help="write the figure to a file instead of showing it")
+
+    envelope = commands.add_parser(
+        'envelope', help="thrust over diameter x airspeed")
+    envelope.add_argument('--save', metavar='PATH',
+                          help="write the figure to a file instead of showing it")
+
+    commands.add_parser('validate',
+                        help="check the dynamic model against the wind tunnel")
+    commands.add_parser('cases', help="list the available cases")
+
+    arguments = parser.parse_args(argv)
+    if arguments.command == 'envelope':
+        show_or_save(None, arguments.save)
+        return
+    if arguments.command == 'validate':
+        factor, rows = validate_cases()
+        print(f"Pitch speed factor fitted to all cases: {factor:.3f}")
+        print(f"{'case':6} {'D [in]':>6} {'V [m/s]':>7} {'measured':>8} "
+              f"{'source':>8} {'fitted':>8} {'others':>8}")
+        for row in rows:
+            print(f"{row['case']:6} {row['diameter_in']:6.1f} "
+                  f"{row['airspeed_m_s']:7.1f} {row['measured_N']:7.2f}N "
+                  f"{row['source_N']:7.2f}N {row['fitted_N']:7.2f}N "
+                  f"{row['other_cases_N']:7.2f}N")
+        for column in ('source_N', 'fitted_N', 'other_cases_N'):
+            errors = [row[column] - row['measured_N'] for row in rows]
+            rms = (sum(error * error for error in errors)
+                   / max(len(errors), 1)) ** 0.5
+            print(f"RMS error, {column[:-2].replace('_', ' ')}: {rms:.2f} N")
+        return
+    if arguments.command == 'cases':
+        for name in list_cases():
+            case = load_case(name)
+            print(f"{name:12} {case['airspeed_m_s']:5.1f} m/s  {case['title']}")
+        return
+
+    name = STATIC_CASE if arguments.command == 'static' else arguments.case
+    try:
+        load_case(name)
+    except ValueError as error:
+        parser.error(str(error))
+    show_or_save(name, arguments.save)
+
+
+''' Main Code '''
+if __name__ == '__main__':
+    main()
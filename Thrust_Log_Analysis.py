@@ -0,0 +1,219 @@
+''' Script is called Thrust_Log_Analysis.py '''
+
+import sys
+import numpy as np
+
+''' Constants '''
+# Header written by Power_Thrust_Sensing.py (LoadCell_Sensor_ESP32.py writes
+# only the first two columns). The firmware stores time_ms / 1000, so the
+# "Timestamp (ms)" column actually holds seconds
+TIMESTAMP_COLUMN = 'Timestamp (ms)'
+FORCE_COLUMN = 'Force (N)'
+POWER_COLUMN = 'Power (W)'
+
+DEFAULT_CHUNK_ROWS = 65536
+
+
+''' Functions '''
+class RunSummary:
+    # Running totals for one recording; updated one chunk at a time so only
+    # the last sample of the previous chunk has to be remembered
+
+    def __init__(self, run_number):
+        self.run_number = run_number
+        self.samples = 0
+        self.start_time = None
+        self.end_time = None
+
+        self.min_thrust = np.inf
+        self.max_thrust = -np.inf
+        self.thrust_sum = 0.0
+        self.impulse = 0.0          # N*s
+
+        self.has_power = False
+        self.peak_power = -np.inf
+        self.energy = 0.0           # W*s
+
+        self._last_force = None
+        self._last_power = None
+
+    def update(self, timestamps, force, power=None):
+        if len(timestamps) == 0:
+            return
+
+        # Carrying the previous chunk's last sample across the boundary so
+        # the trapezoidal integrals do not lose one interval per chunk
+        if self.end_time is not None:
+            timestamps = np.concatenate(([self.end_time], timestamps))
+            force = np.concatenate(([self._last_force], force))
+            if power is not None:
+                power = np.concatenate(([self._last_power], power))
+            new_samples = slice(1, None)
+        else:
+            self.start_time = timestamps[0]
+            new_samples = slice(0, None)
+
+        time_steps = np.diff(timestamps)
+
+        self.samples = self.samples + len(timestamps[new_samples])
+        self.min_thrust = min(self.min_thrust, force[new_samples].min())
+        self.max_thrust = max(self.max_thrust, force[new_samples].max())
+        self.thrust_sum = self.thrust_sum + force[new_samples].sum()
+        self.impulse = self.impulse + np.sum(time_steps
+                                             * (force[1:] + force[:-1]) / 2)
+
+        if power is not None:
+            self.has_power = True
+            self.peak_power = max(self.peak_power, power[new_samples].max())
+            self.energy = self.energy + np.sum(time_steps
+                                               * (power[1:] + power[:-1]) / 2)
+            self._last_power = power[-1]
+
+        self.end_time = timestamps[-1]
+        self._last_force = force[-1]
+
+    @property
+    def duration(self):
+        return self.end_time - self.start_time if self.samples else 0.0
+
+    @property
+    def mean_thrust(self):
+        return self.thrust_sum / self.samples if self.samples else np.nan
+
+    @property
+    def thrust_per_watt(self):
+        # Time-averaged thrust over time-averaged power [N/W]
+        if not self.has_power or self.energy <= 0:
+            return np.nan
+        return self.impulse / self.energy
+
+    def as_dict(self):
+        return {
+            'run': self.run_number,
+            'samples': self.samples,
+            'duration_s': self.duration,
+            'min_thrust_N': self.min_thrust,
+            'max_thrust_N': self.max_thrust,
+            'mean_thrust_N': self.mean_thrust,
+            'peak_power_W': self.peak_power if self.has_power else np.nan,
+            'energy_Ws': self.energy if self.has_power else np.nan,
+            'thrust_per_watt_N_W': self.thrust_per_watt,
+        }
+
+
+def _parse_rows(lines, column_count):
+    rows = np.loadtxt(lines, delimiter=',', ndmin=2)
+    if rows.shape[1] != column_count:
+        raise ValueError(f"Expected {column_count} columns, "
+                         f"got {rows.shape[1]}")
+    return rows
+
+
+def iter_log_chunks(file, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Reading a (possibly concatenated) CSV log in blocks of chunk_rows lines.
+    # Yields (run_number, columns, rows) where columns are the header names of
+    # the current run. A repeated header line or a timestamp that jumps
+    # backwards starts a new run
+
+    run_number = -1
+    columns = None
+    last_time = None
+    pending = []
+
+    def flush():
+        nonlocal run_number, last_time
+        if not pending:
+            return
+        rows = _parse_rows(pending, len(columns))
+        pending.clear()
+
+        timestamps = rows[:, columns.index(TIMESTAMP_COLUMN)]
+        restarts = np.flatnonzero(np.diff(timestamps) < 0) + 1
+        if last_time is not None and timestamps[0] < last_time:
+            restarts = np.concatenate(([0], restarts))
+        last_time = timestamps[-1]
+
+        start = 0
+        for restart in restarts:
+            if restart > start:
+                yield run_number, columns, rows[start:restart]
+            run_number = run_number + 1
+            start = restart
+        yield run_number, columns, rows[start:]
+
+    for line in file:
+        line = line.strip()
+        if not line:
+            continue
+
+        if not (line[0].isdigit() or line[0] in '-+.'):
+            # Header line: new run with (possibly) new columns
+            yield from flush()
+            columns = [name.strip() for name in line.split(',')]
+            run_number = run_number + 1
+            last_time = None
+            continue
+
+        if columns is None:
+            raise ValueError("Log data found before a header line")
+
+        pending.append(line)
+        if len(pending) >= chunk_rows:
+            yield from flush()
+
+    yield from flush()
+
+
+def analyze_binary_log(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Same summary for a packed binlog file (one run per file)
+    from Thrust_Binary_Log import iter_binary_log_chunks
+
+    summary = RunSummary(0)
+    for header, columns in iter_binary_log_chunks(path, chunk_rows):
+        summary.update(columns['time_s'], columns['force'],
+                       columns.get('power'))
+
+    return [summary] if summary.samples else []
+
+
+def analyze_log(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Per-run summaries of a CSV log without loading the whole file
+    if path.endswith('.bin'):
+        return analyze_binary_log(path, chunk_rows)
+
+    summaries = []
+
+    with open(path, 'r') as file:
+        for run_number, columns, rows in iter_log_chunks(file, chunk_rows):
+            if not summaries or summaries[-1].run_number != run_number:
+                summaries.append(RunSummary(run_number))
+
+            power = None
+            if POWER_COLUMN in columns:
+                power = rows[:, columns.index(POWER_COLUMN)]
+
+            summaries[-1].update(rows[:, columns.index(TIMESTAMP_COLUMN)],
+                                 rows[:, columns.index(FORCE_COLUMN)],
+                                 power)
+
+    return summaries
+
+
+''' Main Code '''
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python Thrust_Log_Analysis.py <log.csv> [log.csv ...]")
+        sys.exit(1)
+
+    for log_path in sys.argv[1:]:
+        print(log_path)
+        for summary in analyze_log(log_path):
+            print(f"  Run {summary.run_number}: {summary.samples} samples, "
+                  f"{summary.duration:.2f} s")
+            print(f"    Thrust  min {summary.min_thrust:7.2f} N, "
+                  f"max {summary.max_thrust:7.2f} N, "
+                  f"mean {summary.mean_thrust:7.2f} N")
+            if summary.has_power:
+                print(f"    Power   peak {summary.peak_power:7.2f} W, "
+                      f"energy {summary.energy:9.1f} W*s, "
+                      f"{summary.thrust_per_watt:.4f} N/W")
@@ -0,0 +1,275 @@
+''' Script is called Thrust_Model_Fitting.py '''
+# Fits the static_thrust_calculation() model to every recorded run listed in
+# a run manifest, in parallel, caching each result by the log file's hash:
+#   python Thrust_Model_Fitting.py runs.csv [--workers 8] [--refit]
+#
+# The manifest is a CSV with columns File, Diameter (in), Pitch (in),
+# RPM (tachometer reading at full throttle) and optionally Airspeed (m/s)
+# (default 0, static); File is relative to the manifest. Runs need the power
+# monitor columns: the RPM at each steady-state plateau is scaled from the
+# full-throttle RPM by the propeller power law, P ~ rpm**3, and the model
+# thrust is
+#   k * static_thrust_calculation(D, P, rpm - rpm_offset)
+# Since static thrust goes with rpm**2, sqrt(thrust) is linear in rpm, so k
+# (thrust-coefficient scale) and rpm_offset (RPM correction) come from one
+# linear least-squares solve per run.
+#
+# The fits are written to thrust_fits.csv, from which the Static / Dynamic
+# thrust plots take their RPM error bands.
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+from Static_Thrust_Calculations import static_thrust_calculation
+from Thrust_Signal_Processing import process_log
+
+''' Constants '''
+MODEL_VERSION = 1           # Bump when the fit changes, invalidating caches
+DEFAULT_CACHE = 'fit_cache.json'
+FITS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'thrust_fits.csv')
+RESULT_COLUMNS = ['file', 'diameter_in', 'pitch_in', 'rpm', 'airspeed_m_s',
+                  'plateaus', 'thrust_scale', 'rpm_offset',
+                  'rpm_change_percent', 'equivalent_rpm_percent',
+                  'rms_error_N', 'status']
+
+
+''' Functions '''
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(entry, digest):
+    # The log contents plus everything else the fit depends on
+    return (f"{digest}:{entry['diameter']:g}:{entry['pitch']:g}:"
+            f"{entry['rpm']:g}:v{MODEL_VERSION}")
+
+
+def read_manifest(path):
+    base = os.path.dirname(os.path.abspath(path))
+    entries = []
+    with open(path, newline='') as file:
+        for row in csv.DictReader(file):
+            entries.append({
+                'file': row['File'],
+                'path': os.path.join(base, row['File']),
+                'diameter': float(row['Diameter (in)']),
+                'pitch': float(row['Pitch (in)']),
+                'rpm': float(row['RPM']),
+                'airspeed': float(row.get('Airspeed (m/s)') or 0.0),
+            })
+    return entries
+
+
+def plateau_rpms(power, full_throttle_rpm):
+    # RPM at each plateau from its power, relative to the highest-power one
+    return full_throttle_rpm * np.cbrt(power / np.max(power))
+
+
+def fit_thrust_model(diameter, pitch, rpms, thrust):
+    # Least squares for sqrt(T) = a * rpm - b over a run's plateaus.
+    # Returns (thrust scale k, rpm offset, rms thrust error [N])
+    coefficient = static_thrust_calculation(diameter, pitch, 1.0)
+    design = np.column_stack((rpms, -np.ones_like(rpms)))
+    (a, b), *_ = np.linalg.lstsq(design, np.sqrt(np.maximum(thrust, 0.0)),
+                                 rcond=None)
+
+    thrust_scale = a ** 2 / coefficient
+    rpm_offset = b / a
+    predicted = thrust_scale * static_thrust_calculation(
+        diameter, pitch, rpms - rpm_offset)
+    rms_error = float(np.sqrt(np.mean((predicted - thrust) ** 2)))
+    return float(thrust_scale), float(rpm_offset), rms_error
+
+
+def empty_result(entry, status=''):
+    return {'file': entry['file'], 'diameter_in': entry['diameter'],
+            'pitch_in': entry['pitch'], 'rpm': entry['rpm'],
+            'airspeed_m_s': entry['airspeed'], 'plateaus': 0,
+            'thrust_scale': np.nan, 'rpm_offset': np.nan,
+            'rpm_change_percent': np.nan, 'equivalent_rpm_percent': np.nan,
+            'rms_error_N': np.nan, 'status': status}
+
+
+def fit_run(entry):
+    # Worker: reduce one log to plateaus and fit it
+    result = empty_result(entry)
+
+    columns, table = process_log(entry['path'])
+    result['plateaus'] = len(table)
+    if 'power' not in columns:
+        result['status'] = 'no power data'
+        return result
+    if len(table) < 2:
+        result['status'] = 'too few plateaus'
+        return result
+
+    power = np.array([row['power_W'] for row in table])
+    thrust = np.array([row['thrust_N'] for row in table])
+
+    thrust_scale, rpm_offset, rms_error = fit_thrust_model(
+        entry['diameter'], entry['pitch'], plateau_rpms(power, entry['rpm']),
+        thrust)
+
+    # RPM correction at full throttle, in the percent form
+    # thrust_rpm_percent_change() takes. The equivalent change also folds in
+    # the thrust scale, as thrust goes with rpm**2
+    rpm_factor = 1 - rpm_offset / entry['rpm']
+    result['rpm_change_percent'] = float(100 * (rpm_factor - 1))
+    result['equivalent_rpm_percent'] = float(
+        100 * (np.sqrt(thrust_scale) * rpm_factor - 1))
+    result.update(thrust_scale=thrust_scale, rpm_offset=rpm_offset,
+                  rms_error_N=rms_error, status='ok')
+    return result
+
+
+def load_cache(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_cache(cache, path):
+    # Written to a temporary file first, so an interrupted save never
+    # leaves a truncated cache
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(cache, file)
+    os.replace(temporary, path)
+
+
+def fit_runs(entries, cache_path=DEFAULT_CACHE, workers=None, refit=False):
+    # Fits every run not already in the cache across a process pool. A log
+    # that cannot be read or fitted is recorded as failed without stopping
+    # the rest, and every finished fit is cached even if the batch is
+    # interrupted. Returns (results in manifest order, fitted, {file: error})
+    cache = {} if refit else load_cache(cache_path)
+    failed = {}
+    keys = []
+    for entry in entries:
+        try:
+            keys.append(cache_key(entry, file_hash(entry['path'])))
+        except OSError as error:
+            failed[entry['file']] = f"{type(error).__name__}: {error}"
+            keys.append(None)
+
+    # Identical logs share a key and are fitted once
+    pending = {}
+    for key, entry in zip(keys, entries):
+        if key is not None and key not in cache:
+            pending[key] = entry
+    fit_errors = {}
+    fitted = 0
+    try:
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(fit_run, entry): key
+                           for key, entry in pending.items()}
+                for future in as_completed(futures):
+                    key = futures[future]
+                    try:
+                        cache[key] = future.result()
+                        fitted += 1
+                    except Exception as error:
+                        fit_errors[key] = f"{type(error).__name__}: {error}"
+    finally:
+        if pending:
+            save_cache(cache, cache_path)
+
+    for key, entry in zip(keys, entries):
+        if key in fit_errors:
+            failed[entry['file']] = fit_errors[key]
+
+    # The file name and airspeed can differ between identical logs; report
+    # the manifest's
+    results = []
+    for key, entry in zip(keys, entries):
+        if key not in cache:
+            results.append(empty_result(entry, 'failed'))
+        else:
+            results.append(dict(cache[key], file=entry['file'],
+                                airspeed_m_s=entry['airspeed']))
+    return results, fitted, failed
+
+
+def save_results(results, path):
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(RESULT_COLUMNS)
+        for result in results:
+            writer.writerow([result[name] for name in RESULT_COLUMNS])
+
+
+def load_fitted_band(airspeed=0.0, path=FITS_PATH, tolerance=0.5):
+    # (lowest, highest) equivalent RPM percent change over the runs fitted
+    # at the given airspeed [m/s], for thrust_rpm_percent_change(); None
+    # when there are no such fits yet
+    if not os.path.exists(path):
+        return None
+    changes = []
+    with open(path, newline='') as file:
+        for row in csv.DictReader(file):
+            if (row['status'] == 'ok'
+                    and abs(float(row['airspeed_m_s']) - airspeed) <= tolerance):
+                changes.append(float(row['equivalent_rpm_percent']))
+    if not changes:
+        return None
+    return min(changes), max(changes)
+
+
+''' Main Code '''
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Fit the static thrust model to every recorded run")
+    parser.add_argument('manifest', help="CSV listing the runs to fit")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--cache', default=None,
+                        help=f"fit cache (default: {DEFAULT_CACHE} next to "
+                             "the manifest)")
+    parser.add_argument('--refit', action='store_true',
+                        help="ignore cached fits")
+    parser.add_argument('--output', default=FITS_PATH,
+                        help="results CSV (default: thrust_fits.csv, read by "
+                             "the thrust plots)")
+    arguments = parser.parse_args()
+
+    manifest_dir = os.path.dirname(os.path.abspath(arguments.manifest))
+    cache_file = arguments.cache or os.path.join(manifest_dir, DEFAULT_CACHE)
+    output_file = arguments.output
+
+    run_entries = read_manifest(arguments.manifest)
+    fits, fitted, errors = fit_runs(run_entries, cache_file, arguments.workers,
+                                    arguments.refit)
+    save_results(fits, output_file)
+
+    print(f"{len(fits)} runs, {fitted} fitted, "
+          f"{len(fits) - fitted - len(errors)} from cache, "
+          f"{len(errors)} failed -> {output_file}")
+    for fit in fits:
+        if fit['status'] == 'ok':
+            print(f"  {fit['file']:30} k {fit['thrust_scale']:.3f}, "
+                  f"RPM {fit['rpm_change_percent']:+.1f}% at full throttle "
+                  f"({fit['equivalent_rpm_percent']:+.1f}% equivalent), "
+                  f"rms {fit['rms_error_N']:.2f} N")
+        else:
+            print(f"  {fit['file']:30} {fit['status']} "
+                  f"{errors.get(fit['file'], '')}")
+
+    good = [fit for fit in fits if fit['status'] == 'ok']
+    if good:
+        print(f"Median thrust scale {np.median([f['thrust_scale'] for f in good]):.3f}, "
+              f"median RPM change "
+              f"{np.median([f['rpm_change_percent'] for f in good]):+.1f}%")
+    if errors:
+        raise SystemExit(1)
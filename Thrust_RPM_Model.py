@@ -0,0 +1,200 @@
+''' Script is called Thrust_RPM_Model.py '''
+# Motor RPM against propeller diameter from the tachometer readings in
+# measured_rpm.csv, shared by the thrust scripts and sweeps, e.g.
+#   python Thrust_RPM_Model.py 14 18 22 28 --extrapolation power
+#
+# The readings are turned into a dense table once per model (cached), and
+# queries are a single np.interp over it, so no SciPy import or
+# interpolator construction is paid per call. Rows are grouped by motor,
+# pitch and supply voltage; a query at another voltage scales the nearest
+# group's RPM by the voltage ratio (RPM ~ Kv x V).
+
+import argparse
+import csv
+import os
+from functools import lru_cache
+import numpy as np
+
+''' Constants '''
+MEASURED_RPM_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 'measured_rpm.csv')
+TABLE_POINTS = 4096         # Dense table resolution over the measured range
+RPM_CACHE_SIZE = 32         # Models kept by rpm_model()
+
+KINDS = ('linear', 'pchip')
+EXTRAPOLATIONS = ('linear', 'clamp', 'power')
+
+
+''' Functions '''
+def _pchip_slopes(x, y):
+    # Fritsch-Carlson slopes: a cubic through the points that never
+    # overshoots, so the curve stays monotonic between readings
+    h = np.diff(x)
+    delta = np.diff(y) / h
+    slopes = np.zeros_like(y)
+    if len(x) == 2:
+        slopes[:] = delta[0]
+        return slopes
+
+    w1 = 2 * h[1:] + h[:-1]
+    w2 = h[1:] + 2 * h[:-1]
+    same_sign = delta[:-1] * delta[1:] > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        harmonic = (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:])
+    slopes[1:-1] = np.where(same_sign, harmonic, 0.0)
+
+    for end, (h0, h1, d0, d1) in ((0, (h[0], h[1], delta[0], delta[1])),
+                                  (-1, (h[-1], h[-2], delta[-1], delta[-2]))):
+        slope = ((2 * h0 + h1) * d0 - h0 * d1) / (h0 + h1)
+        if np.sign(slope) != np.sign(d0):
+            slope = 0.0
+        elif np.sign(d0) != np.sign(d1) and abs(slope) > 3 * abs(d0):
+            slope = 3 * d0
+        slopes[end] = slope
+    return slopes
+
+
+def _hermite(x, y, slopes, points):
+    # Cubic Hermite curve through (x, y) with the given slopes at points
+    interval = np.clip(np.searchsorted(x, points, side='right') - 1,
+                       0, len(x) - 2)
+    h = x[interval + 1] - x[interval]
+    t = (points - x[interval]) / h
+    return ((2 * t**3 - 3 * t**2 + 1) * y[interval]
+            + (t**3 - 2 * t**2 + t) * h * slopes[interval]
+            + (-2 * t**3 + 3 * t**2) * y[interval + 1]
+            + (t**3 - t**2) * h * slopes[interval + 1])
+
+
+class RPMModel:
+    # RPM as a function of diameter [in] through a precomputed table.
+    # kind: 'linear' (as interp1d did) or 'pchip' (monotone cubic).
+    # extrapolation outside the readings: 'linear' continues the end slope
+    # (as fill_value="extrapolate" did), 'clamp' holds the end values and
+    # 'power' continues RPM ~ diameter**b with b from the end segment
+    def __init__(self, diameters, rpms, kind='linear', extrapolation='linear',
+                 table_points=TABLE_POINTS):
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {KINDS}, not {kind!r}")
+        if extrapolation not in EXTRAPOLATIONS:
+            raise ValueError(f"extrapolation must be one of {EXTRAPOLATIONS}, "
+                             f"not {extrapolation!r}")
+        order = np.argsort(diameters)
+        x = np.asarray(diameters, dtype=float)[order]
+        y = np.asarray(rpms, dtype=float)[order]
+        if len(x) < 2 or np.any(np.diff(x) <= 0):
+            raise ValueError("need readings at two or more distinct diameters")
+
+        self.kind = kind
+        self.extrapolation = extrapolation
+        self.diameters = x
+        self.rpms = y
+
+        if kind == 'linear':
+            # The readings are the table: np.interp is exact between them
+            self.table_x = x
+            self.table_y = y
+            self.end_slopes = (np.diff(y[:2])[0] / np.diff(x[:2])[0],
+                               np.diff(y[-2:])[0] / np.diff(x[-2:])[0])
+        else:
+            slopes = _pchip_slopes(x, y)
+            self.table_x = np.union1d(np.linspace(x[0], x[-1], table_points), x)
+            self.table_y = _hermite(x, y, slopes, self.table_x)
+            self.end_slopes = (slopes[0], slopes[-1])
+
+        # Exponents for the 'power' extrapolation, from the end segments
+        self.end_exponents = (np.log(y[1] / y[0]) / np.log(x[1] / x[0]),
+                              np.log(y[-1] / y[-2]) / np.log(x[-1] / x[-2]))
+
+    def __call__(self, diameters):
+        diameters = np.asarray(diameters, dtype=float)
+        rpms = np.interp(diameters, self.table_x, self.table_y)
+        if self.extrapolation == 'clamp':
+            return rpms
+
+        low, high = self.diameters[0], self.diameters[-1]
+        below = diameters < low
+        above = diameters > high
+        if not (np.any(below) or np.any(above)):
+            return rpms
+
+        if self.extrapolation == 'linear':
+            rpms = np.where(below, self.rpms[0]
+                            + self.end_slopes[0] * (diameters - low), rpms)
+            rpms = np.where(above, self.rpms[-1]
+                            + self.end_slopes[1] * (diameters - high), rpms)
+        else:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rpms = np.where(below, self.rpms[0] * (diameters / low)
+                                ** self.end_exponents[0], rpms)
+                rpms = np.where(above, self.rpms[-1] * (diameters / high)
+                                ** self.end_exponents[1], rpms)
+        return rpms
+
+
+def load_rpm_points(path=MEASURED_RPM_PATH):
+    # {(motor, pitch, voltage): (diameters, rpms)}; voltage is None when
+    # the readings do not record it
+    groups = {}
+    with open(path, newline='') as file:
+        for row in csv.DictReader(file):
+            voltage = float(row['Voltage (V)']) if row['Voltage (V)'] else None
+            key = (row['Motor'], float(row['Pitch (in)']), voltage)
+            diameters, rpms = groups.setdefault(key, ([], []))
+            diameters.append(float(row['Diameter (in)']))
+            rpms.append(float(row['RPM']))
+    return groups
+
+
+@lru_cache(maxsize=RPM_CACHE_SIZE)
+def rpm_model(motor=None, pitch=None, voltage=None, kind='linear',
+              extrapolation='linear', path=MEASURED_RPM_PATH):
+    # Model for the readings of motor (default: the first listed) at the
+    # nearest recorded pitch and voltage, scaled to voltage if given.
+    # Cached, so repeated calls with the same arguments share one table
+    groups = load_rpm_points(path)
+    if not groups:
+        raise ValueError(f"{path} has no RPM readings")
+    if motor is None:
+        motor = next(iter(groups))[0]
+    candidates = [key for key in groups if key[0] == motor]
+    if not candidates:
+        raise ValueError(f"{path} has no readings for motor {motor!r}")
+
+    def distance(key):
+        pitch_distance = abs(key[1] - pitch) if pitch is not None else 0.0
+        voltage_distance = (abs(key[2] - voltage)
+                            if voltage is not None and key[2] is not None
+                            else 0.0)
+        return pitch_distance, voltage_distance
+
+    key = min(candidates, key=distance)
+    diameters, rpms = groups[key]
+    rpms = np.array(rpms)
+    if voltage is not None and key[2] is not None:
+        rpms = rpms * (voltage / key[2])
+    return RPMModel(diameters, rpms, kind, extrapolation)
+
+
+''' Main Code '''
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Motor RPM at propeller diameters from measured_rpm.csv")
+    parser.add_argument('diameters', type=float, nargs='+',
+                        help="propeller diameters [in]")
+    parser.add_argument('--motor', default=None)
+    parser.add_argument('--pitch', type=float, default=None,
+                        help="propeller pitch [in]")
+    parser.add_argument('--voltage', type=float, default=None,
+                        help="supply voltage [V]")
+    parser.add_argument('--kind', choices=KINDS, default='linear')
+    parser.add_argument('--extrapolation', choices=EXTRAPOLATIONS,
+                        default='linear')
+    arguments = parser.parse_args()
+
+    model = rpm_model(arguments.motor, arguments.pitch, arguments.voltage,
+                      arguments.kind, arguments.extrapolation)
+    for query, rpm in zip(arguments.diameters, model(arguments.diameters)):
+        note = ('' if model.diameters[0] <= query <= model.diameters[-1]
+                else f" ({arguments.extrapolation} extrapolation)")
+        print(f"{query:6.2f} in: {rpm:7.0f} RPM{note}")
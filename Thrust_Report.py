@@ -0,0 +1,193 @@
+''' Script is called Thrust_Report.py '''
+# Renders the design-review figures headless (Agg) to image files: one
+# thrust curve plot per case in thrust_cases/ (static, V1, V2, ...), the
+# dynamic thrust envelope and one plateau plot per run log given, in
+# parallel worker processes. A figure whose inputs (data files and the
+# scripts that draw it) are unchanged since the last report is skipped, e.g.
+#   python Thrust_Report.py
+#   python Thrust_Report.py logs/*.csv logs/*.bin --formats png svg
+#   python Thrust_Report.py --force --output review
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+''' Constants '''
+DEFAULT_OUTPUT = 'report'
+DEFAULT_FORMATS = ('png',)
+STATE_NAME = 'report_state.json'
+
+# Files every thrust curve figure reads
+THRUST_PLOT_INPUTS = ['Thrust_CLI.py', 'Static_Thrust_Calculations.py',
+                      'Dynamic_Thrust_Simulation.py',
+                      'Thrust_RPM_Model.py', 'Thrust_Model_Fitting.py',
+                      'Thrust_Signal_Processing.py',
+                      'Thrust_Run_Database.py', 'measured_rpm.csv',
+                      'measured_thrust.csv', 'thrust_fits.csv',
+                      'thrust_runs.sqlite']
+RUN_PLOT_INPUTS = ['Thrust_Signal_Processing.py', 'Thrust_Log_Analysis.py',
+                   'Thrust_Binary_Log.py', 'ESP32-MicroPython/binlog.py']
+
+
+''' Functions '''
+def report_figures(logs=()):
+    # [{name, module, function, args, inputs}] for every figure of the report
+    from Thrust_CLI import list_cases, case_path
+    # The dynamic model's pitch speed factor is fitted to every case, so
+    # each thrust figure depends on all case files
+    thrust_inputs = [case_path(case) for case in list_cases()] \
+        + THRUST_PLOT_INPUTS
+    figures = []
+    for case in list_cases():
+        figures.append({'name': f'thrust_{case}', 'module': 'Thrust_CLI',
+                        'function': 'case_figure', 'args': [case],
+                        'inputs': thrust_inputs})
+    figures.append({'name': 'thrust_envelope', 'module': 'Thrust_CLI',
+                    'function': 'envelope_figure', 'args': [],
+                    'inputs': thrust_inputs})
+    for log_path in logs:
+        log_path = os.path.abspath(log_path)
+        stem = os.path.splitext(os.path.basename(log_path))[0]
+        figures.append({'name': f'run_{stem}', 'module': 'Thrust_Report',
+                        'function': 'run_figure', 'args': [log_path],
+                        'inputs': [log_path] + RUN_PLOT_INPUTS})
+    return figures
+
+
+def run_figure(path):
+    # Plateau plot of one recorded run
+    from Thrust_Signal_Processing import process_log, plateau_figure
+    columns, table = process_log(path)
+    return plateau_figure(columns, table, os.path.basename(path))
+
+
+def input_digest(figure, formats):
+    # Hash of everything the figure depends on. A missing optional input
+    # (e.g. no fits yet) hashes as missing, so creating it re-renders
+    digest = hashlib.sha256(json.dumps([figure['module'], figure['function'],
+                                        figure['args'], list(formats)]).encode())
+    for name in figure['inputs']:
+        path = os.path.join(ROOT_DIR, name)
+        digest.update(name.encode() + b'\0')
+        if os.path.exists(path):
+            with open(path, 'rb') as file:
+                digest.update(hashlib.sha256(file.read()).digest())
+        else:
+            digest.update(b'missing')
+    return digest.hexdigest()
+
+
+def output_paths(figure, output_dir, formats):
+    return [os.path.join(output_dir, f"{figure['name']}.{extension}")
+            for extension in formats]
+
+
+def use_agg():
+    # Worker initializer: no display is needed or opened
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def render_figure(figure, paths):
+    # Worker: build one figure and save it in every requested format
+    import matplotlib.pyplot as plt
+    start = time.perf_counter()
+    module = importlib.import_module(figure['module'])
+    image = getattr(module, figure['function'])(*figure['args'])
+    for path in paths:
+        image.savefig(path)
+    plt.close(image)
+    return time.perf_counter() - start
+
+
+def load_state(output_dir):
+    path = os.path.join(output_dir, STATE_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_state(state, output_dir):
+    with open(os.path.join(output_dir, STATE_NAME), 'w') as file:
+        json.dump(state, file, indent=2)
+
+
+def build_report(figures, output_dir=DEFAULT_OUTPUT, formats=DEFAULT_FORMATS,
+                 force=False, workers=None):
+    # Renders the figures whose inputs changed; returns
+    # ({name: seconds} rendered, [names skipped], {name: error})
+    os.makedirs(output_dir, exist_ok=True)
+    state = {} if force else load_state(output_dir)
+
+    pending = []
+    skipped = []
+    for figure in figures:
+        digest = input_digest(figure, formats)
+        paths = output_paths(figure, output_dir, formats)
+        if state.get(figure['name']) == digest and all(map(os.path.exists,
+                                                           paths)):
+            skipped.append(figure['name'])
+        else:
+            pending.append((figure, paths, digest))
+
+    rendered = {}
+    failed = {}
+    if pending:
+        try:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=use_agg) as pool:
+                futures = {pool.submit(render_figure, figure, paths):
+                           (figure['name'], digest)
+                           for figure, paths, digest in pending}
+                for future in as_completed(futures):
+                    name, digest = futures[future]
+                    try:
+                        rendered[name] = future.result()
+                        state[name] = digest
+                    except Exception as error:
+                        # One broken log does not stop the rest of the report
+                        failed[name] = f"{type(error).__name__}: {error}"
+                        state.pop(name, None)
+        finally:
+            save_state(state, output_dir)
+
+    return rendered, skipped, failed
+
+
+''' Main Code '''
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Render the thrust report figures to image files")
+    parser.add_argument('logs', nargs='*',
+                        help=".csv or .bin run logs to add plateau plots for")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help=f"output directory (default {DEFAULT_OUTPUT})")
+    parser.add_argument('--formats', nargs='+', default=list(DEFAULT_FORMATS),
+                        help="image formats, e.g. png svg pdf (default png)")
+    parser.add_argument('--force', action='store_true',
+                        help="re-render every figure")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    arguments = parser.parse_args()
+
+    report_start = time.perf_counter()
+    figure_times, unchanged, errors = build_report(
+        report_figures(arguments.logs), arguments.output, arguments.formats,
+        arguments.force, arguments.workers)
+
+    for figure_name, seconds in sorted(figure_times.items()):
+        print(f"  {figure_name:30} {seconds:6.2f} s")
+    for figure_name, error in sorted(errors.items()):
+        print(f"  {figure_name:30} FAILED {error}")
+    print(f"{len(figure_times)} rendered, {len(unchanged)} unchanged, "
+          f"{len(errors)} failed in {time.perf_counter() - report_start:.1f} s "
+          f"-> {arguments.output}")
+    if errors:
+        raise SystemExit(1)
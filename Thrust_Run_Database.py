@@ -0,0 +1,446 @@
+''' Script is called Thrust_Run_Database.py '''
+# Loads recorded runs into one local indexed store, so questions about past
+# tests are answered without re-reading every log, e.g.
+#   python Thrust_Run_Database.py ingest runs.csv
+#   python Thrust_Run_Database.py ingest logs/*.bin --diameter 20 --pitch 10 \
+#       --motor "Scorpion SII-4020" --battery 6S-5000 --airspeed 15.6
+#   python Thrust_Run_Database.py query --diameter 20 --min-thrust 40
+#   python Thrust_Run_Database.py show 12
+#
+# The store is a SQLite file (thrust_runs.sqlite): one row per run with its
+# test set-up and full-throttle results, indexed by diameter, pitch, motor,
+# battery, date and airspeed, one row per steady-state plateau, and each
+# run's sample columns as NumPy blobs in a separate table that queries never
+# touch. A manifest is a CSV with columns File, Diameter (in), Pitch (in)
+# and optionally Motor, Battery, Date (YYYY-MM-DD), Airspeed (m/s) and RPM;
+# File is relative to the manifest. Ingesting again only reduces logs whose
+# size or modification time changed; set-up changes in the manifest are
+# applied either way.
+#
+# Once runs are stored, the Static / Dynamic thrust plots take their
+# measured points from here.
+
+import argparse
+import csv
+import datetime
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+''' Constants '''
+DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'thrust_runs.sqlite')
+SCHEMA_VERSION = 1          # Bump when reduction changes, re-ingesting runs
+
+SETUP_COLUMNS = ['diameter_in', 'pitch_in', 'motor', 'battery', 'date',
+                 'airspeed_m_s', 'rpm']
+RESULT_COLUMNS = ['samples', 'duration_s', 'rate_hz', 'plateaus',
+                  'peak_thrust_N', 'peak_power_W', 'peak_g_per_W']
+PLATEAU_COLUMNS = ['plateau', 'start_s', 'end_s', 'duration_s', 'thrust_N',
+                   'thrust_std_N', 'voltage_V', 'current_A', 'power_W',
+                   'g_per_W']
+
+SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    sha256 TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    diameter_in REAL, pitch_in REAL, motor TEXT, battery TEXT, date TEXT,
+    airspeed_m_s REAL NOT NULL DEFAULT 0, rpm REAL,
+    samples INTEGER, duration_s REAL, rate_hz REAL, plateaus INTEGER,
+    peak_thrust_N REAL, peak_power_W REAL, peak_g_per_W REAL
+);
+CREATE INDEX IF NOT EXISTS runs_diameter ON runs (diameter_in, peak_thrust_N);
+CREATE INDEX IF NOT EXISTS runs_pitch ON runs (pitch_in);
+CREATE INDEX IF NOT EXISTS runs_motor ON runs (motor);
+CREATE INDEX IF NOT EXISTS runs_battery ON runs (battery);
+CREATE INDEX IF NOT EXISTS runs_date ON runs (date);
+CREATE INDEX IF NOT EXISTS runs_airspeed ON runs (airspeed_m_s, diameter_in);
+CREATE INDEX IF NOT EXISTS runs_thrust ON runs (peak_thrust_N);
+
+CREATE TABLE IF NOT EXISTS plateaus (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    plateau INTEGER NOT NULL,
+    {', '.join(f'{name} REAL' for name in PLATEAU_COLUMNS[1:])},
+    PRIMARY KEY (run_id, plateau)
+);
+CREATE INDEX IF NOT EXISTS plateaus_thrust ON plateaus (thrust_N);
+
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+'''
+
+# Sample columns kept at full precision; the rest are stored as float32,
+# well below the resolution of the load cell and power monitor
+FLOAT64_COLUMNS = ('time_s',)
+
+
+''' Functions '''
+def connect(path=DATABASE_PATH):
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    connection.execute('PRAGMA foreign_keys = ON')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_date(path):
+    # Date of a log without one in the manifest: when the file was written
+    return datetime.date.fromtimestamp(os.path.getmtime(path)).isoformat()
+
+
+def read_manifest(path):
+    base = os.path.dirname(os.path.abspath(path))
+    entries = []
+    with open(path, newline='') as file:
+        for row in csv.DictReader(file):
+            entries.append(run_entry(
+                os.path.join(base, row['File']),
+                diameter_in=float(row['Diameter (in)']),
+                pitch_in=float(row['Pitch (in)']),
+                motor=row.get('Motor') or None,
+                battery=row.get('Battery') or None,
+                date=row.get('Date') or None,
+                airspeed_m_s=float(row.get('Airspeed (m/s)') or 0.0),
+                rpm=float(row['RPM']) if row.get('RPM') else None))
+    return entries
+
+
+def run_entry(path, diameter_in=None, pitch_in=None, motor=None,
+              battery=None, date=None, airspeed_m_s=0.0, rpm=None):
+    # One run to ingest: its log file and test set-up
+    path = os.path.abspath(path)
+    return {'file': path, 'diameter_in': diameter_in, 'pitch_in': pitch_in,
+            'motor': motor, 'battery': battery,
+            'date': date or (file_date(path) if os.path.exists(path)
+                             else None),
+            'airspeed_m_s': airspeed_m_s,
+            'rpm': rpm}
+
+
+def reduce_run(path):
+    # Worker: the raw sample columns of a log and its plateau table
+    from Thrust_Signal_Processing import (load_run, condition, find_plateaus,
+                                          plateau_table, sample_rate)
+    columns = load_run(path)
+    conditioned = condition(columns)
+    table = plateau_table(conditioned, find_plateaus(conditioned['time_s'],
+                                                     conditioned['force']))
+
+    time_s = columns['time_s']
+    results = {'samples': len(time_s),
+               'duration_s': float(time_s[-1] - time_s[0]),
+               'rate_hz': float(sample_rate(time_s)), 'plateaus': len(table),
+               'peak_thrust_N': None, 'peak_power_W': None,
+               'peak_g_per_W': None}
+    if table:
+        # The full-throttle (highest thrust) plateau, as measured_thrust.csv
+        peak = max(table, key=lambda row: row['thrust_N'])
+        results.update(peak_thrust_N=peak['thrust_N'],
+                       peak_power_W=_finite(peak['power_W']),
+                       peak_g_per_W=_finite(peak['g_per_W']))
+    return columns, table, results
+
+
+def _finite(value):
+    # NaN (no power monitor) is stored as NULL
+    return float(value) if np.isfinite(value) else None
+
+
+def encode_column(name, values):
+    dtype = np.float64 if name in FLOAT64_COLUMNS else np.float32
+    values = np.ascontiguousarray(values, dtype=dtype)
+    return values.dtype.str, values.tobytes()
+
+
+def store_run(connection, entry, stat, digest, columns, table, results):
+    # Replaces the run's row, plateaus and samples in one go
+    connection.execute('DELETE FROM runs WHERE file = ?', (entry['file'],))
+    names = ['file', 'size', 'mtime', 'sha256', 'version'] \
+        + SETUP_COLUMNS + RESULT_COLUMNS
+    values = [entry['file'], stat.st_size, stat.st_mtime, digest,
+              SCHEMA_VERSION] + [entry[name] for name in SETUP_COLUMNS] \
+        + [results[name] for name in RESULT_COLUMNS]
+    run_id = connection.execute(
+        f"INSERT INTO runs ({', '.join(names)}) "
+        f"VALUES ({', '.join('?' * len(names))})", values).lastrowid
+
+    connection.executemany(
+        f"INSERT INTO plateaus (run_id, {', '.join(PLATEAU_COLUMNS)}) "
+        f"VALUES (?{', ?' * len(PLATEAU_COLUMNS)})",
+        [[run_id] + [_finite(row[name]) for name in PLATEAU_COLUMNS]
+         for row in table])
+    connection.executemany(
+        'INSERT INTO samples (run_id, name, dtype, data) VALUES (?, ?, ?, ?)',
+        [(run_id, name) + encode_column(name, values)
+         for name, values in columns.items()])
+    return run_id
+
+
+def ingest_runs(entries, path=DATABASE_PATH, workers=None, reingest=False):
+    # Reduces every log that is new or changed since it was stored, across a
+    # process pool, and updates the set-up of the rest. Every good run is
+    # committed as it is stored, so one unreadable log costs only itself;
+    # returns (reduced, unchanged, {file: error})
+    connection = connect(path)
+    stored = {row['file']: row for row in connection.execute(
+        'SELECT file, size, mtime, sha256, version FROM runs')}
+
+    pending = []
+    unchanged = 0
+    failed = {}
+    for entry in entries:
+        try:
+            stat = os.stat(entry['file'])
+        except OSError as error:
+            failed[entry['file']] = f"{type(error).__name__}: {error}"
+            continue
+        row = stored.get(entry['file'])
+        if (not reingest and row is not None
+                and row['version'] == SCHEMA_VERSION
+                and row['size'] == stat.st_size
+                and row['mtime'] == stat.st_mtime):
+            connection.execute(
+                f"UPDATE runs SET {', '.join(f'{name} = ?' for name in SETUP_COLUMNS)} "
+                f"WHERE file = ?",
+                [entry[name] for name in SETUP_COLUMNS] + [entry['file']])
+            unchanged += 1
+        else:
+            pending.append((entry, stat))
+
+    reduced = 0
+    try:
+        connection.commit()
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(reduce_run, entry['file']): (entry, stat)
+                           for entry, stat in pending}
+                for future in as_completed(futures):
+                    entry, stat = futures[future]
+                    try:
+                        columns, table, results = future.result()
+                        store_run(connection, entry, stat,
+                                  file_hash(entry['file']), columns, table,
+                                  results)
+                    except Exception as error:
+                        # One broken log does not stop the rest of the batch
+                        connection.rollback()
+                        failed[entry['file']] = \
+                            f"{type(error).__name__}: {error}"
+                        continue
+                    connection.commit()
+                    reduced += 1
+    finally:
+        connection.close()
+    return reduced, unchanged, failed
+
+
+def _between(column, value, tolerance):
+    # Range rather than equality, so 20 matches a 19.99 in entry and the
+    # column's index is still used
+    return (f'{column} BETWEEN ? AND ?', [value - tolerance, value + tolerance])
+
+
+def query_runs(connection, diameter=None, pitch=None, motor=None,
+               battery=None, airspeed=None, date_from=None, date_to=None,
+               min_thrust=None, max_thrust=None, tolerance=0.05,
+               airspeed_tolerance=0.5):
+    # Stored runs matching every given condition, by date; each row reads
+    # like a dict of the runs columns. Dates are 'YYYY-MM-DD' strings
+    conditions = []
+    parameters = []
+    for column, value, value_tolerance in (
+            ('diameter_in', diameter, tolerance),
+            ('pitch_in', pitch, tolerance),
+            ('airspeed_m_s', airspeed, airspeed_tolerance)):
+        if value is not None:
+            condition, values = _between(column, value, value_tolerance)
+            conditions.append(condition)
+            parameters += values
+    for condition, value in (('motor = ?', motor), ('battery = ?', battery),
+                             ('date >= ?', date_from), ('date <= ?', date_to),
+                             ('peak_thrust_N >= ?', min_thrust),
+                             ('peak_thrust_N <= ?', max_thrust)):
+        if value is not None:
+            conditions.append(condition)
+            parameters.append(value)
+
+    where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+    return connection.execute(f'SELECT * FROM runs{where} ORDER BY date, id',
+                              parameters).fetchall()
+
+
+def run_plateaus(connection, run_id):
+    # A run's plateau table as plateau_table() returns it
+    return [{name: np.nan if value is None else value
+             for name, value in zip(PLATEAU_COLUMNS, row)}
+            for row in connection.execute(
+                f"SELECT {', '.join(PLATEAU_COLUMNS)} FROM plateaus "
+                f"WHERE run_id = ? ORDER BY plateau", (run_id,))]
+
+
+def run_samples(connection, run_id):
+    # A run's sample columns as stored by load_run(): time_s, force and, if
+    # logged, voltage, current and power
+    return {row['name']: np.frombuffer(row['data'], dtype=row['dtype'])
+            for row in connection.execute(
+                'SELECT name, dtype, data FROM samples WHERE run_id = ?',
+                (run_id,))}
+
+
+def load_measured_points(airspeed=0.0, pitch=None, path=DATABASE_PATH,
+                         tolerance=0.5):
+    # (diameters, full-throttle thrust) of the stored runs at the given
+    # airspeed [m/s] (0 = static) and pitch [in], or None when there is no
+    # store or no such runs yet
+    if not os.path.exists(path):
+        return None
+    connection = connect(path)
+    try:
+        runs = [run for run in query_runs(connection, pitch=pitch,
+                                          airspeed=airspeed,
+                                          airspeed_tolerance=tolerance)
+                if run['peak_thrust_N'] is not None
+                and run['diameter_in'] is not None]
+    finally:
+        connection.close()
+    if not runs:
+        return None
+    return (np.array([run['diameter_in'] for run in runs]),
+            np.array([run['peak_thrust_N'] for run in runs]))
+
+
+def _number(value, fmt):
+    # '-' padded to the field width, so the columns stay aligned
+    if value is None:
+        return '-'.rjust(int(fmt.split('.')[0]))
+    return format(value, fmt)
+
+
+def print_runs(runs):
+    print(f"{'id':>4} {'date':10} {'D':>5} {'P':>5} {'V':>5} {'thrust':>8} "
+          f"{'power':>7} {'g/W':>6}  {'motor':16} {'battery':10} file")
+    for run in runs:
+        print(f"{run['id']:4d} {run['date']:10} "
+              f"{_number(run['diameter_in'], '5.1f')} "
+              f"{_number(run['pitch_in'], '5.1f')} "
+              f"{run['airspeed_m_s']:5.1f} "
+              f"{_number(run['peak_thrust_N'], '7.2f')}N "
+              f"{_number(run['peak_power_W'], '6.1f')}W "
+              f"{_number(run['peak_g_per_W'], '6.2f')}  "
+              f"{run['motor'] or '-':16} {run['battery'] or '-':10} "
+              f"{os.path.basename(run['file'])}")
+
+
+''' Main Code '''
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Indexed store of recorded thrust runs")
+    parser.add_argument('--database', default=DATABASE_PATH,
+                        help="SQLite store (default thrust_runs.sqlite)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = commands.add_parser(
+        'ingest', help="add or update runs from a manifest or log files")
+    ingest_parser.add_argument('files', nargs='+',
+                               help="manifest .csv with a File column, or "
+                                    ".csv / .bin run logs")
+    ingest_parser.add_argument('--diameter', type=float,
+                               help="propeller diameter [in] of the logs")
+    ingest_parser.add_argument('--pitch', type=float,
+                               help="propeller pitch [in] of the logs")
+    ingest_parser.add_argument('--motor', help="motor of the logs")
+    ingest_parser.add_argument('--battery', help="battery of the logs")
+    ingest_parser.add_argument('--date', help="test date YYYY-MM-DD "
+                                              "(default: file date)")
+    ingest_parser.add_argument('--airspeed', type=float, default=0.0,
+                               help="wind tunnel airspeed [m/s] (default 0)")
+    ingest_parser.add_argument('--rpm', type=float,
+                               help="full-throttle tachometer reading")
+    ingest_parser.add_argument('--workers', type=int, default=None,
+                               help="worker processes (default: one per CPU)")
+    ingest_parser.add_argument('--reingest', action='store_true',
+                               help="reduce every log again")
+
+    query_parser = commands.add_parser('query', help="list matching runs")
+    query_parser.add_argument('--diameter', type=float)
+    query_parser.add_argument('--pitch', type=float)
+    query_parser.add_argument('--motor')
+    query_parser.add_argument('--battery')
+    query_parser.add_argument('--airspeed', type=float)
+    query_parser.add_argument('--from', dest='date_from',
+                              help="first date YYYY-MM-DD")
+    query_parser.add_argument('--to', dest='date_to',
+                              help="last date YYYY-MM-DD")
+    query_parser.add_argument('--min-thrust', type=float,
+                              help="lowest full-throttle thrust [N]")
+    query_parser.add_argument('--max-thrust', type=float,
+                              help="highest full-throttle thrust [N]")
+
+    show_parser = commands.add_parser('show', help="plateaus of one run")
+    show_parser.add_argument('run_id', type=int)
+    arguments = parser.parse_args()
+
+    if arguments.command == 'ingest':
+        run_entries = []
+        for file_path in arguments.files:
+            # A manifest is a CSV whose header starts with File; a missing
+            # log is reported by ingest_runs() with the other failures
+            is_manifest = False
+            if os.path.exists(file_path):
+                with open(file_path, 'rb') as input_file:
+                    is_manifest = input_file.read(4) == b'File'
+            if is_manifest:
+                run_entries += read_manifest(file_path)
+            else:
+                run_entries.append(run_entry(
+                    file_path, arguments.diameter, arguments.pitch,
+                    arguments.motor, arguments.battery, arguments.date,
+                    arguments.airspeed, arguments.rpm))
+        reduced, unchanged, errors = ingest_runs(
+            run_entries, arguments.database, arguments.workers,
+            arguments.reingest)
+        for log_path, error in sorted(errors.items()):
+            print(f"  {os.path.basename(log_path):30} FAILED {error}")
+        print(f"{len(run_entries)} runs, {reduced} reduced, {unchanged} "
+              f"unchanged, {len(errors)} failed -> {arguments.database}")
+        if errors:
+            raise SystemExit(1)
+
+    elif arguments.command == 'query':
+        database = connect(arguments.database)
+        matches = query_runs(database, arguments.diameter, arguments.pitch,
+                             arguments.motor, arguments.battery,
+                             arguments.airspeed, arguments.date_from,
+                             arguments.date_to, arguments.min_thrust,
+                             arguments.max_thrust)
+        print_runs(matches)
+        print(f"{len(matches)} runs")
+
+    elif arguments.command == 'show':
+        database = connect(arguments.database)
+        matches = database.execute('SELECT * FROM runs WHERE id = ?',
+                                   (arguments.run_id,)).fetchall()
+        if not matches:
+            raise SystemExit(f"no run {arguments.run_id}")
+        print_runs(matches)
+        from Thrust_Signal_Processing import print_table
+        print_table(run_plateaus(database, arguments.run_id))
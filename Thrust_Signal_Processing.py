@@ -0,0 +1,314 @@
+''' Script is called Thrust_Signal_Processing.py '''
+# Filters a recorded run, finds the steady-state plateau at each throttle
+# step and writes a per-plateau thrust / power / g-per-W table, e.g.
+#   python Thrust_Signal_Processing.py thrust_data.csv
+#   python Thrust_Signal_Processing.py run.bin --diameter 20 --pitch 10
+# With --diameter the full-throttle plateau is also added to
+# measured_thrust.csv, which the Static / Dynamic thrust plots read.
+
+import argparse
+import csv
+import os
+import numpy as np
+
+from Thrust_Log_Analysis import (iter_log_chunks, TIMESTAMP_COLUMN,
+                                 FORCE_COLUMN)
+
+''' Constants '''
+GRAVITY = 9.80665               # m/s^2, for grams-force per Watt
+
+MEDIAN_WINDOW = 5               # Samples; removes single-sample spikes
+LOW_PASS_CUTOFF_HZ = 1.0        # Thrust stand mechanical response
+PLATEAU_WINDOW_S = 1.0          # Window the steadiness is judged over
+PLATEAU_MIN_DURATION_S = 1.5
+PLATEAU_TOLERANCE = 0.02        # Std dev allowed, fraction of peak thrust
+PLATEAU_MIN_TOLERANCE_N = 0.05
+IDLE_THRUST_N = 0.5             # Plateaus below this are the motor idling
+
+MEASURED_POINTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    'measured_thrust.csv')
+MEASURED_POINTS_COLUMNS = ['Diameter (in)', 'Pitch (in)', 'Airspeed (m/s)',
+                           'Thrust (N)', 'Power (W)', 'g/W', 'Source']
+
+TABLE_COLUMNS = ['plateau', 'start_s', 'end_s', 'duration_s', 'thrust_N',
+                 'thrust_std_N', 'voltage_V', 'current_A', 'power_W',
+                 'g_per_W']
+
+CSV_COLUMN_NAMES = {'force': FORCE_COLUMN, 'voltage': 'Voltage (V)',
+                    'current': 'Current (A)', 'power': 'Power (W)'}
+
+
+''' Functions '''
+def load_run(path, run_number=0):
+    # Whole run as columns: time_s, force and, if logged, voltage, current
+    # and power. A binary log holds a single run, run 0
+    if path.endswith('.bin'):
+        from Thrust_Binary_Log import iter_binary_log_chunks
+        if run_number != 0:
+            raise ValueError(f"{path} has no run {run_number} "
+                             f"(a binary log holds one run)")
+        blocks = [columns for header, columns in iter_binary_log_chunks(path)]
+        if not blocks:
+            # Header only: the run was aborted before any sample was saved
+            raise ValueError(f"{path} has no samples")
+        names = [name for name in ('time_s', 'force', 'voltage', 'current',
+                                   'power') if name in blocks[0]]
+        return {name: np.concatenate([block[name] for block in blocks])
+                for name in names}
+
+    header = None
+    blocks = []
+    with open(path) as file:
+        for run, columns, rows in iter_log_chunks(file):
+            if run == run_number:
+                header = columns
+                blocks.append(rows)
+            elif run > run_number:
+                break
+    if header is None:
+        raise ValueError(f"{path} has no run {run_number}")
+
+    rows = np.concatenate(blocks)
+    result = {'time_s': rows[:, header.index(TIMESTAMP_COLUMN)]}
+    for name, column in CSV_COLUMN_NAMES.items():
+        if column in header:
+            result[name] = rows[:, header.index(column)]
+    return result
+
+
+def sample_rate(time_s):
+    # Samples per second from the median spacing, robust to a few gaps
+    return 1.0 / np.median(np.diff(time_s))
+
+
+def median_filter(values, window=MEDIAN_WINDOW):
+    # Running median over an odd number of samples; edges repeat the end
+    # values instead of shrinking the window. SciPy is imported here so the
+    # thrust plots can read measured points without it
+    from scipy.ndimage import median_filter as _median_filter
+    return _median_filter(values, size=window, mode='nearest')
+
+
+def low_pass(values, rate_hz, cutoff_hz=LOW_PASS_CUTOFF_HZ, order=2):
+    # Zero-phase Butterworth, so steps are not shifted in time
+    from scipy.signal import butter, sosfiltfilt
+    if cutoff_hz >= rate_hz / 2:
+        return values
+    sos = butter(order, cutoff_hz, fs=rate_hz, output='sos')
+    if len(values) <= 3 * (2 * len(sos) + 1):
+        return values
+    return sosfiltfilt(sos, values)
+
+
+def condition(columns, median_window=MEDIAN_WINDOW,
+              cutoff_hz=LOW_PASS_CUTOFF_HZ):
+    # Median then low-pass filtering of force, voltage and current; power is
+    # recomputed from the filtered voltage and current
+    rate_hz = sample_rate(columns['time_s'])
+    result = {'time_s': columns['time_s']}
+    for name in ('force', 'voltage', 'current'):
+        if name in columns:
+            result[name] = low_pass(median_filter(columns[name], median_window),
+                                    rate_hz, cutoff_hz)
+    if 'voltage' in result and 'current' in result:
+        result['power'] = result['voltage'] * result['current']
+    return result
+
+
+def rolling_std(values, window):
+    # Centred moving standard deviation from cumulative sums: O(n) for any
+    # window length. The ends use the first / last full window
+    window = min(window, len(values))
+    shifted = values - np.mean(values)
+    sums = np.concatenate(([0.0], np.cumsum(shifted)))
+    squares = np.concatenate(([0.0], np.cumsum(shifted * shifted)))
+
+    window_sum = sums[window:] - sums[:-window]
+    window_squares = squares[window:] - squares[:-window]
+    variance = np.maximum(window_squares / window
+                          - (window_sum / window) ** 2, 0.0)
+
+    before = (window - 1) // 2
+    after = len(values) - len(variance) - before
+    return np.pad(np.sqrt(variance), (before, after), mode='edge')
+
+
+def find_plateaus(time_s, force, window_s=PLATEAU_WINDOW_S,
+                  min_duration_s=PLATEAU_MIN_DURATION_S,
+                  tolerance=PLATEAU_TOLERANCE,
+                  min_tolerance=PLATEAU_MIN_TOLERANCE_N,
+                  idle_thrust=IDLE_THRUST_N):
+    # (start, end) index pairs of the steady-state sections of a filtered
+    # force signal, in O(n). A sample is steady when the force varies less
+    # than tolerance x peak thrust over the window around it
+    window = max(3, int(round(window_s * sample_rate(time_s))))
+    limit = max(tolerance * np.max(np.abs(force)), min_tolerance)
+    steady = rolling_std(force, window) < limit
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], steady.astype(np.int8),
+                                                   [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+
+    plateaus = []
+    for start, end in zip(starts, ends):
+        if time_s[end - 1] - time_s[start] < min_duration_s:
+            continue
+        if np.mean(force[start:end]) < idle_thrust:
+            continue
+        plateaus.append((int(start), int(end)))
+    return plateaus
+
+
+def plateau_table(columns, plateaus):
+    # One row per plateau: timing, mean thrust and, for runs with the power
+    # monitor, voltage, current, power and grams-force per Watt
+    rows = []
+    for number, (start, end) in enumerate(plateaus):
+        section = slice(start, end)
+        thrust = columns['force'][section]
+        row = {
+            'plateau': number,
+            'start_s': columns['time_s'][start],
+            'end_s': columns['time_s'][end - 1],
+            'duration_s': columns['time_s'][end - 1] - columns['time_s'][start],
+            'thrust_N': np.mean(thrust),
+            'thrust_std_N': np.std(thrust),
+            'voltage_V': np.nan,
+            'current_A': np.nan,
+            'power_W': np.nan,
+            'g_per_W': np.nan,
+        }
+        if 'power' in columns:
+            row['voltage_V'] = np.mean(columns['voltage'][section])
+            row['current_A'] = np.mean(columns['current'][section])
+            row['power_W'] = np.mean(columns['power'][section])
+            if row['power_W'] > 0:
+                row['g_per_W'] = row['thrust_N'] / GRAVITY * 1000 / row['power_W']
+        rows.append(row)
+    return rows
+
+
+def save_table(rows, path):
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(TABLE_COLUMNS)
+        for row in rows:
+            writer.writerow([row['plateau']] + [f"{row[name]:.6g}"
+                                                for name in TABLE_COLUMNS[1:]])
+
+
+def process_log(path, run_number=0, **plateau_options):
+    # Load, condition and reduce one run; returns (conditioned columns, table)
+    columns = condition(load_run(path, run_number))
+    plateaus = find_plateaus(columns['time_s'], columns['force'],
+                             **plateau_options)
+    return columns, plateau_table(columns, plateaus)
+
+
+def add_measured_point(rows, diameter, pitch, airspeed=0.0, source='',
+                       path=MEASURED_POINTS_PATH):
+    # Appending the full-throttle (highest thrust) plateau of a run to the
+    # measured points the thrust plots read
+    peak = max(rows, key=lambda row: row['thrust_N'])
+    new_file = not os.path.exists(path)
+    with open(path, 'a', newline='') as file:
+        writer = csv.writer(file)
+        if new_file:
+            writer.writerow(MEASURED_POINTS_COLUMNS)
+        writer.writerow([diameter, pitch, airspeed, f"{peak['thrust_N']:.4g}",
+                         f"{peak['power_W']:.4g}", f"{peak['g_per_W']:.4g}",
+                         source])
+    return peak
+
+
+def load_measured_points(airspeed=0.0, path=MEASURED_POINTS_PATH,
+                         tolerance=0.5):
+    # (diameters, thrust) measured at the given airspeed [m/s] (0 = static),
+    # or None when there are no such points yet
+    if not os.path.exists(path):
+        return None
+    diameters = []
+    thrust = []
+    with open(path, newline='') as file:
+        for row in csv.DictReader(file):
+            if abs(float(row['Airspeed (m/s)']) - airspeed) <= tolerance:
+                diameters.append(float(row['Diameter (in)']))
+                thrust.append(float(row['Thrust (N)']))
+    if not diameters:
+        return None
+    return np.array(diameters), np.array(thrust)
+
+
+def plateau_figure(columns, rows, title=''):
+    # Conditioned thrust (and power, when logged) against time with the
+    # plateaus shaded; returns the figure so it can be shown or saved
+    import matplotlib.pyplot as plt
+
+    has_power = 'power' in columns
+    figure, axes = plt.subplots(2 if has_power else 1, 1, sharex=True,
+                                figsize=(8, 6), dpi=300, squeeze=False)
+    force_axis = axes[0, 0]
+    force_axis.plot(columns['time_s'], columns['force'], color='blue')
+    force_axis.set_ylabel('Thrust [Newtons]')
+    if has_power:
+        power_axis = axes[1, 0]
+        power_axis.plot(columns['time_s'], columns['power'], color='tab:red')
+        power_axis.set_ylabel('Power [W]')
+
+    for row in rows:
+        for axis in axes[:, 0]:
+            axis.axvspan(row['start_s'], row['end_s'], color='green',
+                         alpha=0.15)
+        force_axis.annotate(f"{row['thrust_N']:.1f} N",
+                            (row['start_s'], row['thrust_N']),
+                            textcoords='offset points', xytext=(0, 4),
+                            fontsize=8)
+
+    for axis in axes[:, 0]:
+        axis.grid(True)
+    axes[-1, 0].set_xlabel('Time [s]')
+    force_axis.set_title(title or 'Thrust Run')
+    figure.tight_layout()
+    return figure
+
+
+def print_table(rows):
+    print(f"{'#':>3} {'start':>8} {'dur':>6} {'thrust':>8} {'power':>8} "
+          f"{'g/W':>7}")
+    for row in rows:
+        print(f"{row['plateau']:3d} {row['start_s']:7.1f}s "
+              f"{row['duration_s']:5.1f}s {row['thrust_N']:7.2f}N "
+              f"{row['power_W']:7.1f}W {row['g_per_W']:7.2f}")
+
+
+''' Main Code '''
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Filter thrust logs and tabulate steady-state plateaus")
+    parser.add_argument('logs', nargs='+', help=".csv or .bin run logs")
+    parser.add_argument('--run', type=int, default=0,
+                        help="run number within a concatenated CSV log; "
+                             "a .bin log holds only run 0")
+    parser.add_argument('--diameter', type=float,
+                        help="propeller diameter [in]; adds the peak plateau "
+                             "to measured_thrust.csv")
+    parser.add_argument('--pitch', type=float, default=10.0,
+                        help="propeller pitch [in] (default 10)")
+    parser.add_argument('--airspeed', type=float, default=0.0,
+                        help="wind tunnel airspeed [m/s] (default 0, static)")
+    arguments = parser.parse_args()
+
+    for log_path in arguments.logs:
+        conditioned, table = process_log(log_path, arguments.run)
+        table_path = os.path.splitext(log_path)[0] + '_plateaus.csv'
+        save_table(table, table_path)
+
+        print(f"{log_path}: {len(table)} plateaus -> {table_path}")
+        print_table(table)
+
+        if arguments.diameter is not None and table:
+            point = add_measured_point(table, arguments.diameter,
+                                       arguments.pitch, arguments.airspeed,
+                                       os.path.basename(log_path))
+            print(f"Added {point['thrust_N']:.2f} N at "
+                  f"{arguments.diameter:g} in to {MEASURED_POINTS_PATH}")
@@ -0,0 +1,224 @@
+''' Script is called Thrust_Sweep_Runner.py '''
+# Evaluates the dynamic thrust model over diameter x pitch x airspeed x air
+# density for each RPM source, split into blocks across a process pool.
+# Every block is written to the store as soon as it is done, under the hash
+# of its parameters, so an interrupted or repeated sweep only computes the
+# blocks that are missing, e.g.
+#   python Thrust_Sweep_Runner.py sweep_store
+#   python Thrust_Sweep_Runner.py sweep_store --airspeeds 0 25 51 \
+#       --rpm-sources tested tested-10 5000
+#
+# RPM sources: 'tested' interpolates the tachometer readings in
+# measured_rpm.csv over diameter, 'tested-10' / 'tested+5' apply a percent
+# change to them and a plain number is a constant RPM.
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+import numpy as np
+
+from Dynamic_Thrust_Simulation import (dynamic_thrust_calculation,
+                                       _sweep_blocks, sweep_block,
+                                       sweep_block_axes)
+from Thrust_RPM_Model import rpm_model
+
+''' Constants '''
+MODEL_VERSION = 1           # Bump when the model changes, invalidating blocks
+AXIS_NAMES = ('diameter', 'pitch', 'airspeed', 'density')
+MANIFEST_NAME = 'sweep.json'
+BLOCK_DIR = 'blocks'
+
+
+''' Functions '''
+def source_rpms(source, diameters):
+    # RPM for each diameter under the named RPM source
+    if source.startswith('tested'):
+        percent_change = float(source[len('tested'):] or 0)
+        return rpm_model()(diameters) * (1 + (percent_change/100))
+    return np.full(np.shape(diameters), float(source))
+
+
+def source_thrust(source, diameters, pitches, airspeeds, densities):
+    rpms = source_rpms(source, diameters)
+    return dynamic_thrust_calculation(diameters, pitches, rpms, airspeeds,
+                                      densities)
+
+
+def encode_index(index):
+    # Block index as JSON: slices become [start, stop]
+    return [[axis_index.start, axis_index.stop]
+            if isinstance(axis_index, slice) else int(axis_index)
+            for axis_index in index]
+
+
+def decode_index(encoded):
+    return tuple(slice(*axis_index) if isinstance(axis_index, list)
+                 else axis_index for axis_index in encoded)
+
+
+def block_key(source, axes, index):
+    # Hash of everything a block's values depend on, so identical blocks of
+    # different sweeps share one file. New RPM readings change the key too
+    digest = hashlib.sha256(f"v{MODEL_VERSION}:{source}".encode())
+    if source.startswith('tested'):
+        model = rpm_model()
+        digest.update(model.diameters.tobytes() + model.rpms.tobytes())
+    for axis, axis_index in zip(axes, index):
+        if isinstance(axis_index, slice):
+            digest.update(axis[axis_index].tobytes())
+        else:
+            digest.update(axis[axis_index:axis_index + 1].tobytes())
+        digest.update(b'|')
+    return digest.hexdigest()
+
+
+def block_path(store_dir, key):
+    return os.path.join(store_dir, BLOCK_DIR, key + '.npz')
+
+
+def evaluate_block(store_dir, source, axes, index, key):
+    # Worker: one block, stored as columns of its axis values, the RPM at
+    # each diameter and the thrust block
+    thrust = sweep_block(partial(source_thrust, source), axes, index)
+    columns = {name: values.ravel() for name, values
+               in zip(AXIS_NAMES, sweep_block_axes(axes, index))}
+    columns['rpm'] = source_rpms(source, columns['diameter'])
+    columns['thrust'] = thrust
+
+    # Written under a temporary name first, so an interrupted sweep never
+    # leaves a truncated block that would be taken as done
+    path = block_path(store_dir, key)
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        np.savez(file, **columns)
+    os.replace(temporary, path)
+    return key
+
+
+def plan_sweep(axes, sources, chunk_points):
+    # [(source, index, key)] for every block of the sweep
+    grid_shape = tuple(len(axis) for axis in axes)
+    return [(source, index, block_key(source, axes, index))
+            for source in sources
+            for index in _sweep_blocks(grid_shape, chunk_points)]
+
+
+def run_sweep(store_dir, axes, sources, chunk_points=2**20, workers=None,
+              progress=None):
+    # Computes the blocks not yet in the store; returns (computed, reused).
+    # progress(done, total) is called as blocks finish
+    axes = [np.asarray(axis, dtype=float).ravel() for axis in axes]
+    os.makedirs(os.path.join(store_dir, BLOCK_DIR), exist_ok=True)
+
+    blocks = plan_sweep(axes, sources, chunk_points)
+    with open(os.path.join(store_dir, MANIFEST_NAME), 'w') as file:
+        json.dump({'axes': {name: axis.tolist()
+                            for name, axis in zip(AXIS_NAMES, axes)},
+                   'sources': list(sources),
+                   'blocks': [{'source': source, 'index': encode_index(index),
+                               'key': key} for source, index, key in blocks]},
+                  file)
+
+    pending = {}
+    for source, index, key in blocks:
+        if key not in pending and not os.path.exists(block_path(store_dir, key)):
+            pending[key] = (source, index)
+    if not pending:
+        return 0, len(blocks)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(evaluate_block, store_dir, source, axes, index,
+                               key)
+                   for key, (source, index) in pending.items()]
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result()
+                if progress:
+                    progress(done, len(futures))
+        except KeyboardInterrupt:
+            # Finished blocks are already stored; the rest resume next run
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+
+    return len(pending), len(blocks) - len(pending)
+
+
+def load_sweep(store_dir, out=None):
+    # (axes {name: values}, sources, thrust) with thrust shaped
+    # (source, diameter, pitch, airspeed, density). Pass a
+    # np.lib.format.open_memmap() array as out for sweeps larger than RAM
+    with open(os.path.join(store_dir, MANIFEST_NAME)) as file:
+        manifest = json.load(file)
+    axes = {name: np.array(values) for name, values in manifest['axes'].items()}
+    sources = manifest['sources']
+    grid_shape = (len(sources),) + tuple(len(axes[name]) for name in AXIS_NAMES)
+
+    if out is None:
+        out = np.empty(grid_shape)
+    elif out.shape != grid_shape:
+        raise ValueError(f"out has shape {out.shape}, expected {grid_shape}")
+
+    for block in manifest['blocks']:
+        index = decode_index(block['index'])
+        with np.load(block_path(store_dir, block['key'])) as columns:
+            out[(sources.index(block['source']),) + index] = columns['thrust']
+    return axes, sources, out
+
+
+def axis_values(start, stop, count):
+    return np.linspace(start, stop, int(count))
+
+
+''' Main Code '''
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Resumable parallel dynamic thrust parameter sweep")
+    parser.add_argument('store', nargs='?', default='sweep_store',
+                        help="store directory (default sweep_store)")
+    parser.add_argument('--diameters', type=float, nargs=3,
+                        default=(12, 30, 181), metavar=('START', 'STOP', 'N'),
+                        help="propeller diameters [in]")
+    parser.add_argument('--pitches', type=float, nargs=3, default=(6, 14, 81),
+                        metavar=('START', 'STOP', 'N'),
+                        help="propeller pitches [in]")
+    parser.add_argument('--airspeeds', type=float, nargs=3, default=(0, 25, 26),
+                        metavar=('START', 'STOP', 'N'), help="airspeeds [m/s]")
+    parser.add_argument('--densities', type=float, nargs=3,
+                        default=(1.0, 1.225, 10), metavar=('START', 'STOP', 'N'),
+                        help="air densities [kg/m^3]")
+    parser.add_argument('--rpm-sources', nargs='+',
+                        default=['tested', 'tested-10', 'tested-25'],
+                        help="'tested', 'tested<+/-percent>' or a constant RPM")
+    parser.add_argument('--chunk-points', type=int, default=2**18,
+                        help="grid points per block")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    arguments = parser.parse_args()
+
+    sweep_axes = [axis_values(*arguments.diameters),
+                  axis_values(*arguments.pitches),
+                  axis_values(*arguments.airspeeds),
+                  axis_values(*arguments.densities)]
+
+    def report(done, total):
+        if done == total or done % max(1, total // 10) == 0:
+            print(f"  {done}/{total} blocks")
+
+    computed, reused = run_sweep(arguments.store, sweep_axes,
+                                 arguments.rpm_sources, arguments.chunk_points,
+                                 arguments.workers, report)
+    print(f"{computed} blocks computed, {reused} reused from {arguments.store}")
+
+    grid_axes, grid_sources, thrust_grid = load_sweep(arguments.store)
+    print(f"{thrust_grid.size} grid points")
+    for source_number, source in enumerate(grid_sources):
+        source_grid = thrust_grid[source_number]
+        position = np.unravel_index(np.argmax(source_grid), source_grid.shape)
+        diameter, pitch, airspeed, density \
+            = (grid_axes[name][i] for name, i in zip(AXIS_NAMES, position))
+        print(f"  {source:>10}: peak {source_grid[position]:.2f} N at "
+              f"{diameter:.1f} in x {pitch:.1f} in, {airspeed:.1f} m/s, "
+              f"{density:.3f} kg/m^3")
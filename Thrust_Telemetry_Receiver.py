@@ -0,0 +1,254 @@
+''' Script is called Thrust_Telemetry_Receiver.py '''
+
+import os
+import sys
+import stat
+import threading
+import numpy as np
+
+# telemetry.py and binlog.py live with the firmware so both sides share one
+# format definition
+FIRMWARE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'ESP32-MicroPython')
+if FIRMWARE_DIR not in sys.path:
+    sys.path.insert(0, FIRMWARE_DIR)
+
+import binlog
+import telemetry
+from Thrust_Binary_Log import RECORD_DTYPE, decode_records
+
+''' Constants '''
+SERIAL_BAUD = 115200
+READ_SIZE = 4096            # Bytes per read from the serial port or file
+PLOT_SAMPLES = 6000         # Samples kept for the live plot (10 min at 10 SPS)
+PLOT_INTERVAL_S = 0.2       # Live plot refresh period
+PLOT_COLUMNS = ('time_s', 'force', 'power')
+
+
+''' Functions '''
+def open_source(source):
+    # Returns (read function, is_serial). '-' is stdin, an existing regular
+    # file or named pipe is read as a recorded stream, anything else is
+    # opened as a serial port (needs pyserial)
+    if source == '-':
+        stream = sys.stdin.buffer
+        return stream.read1, False
+
+    if os.path.exists(source):
+        mode = os.stat(source).st_mode
+        if stat.S_ISREG(mode) or stat.S_ISFIFO(mode):
+            stream = open(source, 'rb')
+            return stream.read1, False
+
+    try:
+        import serial
+    except ImportError:
+        raise SystemExit("Reading a serial port needs pyserial "
+                         "(pip install pyserial)")
+    port = serial.Serial(source, SERIAL_BAUD, timeout=0.1)
+    return port.read, True
+
+
+class RingBuffer:
+    # Fixed-size store of the newest samples for the live plot, so memory
+    # stays constant however long the run is
+    def __init__(self, capacity, names=PLOT_COLUMNS):
+        self.capacity = capacity
+        self.names = names
+        self.data = np.zeros((len(names), capacity))
+        self.end = 0        # Total samples ever added
+        self.lock = threading.Lock()
+
+    def extend(self, columns):
+        count = len(columns[self.names[0]])
+        with self.lock:
+            # Only the newest capacity samples of a large block matter
+            skip = max(0, count - self.capacity)
+            positions = (self.end + skip + np.arange(count - skip)) % self.capacity
+            for row, name in enumerate(self.names):
+                self.data[row, positions] = columns[name][skip:]
+            self.end += count
+
+    def snapshot(self):
+        # Copy of the stored samples in time order, one array per column
+        with self.lock:
+            count = min(self.end, self.capacity)
+            positions = (self.end - count + np.arange(count)) % self.capacity
+            rows = self.data[:, positions]
+        return dict(zip(self.names, rows))
+
+
+class RunFileWriter:
+    # Appends received records to a binlog file. Until the transmitter's
+    # config frame arrives the header holds placeholder calibration; it is
+    # rewritten in place when the config is received
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.records = 0
+        self.write_header(binlog.pack_header(
+            0, 1.0, 0.0, channels=binlog.CHANNEL_FORCE | binlog.CHANNEL_POWER))
+
+    def write_header(self, header):
+        self.file.seek(0)
+        self.file.write(header[:binlog.HEADER_SIZE])
+        self.file.seek(0, os.SEEK_END)
+        self.file.flush()
+
+    def write_records(self, records):
+        self.file.write(records)
+        self.records += len(records) // binlog.RECORD_SIZE
+
+    def flush(self):
+        # Once per read, so a crash loses at most the last read's frames
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class TelemetryReceiver:
+    # Serial bytes -> frames -> run file and live plot buffer
+    def __init__(self, run_path, ring):
+        self.deframer = telemetry.SerialDeframer()
+        self.decoder = telemetry.TelemetryDecoder()
+        self.writer = RunFileWriter(run_path)
+        self.ring = ring
+
+        self.header = binlog.unpack_header(binlog.pack_header(
+            0, 1.0, 0.0, channels=binlog.CHANNEL_FORCE | binlog.CHANNEL_POWER))
+        self.previous_us = None
+        self.start_us = None
+
+        # Held while a read is processed, so close() never lands in the
+        # middle of one and nothing is written after it
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def process(self, data):
+        with self.lock:
+            if not self.closed:
+                self._process(data)
+
+    def _process(self, data):
+        for frame in self.deframer.feed(data):
+            try:
+                frame_type, sequence, timestamp_us, payload \
+                    = self.decoder.decode(frame, raw=True)
+            except ValueError:
+                continue
+
+            if frame_type == telemetry.FRAME_SAMPLES:
+                self.add_samples(payload)
+            elif frame_type == telemetry.FRAME_CONFIG:
+                self.header = payload
+                self.writer.write_header(frame[telemetry.HEADER_SIZE:])
+            else:
+                print(f"[{timestamp_us / 1e6:10.3f} s] {payload}")
+
+        self.writer.flush()
+
+    def add_samples(self, records):
+        # Records are already in binlog layout: stored as received, decoded
+        # only for the plot
+        if not len(records):
+            return
+        self.writer.write_records(records)
+
+        columns = decode_records(self.header,
+                                 np.frombuffer(records, dtype=RECORD_DTYPE),
+                                 self.previous_us, self.start_us)
+        self.previous_us = int(columns['timestamp_us'][-1])
+        if self.start_us is None:
+            self.start_us = int(columns['timestamp_us'][0])
+        self.ring.extend(columns)
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.writer.close()
+
+
+def receive(read, is_serial, receiver, stop):
+    # Reader thread: runs until the stream ends or stop is set
+    while not stop.is_set():
+        data = read(READ_SIZE)
+        if not data:
+            if is_serial:
+                continue    # Read timeout, nothing sent yet
+            break
+        receiver.process(data)
+
+
+def live_plot(ring, reader_thread):
+    # Thrust and power against time, redrawn from the ring buffer while the
+    # stream runs. The window stays open after the stream ends (a recorded
+    # file is read in moments) until the user closes it
+    import matplotlib.pyplot as plt
+
+    figure, (force_axis, power_axis) = plt.subplots(2, 1, sharex=True)
+    force_line, = force_axis.plot([], [])
+    power_line, = power_axis.plot([], [], color='tab:red')
+    force_axis.set_ylabel('Thrust (N)')
+    power_axis.set_ylabel('Power (W)')
+    power_axis.set_xlabel('Time (s)')
+    force_axis.grid(True)
+    power_axis.grid(True)
+
+    drawn_end = None
+    while plt.fignum_exists(figure.number):
+        streaming = reader_thread.is_alive()
+        if ring.end != drawn_end:
+            drawn_end = ring.end
+            columns = ring.snapshot()
+            force_line.set_data(columns['time_s'], columns['force'])
+            power_line.set_data(columns['time_s'], columns['power'])
+            for axis in (force_axis, power_axis):
+                axis.relim()
+                axis.autoscale_view()
+        if not streaming:
+            # Last samples drawn: hand the window to the user
+            force_axis.set_title('Stream ended')
+            plt.show()
+            break
+        plt.pause(PLOT_INTERVAL_S)
+
+
+''' Main Code '''
+if __name__ == '__main__':
+    arguments = [arg for arg in sys.argv[1:] if arg != '--no-plot']
+    if len(arguments) != 2:
+        print("Usage: python Thrust_Telemetry_Receiver.py "
+              "<serial port | file | -> <run.bin> [--no-plot]")
+        sys.exit(1)
+
+    read, is_serial = open_source(arguments[0])
+    ring = RingBuffer(PLOT_SAMPLES)
+    receiver = TelemetryReceiver(arguments[1], ring)
+
+    stop = threading.Event()
+    reader_thread = threading.Thread(target=receive,
+                                     args=(read, is_serial, receiver, stop),
+                                     daemon=True)
+    reader_thread.start()
+
+    try:
+        if '--no-plot' in sys.argv:
+            while reader_thread.is_alive():
+                reader_thread.join(0.5)
+        else:
+            live_plot(ring, reader_thread)
+    except KeyboardInterrupt:
+        pass
+
+    # Serial reads time out and file reads return, so the reader stops
+    # within one read. A read blocked on stdin or a pipe is left to the
+    # daemon thread; close() takes the receiver lock, so it can never
+    # write after the run file is closed
+    stop.set()
+    reader_thread.join(1.0)
+    receiver.close()
+
+    print(f"{receiver.writer.records} samples saved to {arguments[1]}")
+    print(f"Frames received: {receiver.decoder.frames}, "
+          f"lost: {receiver.decoder.lost_frames}, "
+          f"bytes skipped: {receiver.deframer.skipped_bytes}")
@@ -0,0 +1,89 @@
+# emulator (Emulator Package)
+# Runs the ESP32-MicroPython drivers and scripts unmodified under CPython.
+# install() puts the fake machine / network / espnow / micropython / utime /
+# uos modules ahead of everything else on sys.path and wires them to a Bench
+# of fake sensors replaying a signal profile on a virtual clock.
+
+import builtins
+import gc
+import os
+import sys
+import threading
+import time
+
+from emulator import clock
+
+RELEASE = '1.23.0'
+
+MODULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'modules')
+FIRMWARE_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'ESP32-MicroPython')
+
+# Typical free heap of an ESP32 (no PSRAM) running MicroPython
+HEAP_BYTES = 111168
+
+bench = None
+
+# False skips the emulated I2C transfer time, leaving only driver cost
+bus_timing = True
+
+# Held while any emulated callback runs (timers, Pin.irq, schedule), so
+# callbacks never interleave with each other, as on the device
+callback_lock = threading.RLock()
+
+
+def _mem_alloc():
+    # Python heap in use, if tracemalloc is tracing; the device figure is
+    # not meaningful on the host otherwise
+    import tracemalloc
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    return 0
+
+
+def install(new_bench, speed=1.0, ticks_start_us=0):
+    # Making the emulated modules importable and starting the virtual clock
+    global bench
+    bench = new_bench
+    clock.configure(speed, ticks_start_us)
+
+    for path in (FIRMWARE_DIR, MODULES_DIR):
+        if path in sys.path:
+            sys.path.remove(path)
+        sys.path.insert(0, path)
+
+    # u-prefixed aliases of the CPython modules MicroPython also provides
+    for name in ('struct', 'json', 'binascii', 'array', 'errno', 'select',
+                 'io', 'collections', 'random', 'hashlib'):
+        sys.modules.setdefault('u' + name, __import__(name))
+
+    # MicroPython additions to built-in modules; the CPython originals stay
+    for name in ('ticks_us', 'ticks_ms', 'ticks_cpu', 'ticks_add',
+                 'ticks_diff', 'sleep_ms', 'sleep_us'):
+        setattr(time, name, getattr(clock, name))
+    gc.mem_alloc = _mem_alloc
+    gc.mem_free = lambda: max(0, HEAP_BYTES - _mem_alloc())
+    gc.threshold = lambda amount=None: -1
+
+    # const() is a builtin under MicroPython; scripts use it unimported
+    builtins.const = lambda value: value
+
+
+def report():
+    # Host-side timing of every emulated timer and the radio, for profiling
+    lines = []
+    for timer in bench.timers:
+        if timer.callbacks:
+            mean_us = timer.callback_ns / timer.callbacks / 1000
+            lines.append('Timer(%s): %d callbacks, mean %.1f us, max %.1f us, '
+                         '%d ticks missed'
+                         % (timer.id, timer.callbacks, mean_us,
+                            timer.max_callback_ns / 1000, timer.missed))
+    for radio in bench.radios:
+        if radio.sent:
+            lines.append('ESP-NOW: %d sent, %d lost' % (radio.sent, radio.lost))
+    hx711 = bench.hx711
+    lines.append('HX711: %d conversions read, %d missed'
+                 % (hx711.conversions_read, hx711.conversions_missed))
+    return lines
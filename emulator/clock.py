@@ -0,0 +1,75 @@
+# clock.py (Emulator Library File)
+# Virtual device clock shared by the emulated utime/time functions, timers
+# and sensors. Virtual time runs at speed x real time, so a run can be
+# replayed in real time (speed=1) or accelerated.
+
+import time
+
+TICKS_PERIOD = 1 << 30      # MicroPython ticks_us()/ticks_ms() wrap here
+TICKS_MASK = TICKS_PERIOD - 1
+TICKS_HALF = TICKS_PERIOD // 2
+
+speed = 1.0
+_start_ns = time.perf_counter_ns()
+_offset_us = 0
+
+
+def configure(new_speed=1.0, ticks_start_us=0):
+    # ticks_start_us starts the counter at an arbitrary value, e.g. just
+    # before the 2**30 wrap to reproduce wrap-around bugs
+    global speed, _start_ns, _offset_us
+    speed = float(new_speed)
+    _start_ns = time.perf_counter_ns()
+    _offset_us = ticks_start_us
+
+
+def now_us():
+    # Unwrapped virtual microseconds since configure()
+    return int((time.perf_counter_ns() - _start_ns) * speed) // 1000 + _offset_us
+
+
+def now_s():
+    return now_us() / 1e6
+
+
+def real_seconds(virtual_us):
+    # Real time the host needs to wait for virtual_us to pass
+    return virtual_us / 1e6 / speed
+
+
+def sleep_us(virtual_us):
+    if virtual_us > 0:
+        time.sleep(real_seconds(virtual_us))
+
+
+def busy_wait_us(virtual_us):
+    # Spinning instead of sleeping for short bus transfers, which the OS
+    # sleep cannot resolve
+    end_ns = time.perf_counter_ns() + int(virtual_us * 1000 / speed)
+    while time.perf_counter_ns() < end_ns:
+        pass
+
+
+''' MicroPython utime functions '''
+def ticks_us():
+    return now_us() & TICKS_MASK
+
+
+def ticks_ms():
+    return (now_us() // 1000) & TICKS_MASK
+
+
+def ticks_cpu():
+    return ticks_us()
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & TICKS_MASK
+
+
+def ticks_diff(ticks1, ticks2):
+    return ((ticks1 - ticks2 + TICKS_HALF) & TICKS_MASK) - TICKS_HALF
+
+
+def sleep_ms(ms):
+    sleep_us(ms * 1000)
@@ -0,0 +1,247 @@
+# devices.py (Emulator Library File)
+# Emulated sensors wired to the fake machine.Pin / machine.I2C. Each device
+# turns the bench signal profile into the raw values the real chip would
+# return, so the unmodified firmware drivers do the conversion.
+
+import threading
+import emulator
+from emulator import clock
+
+
+class FakeHX711:
+    """
+    HX711 behind two pins. DOUT goes low when a conversion is ready (every
+    1 / rate_sps seconds); each PD_SCK rising edge shifts out the next bit,
+    MSB first; the pulses after the 24th select the channel. The read is
+    over when the driver next polls DOUT or the next conversion completes.
+    Counts are (thrust - offset) / factor, the inverse of the firmware
+    calibration. Pins with an IRQ on DOUT get a falling edge whenever a
+    conversion completes after the previous one was read; an unread
+    conversion keeps DOUT low, so it gives no edge.
+    """
+    DATA_BITS = 24
+
+    def __init__(self, profile, d_out=27, pd_sck=12, rate_sps=10,
+                 calibration_factor=0.000458, calibration_offset=-6):
+        self.profile = profile
+        self.d_out = d_out
+        self.pd_sck = pd_sck
+        self.rate_sps = rate_sps
+        self.calibration_factor = calibration_factor
+        self.calibration_offset = calibration_offset
+
+        self.sck_level = 0
+        self.pulses = 0             # PD_SCK rising edges in this read
+        self.value = 0
+        self.channel_pulses = 0     # 1: A/128, 2: B/32, 3: A/64
+        self.read_conversion = -1   # Index of the last conversion read
+        self.conversions_read = 0
+        self.conversions_missed = 0 # Overwritten before they were read
+
+        self.irq_pins = []
+        self._ticker = None
+
+    def _latest_conversion(self):
+        return clock.now_us() * self.rate_sps // 1000000
+
+    def _count(self, t):
+        count = round((self.profile.thrust(t) - self.calibration_offset)
+                      / self.calibration_factor)
+        count = max(-0x800000, min(0x7FFFFF, count))
+        return count & 0xFFFFFF
+
+    def read_pin(self, pin_id):
+        if pin_id != self.d_out:
+            return 0
+        if 0 < self.pulses <= self.DATA_BITS:
+            return (self.value >> (self.DATA_BITS - self.pulses)) & 1
+        if self.pulses:
+            # Polled again after the channel-select pulses: read finished
+            self._finish_read()
+        # Not shifting: low while an unread conversion is waiting
+        return 0 if self._latest_conversion() > self.read_conversion else 1
+
+    def _finish_read(self):
+        self.channel_pulses = self.pulses - self.DATA_BITS
+        self.pulses = 0
+
+    def watch_pin(self, pin, enabled):
+        # machine.Pin.irq() on DOUT; edges come from a conversion ticker
+        if pin in self.irq_pins:
+            self.irq_pins.remove(pin)
+        if enabled and pin.id == self.d_out:
+            self.irq_pins.append(pin)
+        if self.irq_pins and self._ticker is None:
+            self._ticker = threading.Thread(target=self._run_ticker,
+                                            daemon=True)
+            self._ticker.start()
+
+    def _run_ticker(self):
+        conversion = self._latest_conversion()
+        while self.irq_pins:
+            conversion += 1
+            clock.sleep_us(conversion * 1000000 / self.rate_sps
+                           - clock.now_us())
+            with emulator.callback_lock:
+                if self.pulses > self.DATA_BITS:
+                    self._finish_read()
+                # DOUT was high (previous conversion read): it falls now
+                falling = self.pulses == 0 \
+                    and self.read_conversion == conversion - 1
+                for pin in list(self.irq_pins) if falling else ():
+                    pin._edge(False)
+        self._ticker = None
+
+    def write_pin(self, pin_id, level):
+        if pin_id != self.pd_sck:
+            return
+        rising = level and not self.sck_level
+        self.sck_level = level
+        if not rising:
+            return
+
+        if self.pulses == 0:
+            # First edge latches the newest conversion
+            latest = self._latest_conversion()
+            if latest <= self.read_conversion:
+                # Clocked while DOUT was high: re-reads stale data
+                latest = self.read_conversion
+            elif self.read_conversion >= 0:
+                self.conversions_missed += latest - self.read_conversion - 1
+            self.read_conversion = latest
+            self.conversions_read += 1
+            self.value = self._count(latest / self.rate_sps)
+        self.pulses += 1
+
+
+class FakeINA228:
+    """
+    INA228 register file. Bus voltage, current, power, shunt voltage and the
+    energy / charge accumulators are computed from the profile using the
+    SHUNT_CAL value the driver programmed, like the real chip.
+    """
+    CONFIG = 0x00
+    ADC_CONFIG = 0x01
+    SHUNT_CAL = 0x02
+    SHUNT_VOLTAGE = 0x04
+    BUS_VOLTAGE = 0x05
+    DIE_TEMP = 0x06
+    CURRENT = 0x07
+    POWER = 0x08
+    ENERGY = 0x09
+    CHARGE = 0x0A
+    MANUFACTURER_ID = 0x3E
+    DEVICE_ID = 0x3F
+
+    REGISTER_BYTES = {SHUNT_VOLTAGE: 3, BUS_VOLTAGE: 3, CURRENT: 3, POWER: 3,
+                      ENERGY: 5, CHARGE: 5}
+
+    def __init__(self, profile, address=0x45, shunt_resistance=0.0002,
+                 die_temperature=25.0):
+        self.profile = profile
+        self.address = address
+        self.shunt_resistance = shunt_resistance
+        self.die_temperature = die_temperature
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.registers = {self.CONFIG: 0, self.ADC_CONFIG: 0xFB68,
+                          self.SHUNT_CAL: 0x1000, self.MANUFACTURER_ID: 0x5449,
+                          self.DEVICE_ID: 0x2281}
+        self.reset_accumulators()
+
+    def reset_accumulators(self):
+        self.energy = 0.0       # Joules
+        self.charge = 0.0       # Coulombs
+        self.last_update_us = clock.now_us()
+
+    @property
+    def current_lsb(self):
+        shunt_cal = self.registers[self.SHUNT_CAL]
+        if self.registers[self.CONFIG] & 0x0010:
+            shunt_cal = shunt_cal / 4
+        return shunt_cal / (13107.2e6 * self.shunt_resistance)
+
+    def _accumulate(self):
+        # Integrating power and current up to now
+        now = clock.now_us()
+        voltage, current = self.profile.electrical(now / 1e6)
+        dt = (now - self.last_update_us) / 1e6
+        self.energy += voltage * current * dt
+        self.charge += current * dt
+        self.last_update_us = now
+        return voltage, current
+
+    @staticmethod
+    def _clip(value, bits, signed):
+        low, high = ((-(1 << (bits - 1)), (1 << (bits - 1)) - 1) if signed
+                     else (0, (1 << bits) - 1))
+        return max(low, min(high, int(round(value)))) & ((1 << bits) - 1)
+
+    def read_register(self, register):
+        # (value, width in bytes)
+        with self.lock:
+            if register not in self.REGISTER_BYTES:
+                value = self.registers.get(register, 0)
+                if register == self.DIE_TEMP:
+                    value = self._clip(self.die_temperature / 7.8125e-3, 16, True)
+                return value, 2
+
+            voltage, current = self._accumulate()
+            current_lsb = self.current_lsb
+            power_lsb = 3.2 * current_lsb
+            if register == self.BUS_VOLTAGE:
+                value = self._clip(voltage / 195.3125e-6, 20, False) << 4
+            elif register == self.CURRENT:
+                value = self._clip(current / current_lsb, 20, True) << 4
+            elif register == self.SHUNT_VOLTAGE:
+                shunt_lsb = 78.125e-9 if self.registers[self.CONFIG] & 0x0010 \
+                    else 312.5e-9
+                value = self._clip(current * self.shunt_resistance / shunt_lsb,
+                                   20, True) << 4
+            elif register == self.POWER:
+                value = self._clip(voltage * current / power_lsb, 24, False)
+            elif register == self.ENERGY:
+                value = self._clip(self.energy / (16 * power_lsb), 40, False)
+            else:
+                value = self._clip(self.charge / current_lsb, 40, True)
+            return value, self.REGISTER_BYTES[register]
+
+    def write_register(self, register, value):
+        with self.lock:
+            if register == self.CONFIG:
+                if value & 0x8000:
+                    self.reset()
+                    return
+                if value & 0x4000:
+                    self.reset_accumulators()
+                value &= ~0xC000
+            self.registers[register] = value
+
+
+class Bench:
+    """
+    The test stand the firmware sees: which fake device sits on which pin
+    and I2C address, the signal profile they replay and the emulated radio.
+    """
+    def __init__(self, profile, hx711_rate_sps=10, espnow_loss=0.0,
+                 air_port=47110, mac=b'\x24\x0a\xc4\x00\x00\x01'):
+        self.profile = profile
+        self.hx711 = FakeHX711(profile, rate_sps=hx711_rate_sps)
+        self.ina228 = FakeINA228(profile)
+        self.espnow_loss = espnow_loss
+        self.air_port = air_port
+        self.mac = mac
+        self.timers = []
+        self.radios = []
+
+    def pin_device(self, pin_id):
+        if pin_id in (self.hx711.d_out, self.hx711.pd_sck):
+            return self.hx711
+        return None
+
+    def i2c_device(self, address):
+        if address == self.ina228.address:
+            return self.ina228
+        return None
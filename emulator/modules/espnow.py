@@ -0,0 +1,101 @@
+# espnow.py (Emulated MicroPython Module)
+# ESP-NOW over UDP on localhost. A transmitter and a receiver script run in
+# two emulator processes on the same port; each datagram is the sender's
+# MAC followed by the message. bench.espnow_loss drops that fraction of
+# sends (send() then returns False, as for an unacknowledged frame).
+
+import random
+import socket
+
+import emulator
+from emulator import clock
+
+MAX_DATA_LEN = 250
+ADDR_LEN = 6
+
+
+class ESPNow:
+    def __init__(self):
+        self._active = False
+        self.peers = []
+        self._socket = None
+        self._random = random.Random(0)
+
+        self.sent = 0
+        self.lost = 0
+        emulator.bench.radios.append(self)
+
+    def active(self, flag=None):
+        if flag is not None:
+            self._active = bool(flag)
+            if not self._active and self._socket is not None:
+                self._socket.close()
+                self._socket = None
+        return self._active
+
+    def config(self, **kwargs):
+        return None
+
+    def add_peer(self, mac, *args, **kwargs):
+        if mac in self.peers:
+            raise OSError(-12395, 'ESP_ERR_ESPNOW_EXIST')
+        self.peers.append(mac)
+
+    def del_peer(self, mac):
+        self.peers.remove(mac)
+
+    def get_peers(self):
+        return tuple(self.peers)
+
+    def send(self, mac, msg=None, sync=True):
+        if msg is None:
+            mac, msg = None, mac
+        if not self._active:
+            raise OSError(-12396, 'ESP_ERR_ESPNOW_NOT_INIT')
+        if mac is not None and mac not in self.peers:
+            raise OSError(-12393, 'ESP_ERR_ESPNOW_NOT_FOUND')
+        if isinstance(msg, str):
+            msg = msg.encode()
+        if len(msg) > MAX_DATA_LEN:
+            raise ValueError('msg too long')
+
+        bench = emulator.bench
+        self.sent += 1
+        if self._random.random() < bench.espnow_loss:
+            self.lost += 1
+            return False
+
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sender.sendto(bench.mac + bytes(msg), ('127.0.0.1', bench.air_port))
+        finally:
+            sender.close()
+        return True
+
+    def _receiver(self):
+        if self._socket is None:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.bind(('127.0.0.1', emulator.bench.air_port))
+        return self._socket
+
+    def recv(self, timeout_ms=300000):
+        # (mac, msg), or (None, None) on timeout
+        receiver = self._receiver()
+        receiver.settimeout(None if timeout_ms < 0
+                            else clock.real_seconds(timeout_ms * 1000))
+        try:
+            packet = receiver.recv(ADDR_LEN + MAX_DATA_LEN)
+        except socket.timeout:
+            return None, None
+        return packet[:ADDR_LEN], packet[ADDR_LEN:]
+
+    irecv = recv
+
+    def any(self):
+        receiver = self._receiver()
+        receiver.settimeout(0)
+        try:
+            receiver.recv(1, socket.MSG_PEEK)
+            return True
+        except (socket.timeout, BlockingIOError):
+            return False
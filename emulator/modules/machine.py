@@ -0,0 +1,252 @@
+# machine.py (Emulated MicroPython Module)
+# Pin, I2C, Timer and ADC backed by the fake devices on emulator.bench.
+
+import threading
+import time as _time
+
+import emulator
+from emulator import clock
+
+
+def _bench():
+    if emulator.bench is None:
+        raise RuntimeError('emulator.install() has not been called')
+    return emulator.bench
+
+
+class Pin:
+    IN = 1
+    OUT = 3
+    OPEN_DRAIN = 7
+    PULL_UP = 2
+    PULL_DOWN = 1
+    IRQ_FALLING = 2
+    IRQ_RISING = 1
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        self.level = 0
+        self.handler = None
+        self.trigger = 0
+        self.device = _bench().pin_device(id)
+        if value is not None:
+            self.value(value)
+
+    def __repr__(self):
+        return 'Pin(%d)' % self.id
+
+    def value(self, level=None):
+        if level is None:
+            if self.device is not None and self.mode != self.OUT:
+                return self.device.read_pin(self.id)
+            return self.level
+
+        level = 1 if level else 0
+        self.level = level
+        if self.device is not None:
+            self.device.write_pin(self.id, level)
+
+    __call__ = value
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def init(self, mode=-1, pull=-1, value=None):
+        if mode != -1:
+            self.mode = mode
+        if value is not None:
+            self.value(value)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        # Devices call _edge() when they change the level of an input pin
+        self.handler = handler
+        self.trigger = trigger
+        if self.device is not None:
+            self.device.watch_pin(self, handler is not None)
+
+    def _edge(self, rising):
+        handler = self.handler
+        if handler is None:
+            return
+        if self.trigger & (self.IRQ_RISING if rising else self.IRQ_FALLING):
+            with emulator.callback_lock:
+                handler(self)
+
+
+class I2C:
+    """
+    I2C bus to the bench devices. Each transfer busy-waits for the time
+    the real bus would take (9 clocks per byte plus start/stop), so callback
+    cost measurements include it.
+    """
+    def __init__(self, id=0, scl=None, sda=None, freq=400000, timeout=50000):
+        self.id = id
+        self.freq = freq
+        self.transfers = 0
+
+    def _device(self, addr):
+        device = _bench().i2c_device(addr)
+        if device is None:
+            raise OSError(19)       # ENODEV, as MicroPython reports a NACK
+        return device
+
+    def _transfer(self, nbytes):
+        self.transfers += 1
+        if emulator.bus_timing:
+            clock.busy_wait_us((nbytes * 9 + 2) * 1e6 / self.freq)
+
+    def scan(self):
+        ina228 = _bench().ina228
+        return [ina228.address] if ina228 is not None else []
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        value, width = self._device(addr).read_register(memaddr)
+        self._transfer(2 + 1 + len(buf))
+        data = value.to_bytes(width, 'big')
+        # No register auto-increment, as on the INA228: bytes past the
+        # addressed register's width are filler, never the next register
+        for i in range(len(buf)):
+            buf[i] = data[i] if i < width else 0
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+        buf = bytearray(nbytes)
+        self.readfrom_mem_into(addr, memaddr, buf, addrsize)
+        return bytes(buf)
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        device = self._device(addr)
+        self._transfer(2 + len(buf))
+        device.write_register(memaddr, int.from_bytes(bytes(buf), 'big'))
+
+
+class SoftI2C(I2C):
+    pass
+
+
+class Timer:
+    """
+    Periodic / one-shot timer run by a host thread. Callbacks are serialised
+    with every other emulated callback, like MicroPython soft timers, and
+    their host CPU time is recorded for profiling. Ticks that come due while
+    a callback is still running are skipped and counted as missed.
+    """
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self.id = id
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.callbacks = 0
+        self.callback_ns = 0        # Total host time spent in the callback
+        self.max_callback_ns = 0
+        self.missed = 0
+
+        _bench().timers.append(self)
+        if kwargs:
+            self.init(**kwargs)
+
+    def __repr__(self):
+        return 'Timer(%s)' % self.id
+
+    def init(self, mode=PERIODIC, period=-1, freq=-1, callback=None):
+        self.deinit()
+        period_us = 1e6 / freq if freq > 0 else period * 1000
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(mode, period_us, callback, self._stop),
+            daemon=True)
+        self._thread.start()
+
+    def deinit(self):
+        # Safe to call from the timer's own callback
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    def _run(self, mode, period_us, callback, stop):
+        due_us = clock.now_us() + period_us
+        while not stop.is_set():
+            wait_us = due_us - clock.now_us()
+            if wait_us > 0:
+                stop.wait(clock.real_seconds(wait_us))
+                continue
+
+            if callback is not None:
+                with emulator.callback_lock:
+                    if stop.is_set():
+                        break
+                    start_ns = _time.perf_counter_ns()
+                    callback(self)
+                    elapsed_ns = _time.perf_counter_ns() - start_ns
+                self.callbacks += 1
+                self.callback_ns += elapsed_ns
+                self.max_callback_ns = max(self.max_callback_ns, elapsed_ns)
+
+            if mode == self.ONE_SHOT:
+                break
+
+            due_us += period_us
+            behind = int((clock.now_us() - due_us) // period_us)
+            if behind > 0:
+                self.missed += behind
+                due_us += behind * period_us
+
+
+class ADC:
+    ATTN_0DB = 0
+    ATTN_2_5DB = 1
+    ATTN_6DB = 2
+    ATTN_11DB = 3
+    WIDTH_12BIT = 3
+
+    def __init__(self, pin, atten=ATTN_0DB):
+        self.pin = pin
+
+    def atten(self, attenuation):
+        pass
+
+    def width(self, bits):
+        pass
+
+    def read(self):
+        return 0
+
+    def read_u16(self):
+        return 0
+
+    def read_uv(self):
+        return 0
+
+
+def freq(hz=None):
+    return 240000000
+
+
+def unique_id():
+    return _bench().mac
+
+
+def reset():
+    raise SystemExit('machine.reset()')
+
+
+def idle():
+    _time.sleep(0)
+
+
+def disable_irq():
+    # Blocks the emulated callbacks until enable_irq()
+    emulator.callback_lock.acquire()
+    return 1
+
+
+def enable_irq(state=1):
+    emulator.callback_lock.release()
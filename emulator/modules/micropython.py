@@ -0,0 +1,45 @@
+# micropython.py (Emulated MicroPython Module)
+# Code emitters become no-ops: decorated functions run as plain Python.
+
+import emulator
+
+
+def const(value):
+    return value
+
+
+def native(function):
+    return function
+
+
+def viper(function):
+    return function
+
+
+def schedule(function, arg):
+    # Run as a soft callback, serialised with the timers
+    with emulator.callback_lock:
+        function(arg)
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def heap_lock():
+    return 0
+
+
+def heap_unlock():
+    return 0
+
+
+def mem_info(verbose=False):
+    import gc
+    print('stack: 0 out of 15360')
+    print('GC: total: %d, used: %d, free: %d'
+          % (gc.mem_alloc() + gc.mem_free(), gc.mem_alloc(), gc.mem_free()))
+
+
+def opt_level(level=None):
+    return 0
@@ -0,0 +1,38 @@
+# network.py (Emulated MicroPython Module)
+# Just enough of WLAN for ESP-NOW: the interface only needs to be active.
+
+import emulator
+
+
+class WLAN:
+    IF_STA = 0
+    IF_AP = 1
+
+    PM_NONE = 0
+    PM_PERFORMANCE = 1
+    PM_POWERSAVE = 2
+
+    def __init__(self, interface=IF_STA):
+        self.interface = interface
+        self._active = False
+
+    def active(self, is_active=None):
+        if is_active is None:
+            return self._active
+        self._active = bool(is_active)
+        return self._active
+
+    def config(self, *args, **kwargs):
+        if args == ('mac',):
+            return emulator.bench.mac
+        return None
+
+    def disconnect(self):
+        pass
+
+    def isconnected(self):
+        return False
+
+
+STA_IF = WLAN.IF_STA
+AP_IF = WLAN.IF_AP
@@ -0,0 +1,33 @@
+# uos.py (Emulated MicroPython Module)
+# File system calls go to the emulated flash directory (the working
+# directory the emulator runs the script in).
+
+from os import (listdir, remove, rename, mkdir, rmdir, getcwd, chdir, stat,
+                statvfs, sep)
+from collections import namedtuple
+
+import emulator
+
+_uname_result = namedtuple('uname_result',
+                           ('sysname', 'nodename', 'release', 'version',
+                            'machine'))
+
+
+def uname():
+    # Deliberately not ending in 'ESP32', so drivers keep off the direct
+    # register paths that only exist on real hardware
+    return _uname_result('esp32', 'esp32', emulator.RELEASE,
+                         'v%s (CPython emulator)' % emulator.RELEASE,
+                         'ESP32 module (CPython emulator)')
+
+
+def urandom(n):
+    import os
+    return os.urandom(n)
+
+
+def ilistdir(path='.'):
+    import os
+    for entry in os.scandir(path):
+        yield (entry.name, 0x4000 if entry.is_dir() else 0x8000, 0,
+               entry.stat().st_size)
@@ -0,0 +1,28 @@
+# utime.py (Emulated MicroPython Module)
+# MicroPython time functions on the virtual clock. The emulator also adds
+# these functions to the CPython time module for scripts that import time.
+
+import time as _time
+from emulator.clock import (ticks_us, ticks_ms, ticks_cpu, ticks_add,
+                            ticks_diff, sleep_ms, sleep_us, now_s)
+
+EPOCH_OFFSET = 946684800     # MicroPython's epoch is 2000-01-01
+
+
+def sleep(seconds):
+    sleep_us(seconds * 1e6)
+
+
+def time():
+    return int(_time.time()) - EPOCH_OFFSET
+
+
+def time_ns():
+    return _time.time_ns() - EPOCH_OFFSET * 1000000000
+
+
+def localtime(secs=None):
+    return _time.localtime(None if secs is None else secs + EPOCH_OFFSET)[:8]
+
+
+gmtime = localtime
@@ -0,0 +1,100 @@
+# signals.py (Emulator Library File)
+# Sensor signals replayed by the emulated HX711 and INA228. A profile maps
+# virtual time [s] to (thrust [N], bus voltage [V], current [A]).
+
+import os
+import random
+import sys
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+class Profile:
+    """
+    Piecewise-linear (thrust, voltage, current) signal over time with
+    optional Gaussian noise. After the last point the final values are held.
+    """
+    def __init__(self, time_s, force, voltage, current, force_noise=0.0,
+                 voltage_noise=0.0, current_noise=0.0, seed=None):
+        self.time_s = np.asarray(time_s, dtype=float)
+        self.force = np.asarray(force, dtype=float)
+        self.voltage = np.asarray(voltage, dtype=float)
+        self.current = np.asarray(current, dtype=float)
+        self.noise = (force_noise, voltage_noise, current_noise)
+        self.random = random.Random(seed)
+
+    @property
+    def duration(self):
+        return float(self.time_s[-1] - self.time_s[0])
+
+    def _noisy(self, value, sigma):
+        return value + self.random.gauss(0.0, sigma) if sigma else value
+
+    def thrust(self, t):
+        value = float(np.interp(t, self.time_s, self.force))
+        return self._noisy(value, self.noise[0])
+
+    def electrical(self, t):
+        # (bus voltage, current) at t
+        voltage = float(np.interp(t, self.time_s, self.voltage))
+        current = float(np.interp(t, self.time_s, self.current))
+        return (self._noisy(voltage, self.noise[1]),
+                self._noisy(current, self.noise[2]))
+
+
+def throttle_steps(levels=(0.0, 0.25, 0.5, 0.75, 1.0, 0.0), step_s=5.0,
+                   ramp_s=0.5, max_thrust=20.0, max_current=40.0,
+                   battery_voltage=16.8, internal_resistance=0.02,
+                   force_noise=0.02, voltage_noise=0.005, current_noise=0.05,
+                   seed=0):
+    # Synthetic static thrust run: throttle held at each level for step_s
+    # with a ramp between levels. Current rises with thrust**1.5 (ideal
+    # momentum theory) and the battery sags with the current drawn
+    times = [0.0]
+    throttle = [levels[0]]
+    for level in levels[1:]:
+        times += [times[-1] + step_s - ramp_s, times[-1] + step_s]
+        throttle += [throttle[-1], level]
+    times.append(times[-1] + step_s)
+    throttle.append(throttle[-1])
+
+    throttle = np.array(throttle)
+    force = max_thrust * throttle
+    current = max_current * throttle ** 1.5
+    voltage = battery_voltage - internal_resistance * current
+
+    return Profile(times, force, voltage, current, force_noise, voltage_noise,
+                   current_noise, seed)
+
+
+def recorded(path):
+    # Replaying a recorded run (CSV log or binlog file); columns missing from
+    # the log (force-only runs) are held at zero
+    if path.endswith('.bin'):
+        from Thrust_Binary_Log import iter_binary_log_chunks
+        blocks = [columns for header, columns in iter_binary_log_chunks(path)]
+        time_s = np.concatenate([block['time_s'] for block in blocks])
+        columns = {name: np.concatenate([block[name] for block in blocks])
+                   for name in ('force', 'voltage', 'current')
+                   if name in blocks[0]}
+    else:
+        from Thrust_Log_Analysis import (iter_log_chunks, TIMESTAMP_COLUMN,
+                                         FORCE_COLUMN)
+        names = {'force': FORCE_COLUMN, 'voltage': 'Voltage (V)',
+                 'current': 'Current (A)'}
+        with open(path) as file:
+            # Only the first run of the file
+            chunks = [(header, rows) for run, header, rows
+                      in iter_log_chunks(file) if run == 0]
+        header = chunks[0][0]
+        rows = np.concatenate([rows for header, rows in chunks])
+        time_s = rows[:, header.index(TIMESTAMP_COLUMN)]
+        columns = {name: rows[:, header.index(column)]
+                   for name, column in names.items() if column in header}
+
+    zeros = np.zeros_like(time_s)
+    return Profile(time_s - time_s[0], columns.get('force', zeros),
+                   columns.get('voltage', zeros), columns.get('current', zeros))